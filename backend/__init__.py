@@ -1,19 +1,29 @@
 """
 Package initialization file.
+
+Exports are resolved on first access, so importing one submodule does not
+load every service.
 """
-from backend.app import WebContentAnalyzer
-from backend.scraping_service import ScrapingService
-from backend.web_scraper import WebScraper
-from backend.content_extractor import ContentExtractor
-from backend.validators import validate_url
-from backend.security import check_url_security
+import importlib
+
+_EXPORTS = {
+    'WebContentAnalyzer': 'backend.app',
+    'ScrapingService': 'backend.scraping_service',
+    'WebScraper': 'backend.web_scraper',
+    'ContentExtractor': 'backend.content_extractor',
+    'validate_url': 'backend.validators',
+    'check_url_security': 'backend.security',
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    'WebContentAnalyzer',
-    'ScrapingService',
-    'WebScraper',
-    'ContentExtractor',
-    'validate_url',
-    'check_url_security'
-]
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
 
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,174 @@
+"""
+Admission control for analysis requests.
+
+Each traffic class gets its own capacity pool: a fixed number of requests
+run at once, a bounded queue waits for a free slot up to a deadline, and
+anything beyond that is turned away immediately with a Retry-After hint
+instead of piling up. An optional per-API-key cap keeps one tenant from
+taking every slot.
+"""
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from backend.metrics import registry
+from backend.config import get_settings
+
+ADMISSIONS = registry.counter(
+    'wca_admission_total', 'Admission decisions by capacity pool and outcome', ('pool', 'outcome')
+)
+ADMISSION_QUEUE = registry.gauge(
+    'wca_admission_queue_depth', 'Requests waiting for a free slot', ('pool',)
+)
+ADMISSION_ACTIVE = registry.gauge(
+    'wca_admission_active', 'Requests holding a slot', ('pool',)
+)
+
+class Overloaded(Exception):
+    """A request was not admitted; carries the HTTP status and a Retry-After hint"""
+
+    def __init__(self, message: str, retry_after: int, status_code: int = 503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+class CapacityPool:
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        """
+        Args:
+            name (str): Pool name used in metrics and errors
+            limit (int): Requests running at once
+            queue_size (int): Requests allowed to wait for a slot
+            queue_timeout (float): Seconds a request may wait before it is turned away
+        """
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque = deque()
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self._hold_seconds = 1.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue would drain, rounded up"""
+        return max(1, math.ceil(self._hold_seconds * (self.queued + 1) / max(self.limit, 1)))
+
+    async def acquire(self):
+        """
+        Take a slot, waiting in the queue if the pool is full.
+
+        Raises:
+            Overloaded: If the queue is full or the wait passes the deadline
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            ADMISSIONS.inc(pool=self.name, outcome='admitted')
+            ADMISSION_ACTIVE.set(self.active, pool=self.name)
+            return
+        if self.queued >= self.queue_size:
+            ADMISSIONS.inc(pool=self.name, outcome='rejected_queue_full')
+            raise Overloaded(f"Server busy: {self.name} capacity is exhausted", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE.set(self.queued, pool=self.name)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            ADMISSIONS.inc(pool=self.name, outcome='rejected_timeout')
+            raise Overloaded(f"Server busy: no {self.name} capacity within {self.queue_timeout:g}s",
+                             self.retry_after()) from None
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        ADMISSIONS.inc(pool=self.name, outcome='queued')
+
+    def _abandon(self, waiter: asyncio.Future):
+        """Drop a waiter that gave up; a slot handed to it in the meantime moves on"""
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            ADMISSION_QUEUE.set(self.queued, pool=self.name)
+        elif waiter.done() and not waiter.cancelled():
+            self.release()
+
+    def release(self, held_seconds: Optional[float] = None):
+        """Give a slot back, handing it straight to the oldest waiter if there is one"""
+        if held_seconds is not None:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            ADMISSION_QUEUE.set(self.queued, pool=self.name)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+        ADMISSION_ACTIVE.set(self.active, pool=self.name)
+
+class AdmissionController:
+    def __init__(self, pools: Dict[str, CapacityPool], key_limit: int = 0):
+        """
+        Args:
+            pools (Dict[str, CapacityPool]): Capacity pools by traffic class
+            key_limit (int): Requests one API key may have admitted or queued at once; 0 disables
+        """
+        self.pools = pools
+        self.key_limit = key_limit
+        self._keys: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def admit(self, pool: str, api_key: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Hold a slot in a pool for the duration of the block.
+
+        Args:
+            pool (str): Traffic class: 'interactive', 'batch' or 'crawl'
+            api_key (Optional[str]): Caller's key, for the per-key quota
+
+        Raises:
+            Overloaded: With status 429 if the key is over its quota, 503 if the pool is saturated
+        """
+        capacity = self.pools[pool]
+        counted = bool(self.key_limit and api_key)
+        if counted:
+            if self._keys.get(api_key, 0) >= self.key_limit:
+                ADMISSIONS.inc(pool=pool, outcome='rejected_quota')
+                raise Overloaded(f"Too many concurrent requests for this API key (limit {self.key_limit})",
+                                 capacity.retry_after(), status_code=429)
+            self._keys[api_key] = self._keys.get(api_key, 0) + 1
+        try:
+            await capacity.acquire()
+            start = time.monotonic()
+            try:
+                yield
+            finally:
+                capacity.release(time.monotonic() - start)
+        finally:
+            if counted:
+                self._keys[api_key] -= 1
+                if not self._keys[api_key]:
+                    del self._keys[api_key]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Active and queued requests per pool"""
+        return {name: {'active': pool.active, 'queued': pool.queued, 'limit': pool.limit}
+                for name, pool in self.pools.items()}
+
+def create_admission_controller() -> AdmissionController:
+    """Build the controller from settings"""
+    settings = get_settings()
+    return AdmissionController({
+        'interactive': CapacityPool('interactive', settings.admission_interactive_limit,
+                                    settings.admission_queue_size, settings.admission_queue_timeout),
+        'batch': CapacityPool('batch', settings.admission_batch_limit,
+                              settings.admission_queue_size, settings.admission_queue_timeout),
+        'crawl': CapacityPool('crawl', settings.admission_crawl_limit,
+                              settings.admission_queue_size, settings.admission_queue_timeout),
+    }, key_limit=settings.admission_key_limit)
@@ -0,0 +1,268 @@
+"""
+Rollups over a batch of analysis results.
+
+Results are read once into columns: host, success flag, sentiment, word
+count and fetch/total latency as NumPy arrays, with strings turned into
+integer codes. Topics are kept as one flat array of codes, each topic
+once per result. Every rollup is then an array operation over those
+columns: counts per host and per sentiment with bincount, and latency
+percentiles per host from a single sort by (host, latency).
+
+Stored AnalysisResult records are read through their attributes, which is
+what keeps 100k results well under a second; plain result dicts, e.g.
+posted to the API, go through the same columns more slowly.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from collections.abc import Mapping
+from backend.lazy import optional_module
+from backend.result_model import AnalysisResult
+
+np = optional_module('numpy')
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+def _netloc(url: Optional[str]) -> str:
+    """Everything between the scheme and the path; may still carry a query or fragment"""
+    return url.partition('://')[2].partition('/')[0] if url else ''
+
+def host_of(url: Optional[str]) -> str:
+    """Lower-cased host of a URL, without credentials or port"""
+    return _host(_netloc(url))
+
+def _host(netloc: str) -> str:
+    netloc = netloc.partition('?')[0].partition('#')[0].rpartition('@')[2]
+    if netloc.startswith('['):
+        return netloc[:netloc.find(']') + 1].lower()
+    return netloc.partition(':')[0].lower()
+
+class _Codes(dict):
+    """String to integer code, assigning the next code to strings not seen before"""
+    def __missing__(self, key: str) -> int:
+        code = self[key] = len(self)
+        return code
+
+    def names(self) -> List[str]:
+        return list(self)
+
+class _HostCodes(dict):
+    """Netloc to host code; many URLs share a netloc, so each is parsed once"""
+    def __init__(self, hosts: _Codes):
+        super().__init__()
+        self.hosts = hosts
+
+    def __missing__(self, netloc: str) -> int:
+        code = self[netloc] = self.hosts[_host(netloc)]
+        return code
+
+class _TopicCodes(dict):
+    """A result's topics to their codes, each topic once; results often share the same topics"""
+    def __init__(self, topics: _Codes):
+        super().__init__()
+        self.topics = topics
+
+    def __missing__(self, key: Tuple[str, ...]) -> List[int]:
+        normalized = dict.fromkeys(topic.strip().lower() for topic in key if isinstance(topic, str))
+        codes = self[key] = [self.topics[topic] for topic in normalized if topic]
+        return codes
+
+class ResultColumns:
+    """One batch of results as parallel arrays"""
+
+    def __init__(self, results: Iterable[Union[AnalysisResult, Mapping]]):
+        """
+        Args:
+            results: AnalysisResult records or result dicts, in any mix
+
+        Raises:
+            RuntimeError: If numpy is not installed
+        """
+        if np is None:
+            raise RuntimeError("Batch aggregates require numpy")
+        hosts = _Codes()
+        sentiments = _Codes()
+        topics = _Codes()
+        host_codes_of = _HostCodes(hosts)
+        topic_codes_of = _TopicCodes(topics)
+        host_codes: List[int] = []
+        ok: List[bool] = []
+        sentiment_codes: List[int] = []
+        word_counts: List[float] = []
+        fetch_ms: List[float] = []
+        total_ms: List[float] = []
+        topic_codes: List[int] = []
+        nan = float('nan')
+
+        for result in results:
+            if isinstance(result, AnalysisResult):
+                url = result.url
+                success = result.status == 'success'
+                content = result.content
+                analysis = result.analysis
+                timings = result.metadata.timings if result.metadata is not None else None
+                words = content.words() if content is not None else None
+                sentiment = analysis.sentiment if analysis is not None else None
+                result_topics = analysis.topics if analysis is not None else None
+            else:
+                url = result.get('url')
+                success = result.get('status', 'success') == 'success'
+                content = result.get('content') or {}
+                analysis = result.get('analysis') or {}
+                timings = (result.get('metadata') or {}).get('timings')
+                main_content = content.get('main_content')
+                words = len(main_content.split()) if isinstance(main_content, str) else None
+                sentiment = analysis.get('sentiment')
+                result_topics = analysis.get('topics')
+
+            host_codes.append(host_codes_of[_netloc(url)])
+            ok.append(success)
+            if success:
+                sentiment_codes.append(sentiments[sentiment.lower() if isinstance(sentiment, str) else 'unknown'])
+                word_counts.append(nan if words is None else words)
+            else:
+                sentiment_codes.append(-1)
+                word_counts.append(nan)
+            if timings:
+                fetch_ms.append(timings.get('fetch', nan))
+                total_ms.append(timings.get('total', nan))
+            else:
+                fetch_ms.append(nan)
+                total_ms.append(nan)
+            if result_topics and success:
+                topic_codes.extend(topic_codes_of[tuple(result_topics)])
+
+        self.hosts = hosts.names()
+        self.sentiments = sentiments.names()
+        self.topics = topics.names()
+        self.host = np.array(host_codes, dtype=np.int32)
+        self.ok = np.array(ok, dtype=bool)
+        self.sentiment = np.array(sentiment_codes, dtype=np.int32)
+        self.word_count = np.array(word_counts, dtype=np.float64)
+        self.fetch_ms = np.array(fetch_ms, dtype=np.float64)
+        self.total_ms = np.array(total_ms, dtype=np.float64)
+        self.topic = np.array(topic_codes, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.host)
+
+def _number(value: float, digits: int = 3) -> Optional[float]:
+    """JSON-ready float; NaN (no data) becomes None"""
+    return None if value != value else round(float(value), digits)
+
+def _percentiles(values, quantiles: Sequence[float] = PERCENTILES) -> Dict[str, Optional[float]]:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {f"p{round(q * 100)}": None for q in quantiles}
+    points = np.quantile(values, quantiles)
+    return {f"p{round(q * 100)}": _number(point) for q, point in zip(quantiles, points)}
+
+def group_percentiles(groups, values, group_count: int, quantiles: Sequence[float] = PERCENTILES):
+    """
+    Percentiles of `values` within each group, with one sort for all groups.
+
+    Values are ordered by (group, value); each group's percentiles are then
+    interpolated between positions computed from its offset and size, as
+    np.quantile's default (linear) method does. NaN values are ignored.
+
+    Args:
+        groups (np.ndarray): Group code per value, 0 <= code < group_count
+        values (np.ndarray): Values to summarize
+        group_count (int): Number of groups
+        quantiles (Sequence[float]): Quantiles between 0 and 1
+
+    Returns:
+        np.ndarray: Shape (group_count, len(quantiles)); NaN for groups without values
+    """
+    present = ~np.isnan(values)
+    groups = groups[present]
+    values = values[present]
+    ordered = values[np.lexsort((values, groups))]
+    sizes = np.bincount(groups, minlength=group_count)
+    starts = np.cumsum(sizes) - sizes
+    positions = starts[:, None] + (sizes[:, None] - 1) * np.asarray(quantiles)[None, :]
+    empty = sizes == 0
+    positions[empty] = 0
+    low = np.floor(positions).astype(np.int64)
+    high = np.ceil(positions).astype(np.int64)
+    if len(ordered):
+        result = ordered[low] + (ordered[high] - ordered[low]) * (positions - low)
+    else:
+        result = np.zeros(positions.shape)
+    result[empty] = np.nan
+    return result
+
+class ResultAggregator:
+    def aggregate(self, results: Union[ResultColumns, Iterable], top_topics: int = 10,
+                  max_hosts: int = 50) -> Dict[str, Any]:
+        """
+        Roll a batch of results up by sentiment, topic and host.
+
+        Args:
+            results: Results (records or dicts), or their ResultColumns
+            top_topics (int): Most frequent topics to list
+            max_hosts (int): Hosts to list, those with the most results first
+
+        Returns:
+            Dict[str, Any]: Totals, sentiment distribution, word-count percentiles,
+                top topics and per-host error rates and latency percentiles
+
+        Raises:
+            RuntimeError: If numpy is not installed
+        """
+        columns = results if isinstance(results, ResultColumns) else ResultColumns(results)
+        total = len(columns)
+        succeeded = int(columns.ok.sum())
+
+        sentiment_counts = np.bincount(columns.sentiment[columns.ok], minlength=len(columns.sentiments))
+        sentiment_order = np.argsort(-sentiment_counts, kind='stable')
+        topic_counts = np.bincount(columns.topic, minlength=len(columns.topics))
+        topic_order = np.argsort(-topic_counts, kind='stable')[:top_topics]
+
+        host_count = len(columns.hosts)
+        per_host = np.bincount(columns.host, minlength=host_count)
+        errors = np.bincount(columns.host, weights=~columns.ok, minlength=host_count)
+        fetch = group_percentiles(columns.host, columns.fetch_ms, host_count)
+        total_ms = group_percentiles(columns.host, columns.total_ms, host_count)
+        words = group_percentiles(columns.host, columns.word_count, host_count, (0.5,))
+        labels = [f"p{round(q * 100)}" for q in PERCENTILES]
+
+        hosts = []
+        for code in np.argsort(-per_host, kind='stable')[:max_hosts]:
+            hosts.append({
+                'host': columns.hosts[code],
+                'results': int(per_host[code]),
+                'errors': int(errors[code]),
+                'error_rate': _number(errors[code] / per_host[code], 4),
+                'fetch_ms': dict(zip(labels, map(_number, fetch[code]))),
+                'total_ms': dict(zip(labels, map(_number, total_ms[code]))),
+                'word_count_p50': _number(words[code, 0], 1),
+            })
+
+        return {
+            'results': total,
+            'succeeded': succeeded,
+            'failed': total - succeeded,
+            'error_rate': _number((total - succeeded) / total, 4) if total else None,
+            'sentiment': {columns.sentiments[code]: int(sentiment_counts[code])
+                          for code in sentiment_order if sentiment_counts[code]},
+            'word_count': _percentiles(columns.word_count),
+            'fetch_ms': _percentiles(columns.fetch_ms),
+            'top_topics': [{'topic': columns.topics[code], 'results': int(topic_counts[code])}
+                           for code in topic_order if topic_counts[code]],
+            'hosts': hosts,
+            'host_count': host_count,
+        }
+
+def batch_overview(results: Sequence, max_hosts: int = 20) -> Optional[Dict[str, Any]]:
+    """
+    Aggregates for the overview section of a batch report.
+
+    Args:
+        results (Sequence): Results in the report
+        max_hosts (int): Hosts to list
+
+    Returns:
+        Optional[Dict[str, Any]]: The aggregates, or None for a single result or without numpy
+    """
+    if np is None or len(results) < 2:
+        return None
+    return ResultAggregator().aggregate(results, max_hosts=max_hosts)
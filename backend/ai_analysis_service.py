@@ -1,14 +1,24 @@
-from typing import Dict, Any
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from typing import Dict, Any, Optional
+from backend.config import get_settings
+from backend.deadline import Deadline
 
 class AIAnalysisService:
     def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
+        self.api_key = get_settings().openai_api_key
         
-    def analyze_content(self, content_data: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_content(self, content_data: Dict[str, Any],
+                        deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Analyze scraped content.
+
+        The analysis is local and quick, so the deadline is only checked before
+        starting; a model call made here should get deadline.clip() as its timeout.
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if deadline is not None:
+            deadline.check('analysis')
         try:
             # Extract content from scraping result
             content = content_data.get('content', {})
@@ -1,24 +1,28 @@
 """
 OpenAI API client for LLM integration.
 """
-import openai
 import json
 from typing import Dict, Optional
-import os
-from dotenv import load_dotenv
+from backend.metrics import track_stage
+from backend.config import get_settings
+from backend.lazy import lazy_module
+from backend.deadline import Deadline
 
-# Load environment variables
-load_dotenv()
+# Longest a single LLM call may take when the request has time to spare
+LLM_TIMEOUT = 60.0
+
+# The OpenAI client is large; it is imported when the first AIService is built
+openai = lazy_module('openai')
 
 class AIService:
     def __init__(self):
         # Get API key from environment variable
-        api_key = os.getenv("OPENAI_API_KEY")
+        api_key = get_settings().openai_api_key
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is missing.")
 
-        # Configure OpenAI
-        openai.api_key = api_key
+        # Configure OpenAI; OPENAI_BASE_URL can point the client at a compatible endpoint
+        self.client = openai.AsyncOpenAI(api_key=api_key)
         self.model = "gpt-3.5-turbo"  # Using a more widely available model
         
         # Default structure for analysis response
@@ -32,10 +36,17 @@ class AIService:
             "suggestions": []
         }
 
-    async def analyze_text(self, text: str, prompt: Optional[str] = None) -> Dict:
+    async def analyze_text(self, text: str, prompt: Optional[str] = None,
+                           deadline: Optional[Deadline] = None) -> Dict:
         """
         Sends text to the LLM for analysis and returns structured output.
+
+        The call is given whatever is left of the deadline, so a slow model
+        cannot hold the request past it.
         """
+        deadline = deadline or Deadline.unbounded()
+        if deadline.expired:
+            return {**self.default_analysis, "partial": True, "deadline_exceeded": "llm"}
         system_prompt = '''You are an expert content analyzer. Analyze the given text and provide insights in a structured way.
         Return your analysis in ONLY valid JSON format with the following structure:
         {
@@ -51,22 +62,25 @@ class AIService:
 
         try:
             # Make the API call
-            response = await openai.ChatCompletion.acreate(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
+            with track_stage("llm"):
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": text}
+                    ],
+                    temperature=0.7,
+                    max_tokens=1000,
+                    timeout=deadline.clip(LLM_TIMEOUT)
+                )
 
             # Get the response content
-            analysis_result = response.choices[0].message['content']
+            analysis_result = response.choices[0].message.content
             
             try:
                 # Try to parse the JSON response
-                parsed_analysis = json.loads(analysis_result)
+                with track_stage("llm_parse"):
+                    parsed_analysis = json.loads(analysis_result)
                 
                 # Ensure all required fields are present
                 for key in self.default_analysis.keys():
@@ -1,46 +1,200 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import contextvars
+from concurrent.futures import Executor, ThreadPoolExecutor
 from backend.scraping_service import ScrapingService       
 from backend.ai_analysis_service import AIAnalysisService
+from backend.response_profiles import ResponseProfile, FULL_PROFILE
+from backend.link_graph import normalize_url
+from backend.metrics import COALESCED, RESULTS, track_stage
+from backend.deadline import Deadline, DeadlineExceeded
+from backend.profiling import sampled_thread
+from backend.result_model import Analysis, AnalysisResult, PageContent, PageMetadata
+from backend.similarity import SimilarityIndex, page_text
+from backend.config import get_settings
+
+# Seconds a caller keeps waiting past its deadline for a worker that is wrapping up
+DEADLINE_GRACE = 0.25
+
+class _Flight:
+    """One analysis in progress and the callers waiting for it"""
+    __slots__ = ('future', 'deadline', 'waiters')
+
+    def __init__(self, deadline: Deadline):
+        self.future: Optional[asyncio.Future] = None
+        self.deadline = deadline
+        self.waiters = 0
 
 class WebContentAnalyzer:
-    def __init__(self):
-        self.scraping_service = ScrapingService()
+    def __init__(self, scraping_service: Optional[ScrapingService] = None,
+                 similarity: Optional[SimilarityIndex] = None):
+        """
+        Args:
+            scraping_service (Optional[ScrapingService]): Page source and extraction; fetches
+                from the network by default
+            similarity (Optional[SimilarityIndex]): Index analyzed pages are added to; pages
+                are not indexed if None. The API opens the SIMILARITY_DIR index at startup
+        """
+        self.scraping_service = scraping_service or ScrapingService()
+        self.similarity = similarity
         self.ai_service = AIAnalysisService()
+        # Background analyses (batches, crawls) run on their own threads so they never hold up
+        # /analyze on the default executor; one per URL the admitted batches may run at once
+        settings = get_settings()
+        self.batch_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.admission_batch_limit * settings.batch_concurrency),
+            thread_name_prefix='batch-analysis'
+        )
+        # Analyses currently running, keyed by normalized URL, prompt and profile
+        self._inflight: Dict[Tuple, _Flight] = {}
+
+    async def analyze_url(self, url: str, custom_prompt: Optional[str] = None,
+                          profile: ResponseProfile = FULL_PROFILE,
+                          deadline: Optional[Deadline] = None,
+                          executor: Optional[Executor] = None) -> AnalysisResult:
+        """
+        Analyze a URL, sharing the work with identical analyses already in flight.
+
+        Concurrent callers asking for the same normalized URL, prompt and profile
+        await a single fetch and analysis. A caller that is cancelled or runs out
+        of time stops waiting; the shared work is only cancelled once nobody is
+        waiting for it, and runs until the latest of the callers' deadlines.
+
+        Args:
+            url (str): URL to analyze
+            custom_prompt (Optional[str]): Extra instructions for the analysis
+            profile (ResponseProfile): Fields to produce
+            deadline (Optional[Deadline]): When the caller stops waiting; no limit if None
+            executor (Optional[Executor]): Where the analysis runs; the default executor if None
 
-    async def analyze_url(self, url: str, custom_prompt: Optional[str] = None) -> Dict:
+        Returns:
+            AnalysisResult: Analysis result; coalesced callers get their own copy of the top level,
+            carrying the URL they asked for
+        """
+        deadline = deadline or Deadline.unbounded()
+        loop = asyncio.get_running_loop()
+        key = (normalize_url(url) or url, custom_prompt, profile)
+        flight = self._inflight.get(key)
+        leader = flight is None or flight.future.get_loop() is not loop
+        if leader:
+            flight = _Flight(Deadline.at(deadline.expires_at))
+            # Fetching and parsing block, so they run on an executor, in this request's
+            # context so that a request profile also samples the worker thread
+            flight.future = loop.run_in_executor(
+                executor, contextvars.copy_context().run,
+                self.analyze_url_sync, url, custom_prompt, profile, flight.deadline
+            )
+            self._inflight[key] = flight
+            flight.future.add_done_callback(lambda done: self._finish_flight(key, flight))
+        else:
+            COALESCED.inc()
+            flight.deadline.extend_to(deadline)
+
+        flight.waiters += 1
         try:
-            # Use the correct method name: analyze_url
-            scraping_result = self.scraping_service.analyze_url(url)
-            
-            # Check for 'status' field instead of 'success'
-            if scraping_result.get('status') != 'success':
-                return {
-                    'status': 'error',
-                    'error': scraping_result.get('error', 'Scraping failed'),
-                    'url': url
-                }
-            
-            # Analyze the content
-            analysis_result = self.ai_service.analyze_content(scraping_result)
-            
-            return {
-                'status': 'success',
-                'url': scraping_result.get('url', url),
-                'content': scraping_result.get('content', {}),
-                'analysis': analysis_result,
-                'metadata': scraping_result.get('metadata', {})
-            }
+            result = await asyncio.wait_for(asyncio.shield(flight.future), deadline.wait_timeout(DEADLINE_GRACE))
+        except asyncio.TimeoutError:
+            result = AnalysisResult.failure(url, 'Deadline exceeded before the analysis finished', 'total')
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.future.done():
+                # Every caller has gone; let the worker stop at its next stage
+                flight.deadline.cancel()
+        if not leader:
+            result = result.with_url(url)
+        RESULTS.inc(status=result.status)
+        return result
+
+    def _finish_flight(self, key: Tuple, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def analyze_url_sync(self, url: str, custom_prompt: Optional[str] = None,
+                         profile: ResponseProfile = FULL_PROFILE,
+                         deadline: Optional[Deadline] = None) -> AnalysisResult:
+        """
+        Analyze a URL on the calling thread, without sharing the work with other callers.
+
+        analyze_url runs this on the executor; worker processes such as archive
+        backfills call it directly.
+        """
+        deadline = deadline or Deadline.unbounded()
+        timings = {}
+        partial = False
+        try:
+            with sampled_thread(), track_stage('total', timings):
+                # Use the correct method name: analyze_url
+                with track_stage('scrape', timings):
+                    scraping_result = AnalysisResult.from_dict(
+                        self.scraping_service.analyze_url(url, profile, timings, deadline=deadline)
+                    )
+                
+                # Check for 'status' field instead of 'success'
+                if scraping_result.status != 'success':
+                    return AnalysisResult.failure(
+                        url, scraping_result.error or 'Scraping failed', scraping_result.deadline_exceeded
+                    )
+                
+                # Analyze the content, unless the profile leaves it out or time has run out,
+                # in which case the scraped content is returned marked as partial
+                analysis_result = None
+                if profile.includes('analysis') and deadline.expired:
+                    partial = True
+                elif profile.includes('analysis'):
+                    try:
+                        with track_stage('analysis', timings):
+                            analysis_result = self.ai_service.analyze_content(scraping_result, deadline)
+                    except DeadlineExceeded:
+                        partial = True
+
+                # Index the page, noting the closest page already indexed if it is a near-copy
+                duplicate = None
+                content = scraping_result.content
+                if self.similarity is not None and content is not None and content.main_content:
+                    with track_stage('index', timings):
+                        duplicate = self.similarity.add(url, page_text(content.title, content.main_content))
+
+            # The scraping result becomes the response; only the envelope fields change
+            result = scraping_result
+            result.url = result.url or url
+            result.content = result.content or PageContent()
+            result.analysis = Analysis.from_dict(analysis_result)
+            result.metadata = result.metadata or PageMetadata()
+            if profile.includes('metadata.timings'):
+                result.metadata.timings = timings
+            if duplicate is not None:
+                result.metadata.extra = {**(result.metadata.extra or {}), 'duplicate_of': duplicate._asdict()}
+            if partial:
+                result.partial = True
+                result.metadata.deadline_exceeded = 'analysis'
+            result.profile = profile
+            return result
             
         except Exception as e:
-            return {
-                'status': 'error',
-                'error': str(e),
-                'url': url
-            }
-
-    async def batch_analysis(self, urls: List[str], custom_prompt: Optional[str] = None) -> List[Dict]:
-        results = []
-        for url in urls:
-            result = await self.analyze_url(url, custom_prompt)
-            results.append(result)
-        return results
+            return AnalysisResult.failure(url, str(e))
+
+    async def batch_analysis(self, urls: List[str], custom_prompt: Optional[str] = None,
+                             profile: ResponseProfile = FULL_PROFILE,
+                             concurrency: Optional[int] = None,
+                             deadline: Optional[Deadline] = None) -> List[AnalysisResult]:
+        """
+        Analyze several URLs, at most `concurrency` at a time (all at once if None).
+
+        The deadline covers the whole batch; URLs still waiting for a turn when it
+        passes come back as deadline errors without being fetched. Analyses run on
+        batch_executor, apart from those of interactive requests.
+
+        Returns:
+            List[AnalysisResult]: Results in the order of `urls`
+        """
+        if concurrency is None:
+            return list(await asyncio.gather(
+                *(self.analyze_url(url, custom_prompt, profile, deadline, self.batch_executor) for url in urls)
+            ))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(url: str) -> AnalysisResult:
+            async with semaphore:
+                return await self.analyze_url(url, custom_prompt, profile, deadline, self.batch_executor)
+
+        return list(await asyncio.gather(*(bounded(url) for url in urls)))
@@ -0,0 +1,285 @@
+"""
+WARC archive of raw fetches.
+
+Fetched responses are appended to rotating WARC files. Each record is its
+own gzip member, so any record can be decompressed on its own. Next to
+every `.warc.gz` file an `.idx` file maps URLs to record offsets. The
+reader memory-maps archive files and slices records out of them, which
+keeps random access cheap for replay and backfills.
+
+Bodies are stored decoded: the HTTP block keeps the response's status line
+and headers, minus Content-Encoding and Transfer-Encoding, and a
+Content-Length for the stored body.
+"""
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import base64
+import gzip
+import hashlib
+import mmap
+import os
+import threading
+import uuid
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from backend.config import get_settings
+from backend.link_graph import normalize_url
+from backend.metrics import registry
+from backend.result_model import Headers
+
+ARCHIVED = registry.counter(
+    'wca_archive_records_total', 'Fetched responses written to the WARC archive'
+)
+ARCHIVED_BYTES = registry.counter(
+    'wca_archive_bytes_total', 'Compressed bytes written to the WARC archive'
+)
+
+WARC_VERSION = b'WARC/1.1'
+WARC_SUFFIX = '.warc.gz'
+INDEX_SUFFIX = '.idx'
+# Hop-by-hop and encoding headers that no longer describe the stored body
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+# zlib's default level; higher levels cost fetch-path CPU for little gain on HTML
+COMPRESS_LEVEL = 6
+
+class IndexEntry(NamedTuple):
+    """Where one archived response lives"""
+    url: str
+    timestamp: str
+    filename: str
+    offset: int
+    length: int
+    status_code: int
+
+class ArchivedResponse(NamedTuple):
+    url: str
+    status_code: int
+    headers: Headers
+    body: bytes
+    timestamp: str
+
+def _warc_record(warc_type: str, headers: List[Tuple[str, str]], block: bytes) -> bytes:
+    lines = [WARC_VERSION]
+    lines.append(f"WARC-Type: {warc_type}".encode())
+    lines.append(f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>".encode())
+    for name, value in headers:
+        lines.append(f"{name}: {value}".encode('utf-8'))
+    lines.append(f"Content-Length: {len(block)}".encode())
+    return b'\r\n'.join(lines) + b'\r\n\r\n' + block + b'\r\n\r\n'
+
+def _http_block(status_code: int, headers: Mapping, body: bytes) -> bytes:
+    try:
+        reason = HTTPStatus(status_code).phrase
+    except ValueError:
+        reason = ''
+    lines = [f"HTTP/1.1 {status_code} {reason}".encode('latin-1')]
+    for name, value in headers.items():
+        if name.lower() not in DROPPED_HEADERS:
+            lines.append(f"{name}: {value}".encode('latin-1', 'replace'))
+    lines.append(f"Content-Length: {len(body)}".encode('latin-1'))
+    return b'\r\n'.join(lines) + b'\r\n\r\n' + body
+
+def _parse_header_lines(data: bytes, encoding: str) -> List[Tuple[str, str]]:
+    pairs = []
+    for line in data.split(b'\r\n'):
+        name, _, value = line.decode(encoding, 'replace').partition(':')
+        if name:
+            pairs.append((name.strip(), value.strip()))
+    return pairs
+
+def parse_record(record: bytes) -> Optional[ArchivedResponse]:
+    """
+    Read a decompressed WARC response record.
+
+    Args:
+        record (bytes): One record, as written by WarcWriter
+
+    Returns:
+        Optional[ArchivedResponse]: The response, or None for other record types
+    """
+    warc_head, _, rest = record.partition(b'\r\n\r\n')
+    warc_headers = dict(_parse_header_lines(warc_head.split(b'\r\n', 1)[1], 'utf-8'))
+    if warc_headers.get('WARC-Type') != 'response':
+        return None
+    block = rest[:int(warc_headers['Content-Length'])]
+    http_head, _, body = block.partition(b'\r\n\r\n')
+    status_line, _, header_lines = http_head.partition(b'\r\n')
+    headers = Headers.from_items(_parse_header_lines(header_lines, 'latin-1'))
+    return ArchivedResponse(
+        url=warc_headers['WARC-Target-URI'],
+        status_code=int(status_line.split()[1]),
+        headers=headers,
+        body=body,
+        timestamp=warc_headers.get('WARC-Date', '')
+    )
+
+class WarcWriter:
+    def __init__(self, directory: str, max_bytes: int = 1 << 30, prefix: str = 'fetch'):
+        """
+        Args:
+            directory (str): Where archive and index files are written
+            max_bytes (int): Size at which a file is closed and a new one started
+            prefix (str): File name prefix
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._file = None
+        self._index = None
+        self._filename = ''
+        self._sequence = 0
+
+    def write(self, url: str, status_code: int, headers: Mapping, body: bytes,
+              requested_url: Optional[str] = None) -> IndexEntry:
+        """
+        Append a fetched response to the archive.
+
+        Args:
+            url (str): Final URL of the response
+            status_code (int): HTTP status
+            headers (Mapping): Response headers
+            body (bytes): Decoded response body
+            requested_url (Optional[str]): URL that was asked for, if redirected; the index is keyed by it
+
+        Returns:
+            IndexEntry: Where the record was written
+        """
+        now = datetime.now(timezone.utc)
+        digest = base64.b32encode(hashlib.sha1(body).digest()).decode()
+        record = gzip.compress(_warc_record('response', [
+            ('WARC-Date', now.strftime('%Y-%m-%dT%H:%M:%SZ')),
+            ('WARC-Target-URI', url),
+            ('WARC-Payload-Digest', f'sha1:{digest}'),
+            ('Content-Type', 'application/http; msgtype=response'),
+        ], _http_block(status_code, headers, body)), COMPRESS_LEVEL)
+        timestamp = now.strftime('%Y%m%d%H%M%S')
+
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_bytes:
+                self._rotate(now)
+            offset = self._file.tell()
+            self._file.write(record)
+            self._file.flush()
+            key = requested_url or url
+            entry = IndexEntry(normalize_url(key) or key, timestamp, self._filename, offset, len(record), status_code)
+            self._index.write('\t'.join(map(str, entry[:2] + entry[3:])) + '\n')
+            self._index.flush()
+        ARCHIVED.inc()
+        ARCHIVED_BYTES.inc(len(record))
+        return entry
+
+    def _rotate(self, now: datetime):
+        """Close the current file and start the next, beginning with a warcinfo record"""
+        self._close_files()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sequence += 1
+        # The pid keeps files of several workers sharing one directory apart
+        self._filename = f"{self.prefix}-{now.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{self._sequence:05d}{WARC_SUFFIX}"
+        self._file = open(self.directory / self._filename, 'ab')
+        self._index = open(self.directory / (self._filename + INDEX_SUFFIX), 'a', encoding='utf-8')
+        info = b'software: web-content-analyzer\r\nformat: WARC File Format 1.1\r\n'
+        self._file.write(gzip.compress(_warc_record('warcinfo', [
+            ('WARC-Date', now.strftime('%Y-%m-%dT%H:%M:%SZ')),
+            ('WARC-Filename', self._filename),
+            ('Content-Type', 'application/warc-fields'),
+        ], info), COMPRESS_LEVEL))
+
+    def _close_files(self):
+        for f in (self._file, self._index):
+            if f is not None:
+                f.close()
+        self._file = self._index = None
+
+    def close(self):
+        with self._lock:
+            self._close_files()
+
+class ArchiveReader:
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Directory holding `.warc.gz` files and their `.idx` indexes
+        """
+        self.directory = Path(directory)
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._lock = threading.Lock()
+        self._latest: Optional[Dict[str, IndexEntry]] = None
+
+    def entries(self) -> Iterator[IndexEntry]:
+        """Every indexed record, file by file in name order"""
+        for index_path in sorted(self.directory.glob('*' + WARC_SUFFIX + INDEX_SUFFIX)):
+            filename = index_path.name[:-len(INDEX_SUFFIX)]
+            with open(index_path, encoding='utf-8') as f:
+                for line in f:
+                    url, timestamp, offset, length, status_code = line.rstrip('\n').split('\t')
+                    yield IndexEntry(url, timestamp, filename, int(offset), int(length), int(status_code))
+
+    def latest_entries(self) -> List[IndexEntry]:
+        """The most recent capture of every archived URL"""
+        if self._latest is None:
+            latest = {}
+            for entry in self.entries():
+                current = latest.get(entry.url)
+                if current is None or entry.timestamp >= current.timestamp:
+                    latest[entry.url] = entry
+            self._latest = latest
+        return list(self._latest.values())
+
+    def use_entries(self, entries: List[IndexEntry]):
+        """Serve lookups from these entries only, without reading the index files"""
+        self._latest = {entry.url: entry for entry in entries}
+
+    def lookup(self, url: str) -> Optional[IndexEntry]:
+        """
+        Find the most recent capture of a URL.
+
+        Args:
+            url (str): URL as requested; normalized the same way as when it was archived
+
+        Returns:
+            Optional[IndexEntry]: The capture, or None if the URL is not in the archive
+        """
+        if self._latest is None:
+            self.latest_entries()
+        return self._latest.get(normalize_url(url) or url)
+
+    def read(self, entry: IndexEntry) -> ArchivedResponse:
+        """
+        Read one archived response through a memory map of its file.
+
+        Raises:
+            ValueError: If the record is not a response record
+        """
+        view = self._map(entry.filename, entry.offset + entry.length)
+        response = parse_record(gzip.decompress(view[entry.offset:entry.offset + entry.length]))
+        if response is None:
+            raise ValueError(f"No response record at {entry.filename}:{entry.offset}")
+        return response
+
+    def _map(self, filename: str, needed: int) -> mmap.mmap:
+        """Map a file, mapping it again if it has grown past the current map"""
+        with self._lock:
+            view = self._maps.get(filename)
+            if view is None or len(view) < needed:
+                # A replaced map is left to readers still slicing it and closes once unreferenced
+                with open(self.directory / filename, 'rb') as f:
+                    view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[filename] = view
+            return view
+
+    def close(self):
+        with self._lock:
+            for view in self._maps.values():
+                view.close()
+            self._maps.clear()
+
+def create_archive_writer() -> Optional[WarcWriter]:
+    """The fetch archive configured in settings, or None when archiving is off"""
+    settings = get_settings()
+    if not settings.archive_dir:
+        return None
+    return WarcWriter(settings.archive_dir, settings.archive_max_bytes)
+
+fetch_archive = create_archive_writer()
@@ -0,0 +1,119 @@
+"""
+Reprocess a WARC archive with the current pipeline, without the network.
+
+The latest capture of every archived URL is replayed through extraction
+and analysis in a pool of worker processes, one per core by default, and
+the results are written as NDJSON in index order. Each worker maps the
+archive files itself and receives index entries in chunks, so the work
+is bound by CPU rather than by fetching.
+
+Usage:
+    python -m backend.backfill ARCHIVE_DIR [--output PATH] [--workers N] [--chunk-size N]
+        [--profile NAME] [--fields a.b,c] [--columns a,b]
+"""
+from typing import Iterator, List, Optional, Tuple
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from backend.archive import ArchiveReader, IndexEntry
+from backend.response_profiles import ResponseProfile
+from backend.result_model import as_dict
+
+# Per-process pipeline, built once by _init_worker
+_worker = None
+
+class _Worker:
+    def __init__(self, directory: str, profile: ResponseProfile, columns: Optional[List[str]]):
+        from backend.app import WebContentAnalyzer
+        from backend.export_service import ExportService
+        from backend.scraping_service import ScrapingService
+        from backend.web_scraper import ReplayScraper
+
+        self.reader = ArchiveReader(directory)
+        # No similarity index: it has a single writer, so index the output with python -m backend.similarity
+        self.analyzer = WebContentAnalyzer(ScrapingService(ReplayScraper(self.reader)))
+        self.export_service = ExportService()
+        self.profile = profile
+        self.columns = columns
+
+    def process(self, entries: List[IndexEntry]) -> Tuple[str, int]:
+        """Analyze a chunk of captures; returns their NDJSON lines and the number that failed"""
+        self.reader.use_entries(entries)
+        results = [self.analyzer.analyze_url_sync(entry.url, profile=self.profile) for entry in entries]
+        failed = sum(1 for result in results if result.status != 'success')
+        return ''.join(self.export_service.iter_ndjson(map(as_dict, results), self.columns)), failed
+
+def _init_worker(directory: str, profile: ResponseProfile, columns: Optional[List[str]]):
+    global _worker
+    _worker = _Worker(directory, profile, columns)
+
+def _process(entries: List[IndexEntry]) -> Tuple[str, int]:
+    return _worker.process(entries)
+
+def _chunks(entries: List[IndexEntry], size: int) -> Iterator[List[IndexEntry]]:
+    for start in range(0, len(entries), size):
+        yield entries[start:start + size]
+
+def backfill(directory: str, output, workers: Optional[int] = None, chunk_size: int = 64,
+             profile: Optional[ResponseProfile] = None, columns: Optional[List[str]] = None) -> Tuple[int, int]:
+    """
+    Reprocess the latest capture of every URL in an archive.
+
+    Args:
+        directory (str): Archive directory
+        output: Text file the NDJSON results are written to
+        workers (Optional[int]): Worker processes; one per core if None, in-process if 1
+        chunk_size (int): Captures handed to a worker at a time
+        profile (Optional[ResponseProfile]): Fields to produce for each result
+        columns (Optional[List[str]]): Export columns to keep, None keeps whole results
+
+    Returns:
+        Tuple[int, int]: Captures processed and how many of them failed
+    """
+    profile = profile or ResponseProfile()
+    entries = ArchiveReader(directory).latest_entries()
+    workers = workers or os.cpu_count() or 1
+    failed = 0
+    if workers == 1:
+        _init_worker(directory, profile, columns)
+        for lines, chunk_failed in map(_process, _chunks(entries, chunk_size)):
+            output.write(lines)
+            failed += chunk_failed
+        return len(entries), failed
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(directory, profile, columns)) as pool:
+        # map() yields chunks in submission order, so the output follows the index
+        for lines, chunk_failed in pool.map(_process, _chunks(entries, chunk_size)):
+            output.write(lines)
+            failed += chunk_failed
+    return len(entries), failed
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reprocess a WARC archive without the network")
+    parser.add_argument("archive", help="Directory holding .warc.gz files and their .idx indexes")
+    parser.add_argument("--output", default="-", help="NDJSON output file, - for stdout")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, one per core by default")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Captures handed to a worker at a time")
+    parser.add_argument("--profile", default=None, help="Response profile, e.g. summary")
+    parser.add_argument("--fields", default=None, help="Comma-separated dotted fields to keep")
+    parser.add_argument("--columns", default=None, help="Comma-separated export columns instead of whole results")
+    args = parser.parse_args(argv)
+
+    profile = ResponseProfile.parse(args.profile, args.fields)
+    columns = args.columns.split(',') if args.columns else None
+    start = time.perf_counter()
+    if args.output == '-':
+        processed, failed = backfill(args.archive, sys.stdout, args.workers, args.chunk_size, profile, columns)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            processed, failed = backfill(args.archive, output, args.workers, args.chunk_size, profile, columns)
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed else 0.0
+    print(f"Reprocessed {processed} pages ({failed} failed) in {elapsed:.1f}s, {rate:.1f} pages/s",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Charset resolution for fetched documents.
+
+The encoding is taken from the first of these that gives an answer: a
+byte order mark, the charset parameter of the Content-Type header, a
+`<meta charset>` or XML declaration in the first few KB, and finally
+detection over a bounded sample. A byte order mark is unambiguous, so as
+in browsers it comes before the header. Detection never looks at more than
+DETECTION_SAMPLE bytes, so its cost does not grow with the page.
+"""
+from typing import Optional, Tuple
+import codecs
+import re
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:  # Detection falls back to windows-1252 without it
+    from_bytes = None
+
+# Bytes scanned for a declared charset
+SNIFF_BYTES = 4096
+# Bytes handed to statistical detection
+DETECTION_SAMPLE = 64 * 1024
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)'
+    rb'|<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)',
+    re.IGNORECASE
+)
+LATIN_ALPHABETS = ('Basic Latin', 'Latin', 'General Punctuation')
+# Labels browsers decode as windows-1252, which is a superset of them
+WINDOWS_1252_LABELS = {'iso-8859-1', 'iso8859-1', 'latin-1', 'latin1', 'l1', 'us-ascii', 'ascii'}
+
+def _normalize(label: Optional[str]) -> Optional[str]:
+    """The Python codec for a charset label, or None if it is unknown"""
+    if not label:
+        return None
+    label = label.strip().lower()
+    if label in WINDOWS_1252_LABELS:
+        return 'cp1252'
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+def _from_header(content_type: str) -> Optional[str]:
+    match = HEADER_CHARSET.search(content_type or '')
+    return _normalize(match.group(1)) if match else None
+
+def _from_bom(body: bytes) -> Optional[str]:
+    for bom, encoding in BOMS:
+        if body.startswith(bom):
+            return encoding
+    return None
+
+def _from_markup(body: bytes) -> Optional[str]:
+    match = META_CHARSET.search(body[:SNIFF_BYTES])
+    if match is None:
+        return None
+    encoding = _normalize((match.group(1) or match.group(2)).decode('ascii'))
+    # A document that could be read as ASCII to find this cannot be UTF-16
+    if encoding and encoding.startswith('utf-16'):
+        return 'utf-8'
+    return encoding
+
+def _detect(body: bytes) -> str:
+    sample = body[:DETECTION_SAMPLE]
+    try:
+        # Most unlabelled pages are UTF-8; the sample may end mid-character
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=len(sample) == len(body))
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if from_bytes is not None:
+        match = from_bytes(sample).best()
+        # The detector cannot reliably tell Latin-script code pages apart, so like browsers
+        # those fall back to windows-1252; other scripts and multi-byte encodings are trusted
+        if match is not None and not all(alphabet.startswith(LATIN_ALPHABETS) for alphabet in match.alphabets):
+            return _normalize(match.encoding) or 'cp1252'
+    return 'cp1252'
+
+def resolve_encoding(body: bytes, content_type: str = '') -> Tuple[str, str]:
+    """
+    Work out how a fetched document is encoded.
+
+    Args:
+        body (bytes): Response body
+        content_type (str): Content-Type header value
+
+    Returns:
+        Tuple[str, str]: Python codec name, and where it came from:
+        'bom', 'header', 'meta' or 'detected'
+    """
+    encoding = _from_bom(body)
+    if encoding:
+        return encoding, 'bom'
+    encoding = _from_header(content_type)
+    if encoding:
+        return encoding, 'header'
+    encoding = _from_markup(body)
+    if encoding:
+        return encoding, 'meta'
+    return _detect(body), 'detected'
+
+def decode(body: bytes, content_type: str = '') -> Tuple[str, str]:
+    """
+    Decode a fetched document with the resolved charset.
+
+    Args:
+        body (bytes): Response body
+        content_type (str): Content-Type header value
+
+    Returns:
+        Tuple[str, str]: The text, and the codec used
+    """
+    encoding, _ = resolve_encoding(body, content_type)
+    return body.decode(encoding, errors='replace'), encoding
@@ -0,0 +1,156 @@
+"""
+Application settings loaded from environment variables.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+import os
+from dotenv import load_dotenv
+
+@dataclass(frozen=True)
+class Settings:
+    # Directory where rendered export artifacts are stored
+    artifact_dir: str = "artifacts"
+    # Total size of stored export artifacts, least recently used deleted first; 0 for no limit
+    artifact_max_bytes: int = 1024 * 1024 * 1024
+    # Seconds an export artifact is kept after it was last used; 0 for no limit
+    artifact_max_age: int = 7 * 24 * 3600
+    # Number of analysis results kept in memory for export jobs
+    result_store_size: int = 1000
+    # Profiling endpoints and per-request profiling are off unless enabled
+    profiling_enabled: bool = False
+    # Token required in X-Admin-Token for admin endpoints; they are refused while unset
+    admin_token: str = ""
+    # Directory shared by workers to coordinate cluster-wide profiles
+    profile_dir: str = "profiles"
+    # Longest sampling window accepted by the admin profiler
+    profile_max_seconds: int = 60
+    # Links kept per page; 0 keeps every link. Only compact links report how many were dropped
+    max_links_per_page: int = 0
+    # Directory holding crawl checkpoints
+    crawl_dir: str = "crawls"
+    # Pages analyzed at the same time by one crawl
+    crawl_concurrency: int = 4
+    # Largest page budget a crawl may request
+    crawl_max_pages: int = 10000
+    # Check robots.txt before /analyze and /batch fetches; crawls always do
+    respect_robots: bool = False
+    # Seconds a fetched robots.txt is fresh, and served stale while it refreshes
+    robots_ttl: int = 86400
+    robots_stale_ttl: int = 3600
+    # Render client-side pages in headless browsers (needs playwright)
+    render_enabled: bool = False
+    # Browser contexts in the render pool, and pages each renders before it is replaced
+    render_pool_size: int = 2
+    render_pages_per_context: int = 50
+    # Seconds a single render may take
+    render_timeout: int = 15
+    # Hosts with open connection pools, and idle keep-alive connections kept per host
+    http_pool_hosts: int = 32
+    http_pool_size: int = 16
+    # Seconds to connect, between bytes while reading, and for a whole fetch
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 15.0
+    http_total_timeout: float = 30.0
+    # Largest response body read, after decompression; 0 for no limit
+    max_body_bytes: int = 10 * 1024 * 1024
+    # Times a failed connection attempt is retried
+    http_retries: int = 2
+    # Use HTTP/2 with origins that offer it (needs httpx[http2])
+    http2_enabled: bool = False
+    # Key for the LLM client; analysis works without it
+    openai_api_key: str = ""
+    # Concurrent /analyze and /batch requests; further requests queue, then get 503
+    admission_interactive_limit: int = 32
+    admission_batch_limit: int = 4
+    # Crawl pages analyzed at once across all crawls; further pages wait for a slot
+    admission_crawl_limit: int = 8
+    # Requests allowed to wait per pool, and seconds they may wait
+    admission_queue_size: int = 64
+    admission_queue_timeout: float = 5.0
+    # Requests one X-API-Key may have in flight at once, requests without one sharing a key; 0 disables
+    # the quota. Keys are not authenticated, so it needs a gateway that checks them
+    admission_key_limit: int = 0
+    # URLs of one batch analyzed at the same time
+    batch_concurrency: int = 8
+    # Directory for the WARC archive of fetched responses; archiving is off when empty
+    archive_dir: str = ""
+    # Size at which an archive file is closed and the next one started
+    archive_max_bytes: int = 1 << 30
+    # Directory for the page similarity index behind /similar; indexing is off when empty
+    similarity_dir: str = ""
+    # Embedding dimensions; a power of two up to 2048
+    similarity_dim: int = 256
+    # Cosine similarity from which a newly analyzed page is reported as a duplicate
+    similarity_duplicate_threshold: float = 0.9
+    # Seconds a request may take when the client sends no X-Request-Timeout
+    request_timeout: float = 30.0
+    # Largest X-Request-Timeout a client may ask for
+    request_timeout_max: float = 120.0
+    # Seconds a /batch request may take without X-Request-Timeout; 0 for no limit
+    batch_timeout: float = 0.0
+    # Largest X-Request-Timeout a /batch request may ask for
+    batch_timeout_max: float = 3600.0
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Load settings once per process.
+
+    Returns:
+        Settings: Application settings
+    """
+    load_dotenv()
+    return Settings(
+        artifact_dir=os.getenv("EXPORT_ARTIFACT_DIR", Settings.artifact_dir),
+        artifact_max_bytes=int(os.getenv("EXPORT_ARTIFACT_MAX_BYTES", Settings.artifact_max_bytes)),
+        artifact_max_age=int(os.getenv("EXPORT_ARTIFACT_MAX_AGE", Settings.artifact_max_age)),
+        result_store_size=int(os.getenv("RESULT_STORE_SIZE", Settings.result_store_size)),
+        profiling_enabled=_env_flag("PROFILING_ENABLED", Settings.profiling_enabled),
+        admin_token=os.getenv("ADMIN_TOKEN", Settings.admin_token),
+        profile_dir=os.getenv("PROFILE_DIR", Settings.profile_dir),
+        profile_max_seconds=int(os.getenv("PROFILE_MAX_SECONDS", Settings.profile_max_seconds)),
+        max_links_per_page=int(os.getenv("MAX_LINKS_PER_PAGE", Settings.max_links_per_page)),
+        crawl_dir=os.getenv("CRAWL_DIR", Settings.crawl_dir),
+        crawl_concurrency=int(os.getenv("CRAWL_CONCURRENCY", Settings.crawl_concurrency)),
+        crawl_max_pages=int(os.getenv("CRAWL_MAX_PAGES", Settings.crawl_max_pages)),
+        respect_robots=_env_flag("RESPECT_ROBOTS", Settings.respect_robots),
+        robots_ttl=int(os.getenv("ROBOTS_TTL", Settings.robots_ttl)),
+        robots_stale_ttl=int(os.getenv("ROBOTS_STALE_TTL", Settings.robots_stale_ttl)),
+        render_enabled=_env_flag("RENDER_ENABLED", Settings.render_enabled),
+        render_pool_size=int(os.getenv("RENDER_POOL_SIZE", Settings.render_pool_size)),
+        render_pages_per_context=int(os.getenv("RENDER_PAGES_PER_CONTEXT", Settings.render_pages_per_context)),
+        render_timeout=int(os.getenv("RENDER_TIMEOUT", Settings.render_timeout)),
+        http_pool_hosts=int(os.getenv("HTTP_POOL_HOSTS", Settings.http_pool_hosts)),
+        http_pool_size=int(os.getenv("HTTP_POOL_SIZE", Settings.http_pool_size)),
+        http_connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", Settings.http_connect_timeout)),
+        http_read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", Settings.http_read_timeout)),
+        http_total_timeout=float(os.getenv("HTTP_TOTAL_TIMEOUT", Settings.http_total_timeout)),
+        max_body_bytes=int(os.getenv("MAX_BODY_BYTES", Settings.max_body_bytes)),
+        http_retries=int(os.getenv("HTTP_RETRIES", Settings.http_retries)),
+        http2_enabled=_env_flag("HTTP2_ENABLED", Settings.http2_enabled),
+        openai_api_key=os.getenv("OPENAI_API_KEY", Settings.openai_api_key),
+        admission_interactive_limit=int(os.getenv("ADMISSION_INTERACTIVE_LIMIT", Settings.admission_interactive_limit)),
+        admission_batch_limit=int(os.getenv("ADMISSION_BATCH_LIMIT", Settings.admission_batch_limit)),
+        admission_crawl_limit=int(os.getenv("ADMISSION_CRAWL_LIMIT", Settings.admission_crawl_limit)),
+        admission_queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", Settings.admission_queue_size)),
+        admission_queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", Settings.admission_queue_timeout)),
+        admission_key_limit=int(os.getenv("ADMISSION_KEY_LIMIT", Settings.admission_key_limit)),
+        batch_concurrency=int(os.getenv("BATCH_CONCURRENCY", Settings.batch_concurrency)),
+        archive_dir=os.getenv("ARCHIVE_DIR", Settings.archive_dir),
+        archive_max_bytes=int(os.getenv("ARCHIVE_MAX_BYTES", Settings.archive_max_bytes)),
+        similarity_dir=os.getenv("SIMILARITY_DIR", Settings.similarity_dir),
+        similarity_dim=int(os.getenv("SIMILARITY_DIM", Settings.similarity_dim)),
+        similarity_duplicate_threshold=float(
+            os.getenv("SIMILARITY_DUPLICATE_THRESHOLD", Settings.similarity_duplicate_threshold)
+        ),
+        request_timeout=float(os.getenv("REQUEST_TIMEOUT", Settings.request_timeout)),
+        request_timeout_max=float(os.getenv("REQUEST_TIMEOUT_MAX", Settings.request_timeout_max)),
+        batch_timeout=float(os.getenv("BATCH_TIMEOUT", Settings.batch_timeout)),
+        batch_timeout_max=float(os.getenv("BATCH_TIMEOUT_MAX", Settings.batch_timeout_max)),
+    )
@@ -0,0 +1,30 @@
+from typing import Callable
+from http.server import BaseHTTPRequestHandler
+import pytest
+from backend.security import get_security_checker
+from benchmarks.fixture_server import FixtureServer
+
+# Address loopback test servers resolve to, so that the SSRF check lets them through (TEST-NET-3)
+PUBLIC_ADDRESS = '203.0.113.10'
+
+@pytest.fixture
+def serve(monkeypatch):
+    """
+    Start loopback servers for a test: `serve(handler)` returns the origin, e.g. 'http://127.0.0.1:8000'.
+
+    For the SSRF check, 127.0.0.1 resolves to a public address during the test.
+    The servers shut down after the test.
+    """
+    checker = get_security_checker()
+    resolve = checker.resolve
+    monkeypatch.setattr(checker, 'resolve', lambda host: PUBLIC_ADDRESS if host == '127.0.0.1' else resolve(host))
+    servers = []
+
+    def start(handler: Callable[..., BaseHTTPRequestHandler]) -> str:
+        server = FixtureServer(pages={}, handler=handler).__enter__()
+        servers.append(server)
+        return server.origin
+
+    yield start
+    for server in servers:
+        server.__exit__()
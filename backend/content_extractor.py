@@ -1,34 +1,248 @@
 """
 Content extractor module for parsing and extracting relevant content from web pages.
 """
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+from bs4 import BeautifulSoup, NavigableString, Tag
+from typing import Any, Dict, Optional
+from urllib.parse import urljoin
+import json
 import re
+from backend.readability import ContentScorer
+from backend.link_graph import LinkGraph
+from backend.result_model import PageContent
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+PARAGRAPH_TAGS = {'p', 'blockquote', 'pre', 'figcaption', 'dt', 'dd', 'address'}
+LIST_TAGS = {'ul', 'ol'}
+# Elements whose text flows into the surrounding paragraph instead of starting a block
+INLINE_TAGS = {
+    'a', 'abbr', 'b', 'bdi', 'bdo', 'br', 'cite', 'code', 'data', 'dfn', 'em', 'i', 'kbd',
+    'label', 'mark', 'q', 's', 'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u', 'var', 'wbr'
+}
+# Elements skipped entirely when building the document model
+SKIP_TAGS = {'head', 'template', 'svg', 'canvas', 'iframe', 'form', 'button', 'select', 'textarea'}
+# Meta names and properties that carry the publication date
+DATE_META = ('article:published_time', 'date', 'pubdate', 'publishdate', 'dc.date', 'dcterms.created')
+
+# Marks the end of a block container during the document walk
+_FLUSH = object()
 
 class ContentExtractor:
-    def __init__(self):
+    def __init__(self, max_links: Optional[int] = None):
+        """
+        Args:
+            max_links (Optional[int]): Links kept per page; no cap when None
+        """
         # Common tags that usually contain main content
         self.content_tags = ['article', 'main', 'div', 'section']
         # Tags to exclude from content
         self.exclude_tags = ['nav', 'header', 'footer', 'script', 'style', 'noscript']
+        self.scorer = ContentScorer()
+        self.max_links = max_links
 
-    def extract_content(self, soup: BeautifulSoup) -> Dict[str, str]:
+    def extract_content(self, soup: BeautifulSoup, include_links: bool = True,
+                        structured: bool = False, base_url: Optional[str] = None,
+                        compact_links: bool = False) -> Dict[str, str]:
         """
         Extracts main content from a BeautifulSoup object.
         
         Args:
             soup (BeautifulSoup): Parsed HTML content
+            include_links (bool): Whether to extract the page links
+            structured (bool): Whether to add the structured document model
+            base_url (Optional[str]): URL the page was fetched from, for resolving relative URLs
+            compact_links (bool): Whether to return links in the column-wise compact form
             
         Returns:
             Dict containing extracted content elements
         """
+        return self.extract_page(soup, include_links, structured, base_url, compact_links).to_dict()
+
+    def extract_page(self, soup: BeautifulSoup, include_links: bool = True,
+                     structured: bool = False, base_url: Optional[str] = None,
+                     compact_links: bool = False) -> PageContent:
+        """
+        Extracts main content as a PageContent record, as used inside the pipeline.
+
+        Takes the same arguments as extract_content; links stay in their
+        column-wise LinkGraph instead of being expanded into dicts. Links, main
+        content and the structured document model are each built by their own
+        pass over the soup, so structured mode costs one more walk of the body.
+        """
+        # Built first: main content extraction removes nav/header/footer from the soup
+        document = self.extract_document(soup, base_url) if structured else None
+        links = LinkGraph.from_soup(soup, base_url, self.max_links).seal() if include_links else None
+
+        title = self._extract_title(soup)
+        main_content = self._extract_main_content(soup)
+        content = PageContent(
+            title=title,
+            main_content=main_content,
+            meta_description=self._extract_meta_description(soup),
+            links=links,
+            compact_links=compact_links,
+            word_count=len(main_content.split())
+        )
+        if document is not None:
+            content.metadata = {
+                "author": document["metadata"].get("author", ""),
+                "date": document["metadata"].get("date", "")
+            }
+            content.document = document
+        return content
+
+    def extract_document(self, soup: BeautifulSoup, base_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Builds a compact document model of the page from one walk of the body.
+
+        The walk stops at block elements (headings, paragraphs, lists, tables),
+        which read their own subtree's text; microdata items are read from
+        their subtree as well. Links and main content are not collected here.
+        
+        Args:
+            soup (BeautifulSoup): Parsed HTML content
+            base_url (Optional[str]): URL the page was fetched from, for resolving relative URLs
+            
+        Returns:
+            Dict with language, canonical URL, page metadata, heading outline and
+            content blocks (headings, paragraphs, lists and tables) in document order
+        """
+        blocks = []
+        outline = []
+        microdata = []
+        loose_text = []
+
+        def flush():
+            if loose_text:
+                text = self._clean_text(' '.join(loose_text))
+                loose_text.clear()
+                if text:
+                    blocks.append({"type": "paragraph", "text": text})
+
+        skip = SKIP_TAGS.union(self.exclude_tags)
+        stack = [soup.body or soup]
+        while stack:
+            node = stack.pop()
+            if node is _FLUSH:
+                flush()
+                continue
+            if isinstance(node, NavigableString):
+                # Comments, doctypes and CDATA are NavigableString subclasses
+                if type(node) is NavigableString and node.strip():
+                    loose_text.append(str(node))
+                continue
+            if not isinstance(node, Tag) or node.name in skip:
+                continue
+            if node.has_attr('itemscope'):
+                microdata.append(self._extract_microdata_item(node))
+
+            name = node.name
+            if name in INLINE_TAGS:
+                stack.extend(reversed(node.contents))
+                continue
+
+            flush()
+            if name in HEADING_TAGS:
+                text = self._clean_text(node.get_text(' '))
+                if text:
+                    level = int(name[1])
+                    blocks.append({"type": "heading", "level": level, "text": text})
+                    outline.append({"level": level, "text": text})
+            elif name in PARAGRAPH_TAGS:
+                text = self._clean_text(node.get_text(' '))
+                if text:
+                    blocks.append({"type": "paragraph", "text": text})
+            elif name in LIST_TAGS:
+                items = [self._clean_text(item.get_text(' ')) for item in node.find_all('li', recursive=False)]
+                items = [item for item in items if item]
+                if items:
+                    blocks.append({"type": "list", "ordered": name == 'ol', "items": items})
+            elif name == 'table':
+                rows = []
+                for row in node.find_all('tr'):
+                    cells = [self._clean_text(cell.get_text(' ')) for cell in row.find_all(['th', 'td'])]
+                    if any(cells):
+                        rows.append(cells)
+                if rows:
+                    blocks.append({"type": "table", "rows": rows})
+            else:
+                # Block container: walk its children, then close any loose text
+                stack.append(_FLUSH)
+                stack.extend(reversed(node.contents))
+        flush()
+
+        html = soup.find('html')
+        metadata = self._extract_page_metadata(soup)
+        if microdata:
+            metadata["microdata"] = microdata
+        canonical = soup.find('link', rel='canonical', href=True)
         return {
-            "title": self._extract_title(soup),
-            "main_content": self._extract_main_content(soup),
-            "meta_description": self._extract_meta_description(soup),
-            "links": self._extract_links(soup)
+            "lang": html.get('lang', '') if html else '',
+            "canonical_url": urljoin(base_url or '', canonical['href']) if canonical else (base_url or ''),
+            "metadata": metadata,
+            "outline": outline,
+            "blocks": blocks
         }
 
+    def _extract_page_metadata(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        """Collects OpenGraph, Twitter, JSON-LD, author and date metadata"""
+        metadata = {}
+        opengraph = {}
+        twitter = {}
+        for meta in soup.find_all('meta', content=True):
+            key = (meta.get('property') or meta.get('name') or '').strip().lower()
+            value = meta['content'].strip()
+            if not key or not value:
+                continue
+            if key.startswith('og:'):
+                opengraph[key[3:]] = value
+            elif key.startswith('twitter:'):
+                twitter[key[8:]] = value
+            if key == 'author':
+                metadata.setdefault('author', value)
+            elif key == 'keywords':
+                metadata['keywords'] = [word.strip() for word in value.split(',') if word.strip()]
+            elif key in DATE_META:
+                metadata.setdefault('date', value)
+        if opengraph:
+            metadata['opengraph'] = opengraph
+        if twitter:
+            metadata['twitter'] = twitter
+
+        json_ld = []
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                json_ld.append(json.loads(script.string or ''))
+            except ValueError:
+                continue
+        if json_ld:
+            metadata['json_ld'] = json_ld
+            for item in json_ld:
+                if isinstance(item, dict):
+                    metadata.setdefault('author', self._json_ld_author(item.get('author')))
+                    metadata.setdefault('date', item.get('datePublished', ''))
+            if not metadata.get('author'):
+                metadata.pop('author', None)
+            if not metadata.get('date'):
+                metadata.pop('date', None)
+        return metadata
+
+    def _json_ld_author(self, author: Any) -> str:
+        """Reads an author name from a JSON-LD author value"""
+        if isinstance(author, list):
+            return ', '.join(filter(None, (self._json_ld_author(item) for item in author)))
+        if isinstance(author, dict):
+            return str(author.get('name', ''))
+        return str(author) if author else ''
+
+    def _extract_microdata_item(self, node: Tag) -> Dict[str, Any]:
+        """Extracts an itemscope element's type and properties"""
+        properties = {}
+        for prop in node.find_all(attrs={'itemprop': True}):
+            value = (prop.get('content') or prop.get('datetime') or prop.get('href')
+                     or prop.get('src') or self._clean_text(prop.get_text(' ')))
+            properties.setdefault(prop['itemprop'], value)
+        return {"type": node.get('itemtype', ''), "properties": properties}
+
     def _extract_title(self, soup: BeautifulSoup) -> str:
         """Extracts page title"""
         title = soup.title.string if soup.title else ""
@@ -45,7 +259,12 @@ class ContentExtractor:
         for tag in soup.find_all(self.exclude_tags):
             tag.decompose()
 
-        # Try to find main content container
+        # Score containers by text and link density
+        text = self.scorer.extract_text(soup.find('body') or soup)
+        if text:
+            return self._clean_text(text)
+
+        # Fall back to the first container with a content-like class
         main_content = None
         for tag in self.content_tags:
             main_content = soup.find(tag, class_=re.compile(r'(content|article|post|main)'))
@@ -57,19 +276,6 @@ class ContentExtractor:
 
         return self._clean_text(main_content.get_text()) if main_content else ""
 
-    def _extract_links(self, soup: BeautifulSoup) -> List[Dict[str, str]]:
-        """Extracts relevant links from the page"""
-        links = []
-        for link in soup.find_all('a', href=True):
-            text = self._clean_text(link.get_text())
-            href = link['href']
-            if text and href and not href.startswith('#'):
-                links.append({
-                    "text": text,
-                    "href": href
-                })
-        return links
-
     def _clean_text(self, text: Optional[str]) -> str:
         """Cleans extracted text"""
         if not text:
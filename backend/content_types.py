@@ -0,0 +1,232 @@
+"""
+Content-type dispatch for fetched responses.
+
+Only HTML goes through BeautifulSoup. Plain text is used as-is, PDFs are
+read page by page, and RSS/Atom feeds are parsed as their body downloads,
+which stops once the items kept have arrived. Each extractor produces the
+same `content` schema as ContentExtractor, and anything else (images,
+archives, video) is rejected from the response headers before its body is
+downloaded.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+import io
+import itertools
+import re
+import xml.etree.ElementTree as ElementTree
+from backend.link_graph import LinkGraph
+from backend.lazy import optional_module
+
+# PDF text extraction is optional; pypdf is imported on the first PDF
+pypdf = optional_module('pypdf')
+
+HTML_TYPES = {'text/html', 'application/xhtml+xml'}
+TEXT_TYPES = {'text/plain', 'text/markdown', 'text/x-markdown', 'text/csv'}
+PDF_TYPES = {'application/pdf', 'application/x-pdf'}
+FEED_TYPES = {'application/rss+xml', 'application/atom+xml', 'application/feed+xml', 'application/rdf+xml'}
+# Generic XML is sniffed: feeds are often served with one of these types
+XML_TYPES = {'application/xml', 'text/xml'}
+
+# Characters of body text kept from non-HTML documents, matching what is worth sending to the LLM
+MAX_TEXT_LENGTH = 200_000
+FEED_CHUNK_SIZE = 64 * 1024
+MAX_FEED_ITEMS = 500
+
+def media_type(content_type: str) -> str:
+    """The media type of a Content-Type header, without parameters"""
+    return content_type.split(';', 1)[0].strip().lower()
+
+def classify(content_type: str) -> Optional[str]:
+    """
+    Map a Content-Type header to the extractor that handles it.
+
+    Args:
+        content_type (str): Content-Type header value, parameters included
+
+    Returns:
+        Optional[str]: 'html', 'text', 'pdf' or 'feed'; 'xml' when the body has to be
+        sniffed with is_feed; None if the type is not supported
+    """
+    media = media_type(content_type)
+    if not media or media in HTML_TYPES:
+        # A missing Content-Type has always been treated as HTML
+        return 'html'
+    if media in TEXT_TYPES:
+        return 'text'
+    if media in PDF_TYPES:
+        return 'pdf'
+    if media in FEED_TYPES:
+        return 'feed'
+    if media in XML_TYPES:
+        return 'xml'
+    return None
+
+def is_feed(body: bytes) -> bool:
+    """Whether a generic XML document is an RSS, RDF or Atom feed"""
+    head = body[:1024].lower()
+    return b'<rss' in head or b'<feed' in head or b'<rdf:rdf' in head
+
+def _clean(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip()
+
+def extract_text(text: str, include_links: bool = True) -> Dict:
+    """Content of a plain text document; the first line doubles as the title"""
+    text = text[:MAX_TEXT_LENGTH]
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), '')
+    content = {
+        "title": first_line[:200],
+        "main_content": _clean(text),
+        "meta_description": "",
+    }
+    if include_links:
+        content["links"] = []
+    return content
+
+def extract_pdf(body: bytes, include_links: bool = True) -> Dict:
+    """
+    Content of a PDF, read one page at a time until the text budget is spent.
+
+    Raises:
+        RuntimeError: If pypdf is not installed
+    """
+    if pypdf is None:
+        raise RuntimeError("PDF extraction requires pypdf; install it with `pip install pypdf`")
+    reader = pypdf.PdfReader(io.BytesIO(body))
+    info = reader.metadata or {}
+    parts = []
+    length = 0
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        length += len(text)
+        if length >= MAX_TEXT_LENGTH:
+            break
+    text = '\n'.join(parts)[:MAX_TEXT_LENGTH]
+    title = str(info.get('/Title') or '').strip()
+    if not title:
+        title = next((line.strip() for line in text.splitlines() if line.strip()), '')[:200]
+    content = {
+        "title": title,
+        "main_content": _clean(text),
+        "meta_description": str(info.get('/Subject') or '').strip(),
+    }
+    if include_links:
+        content["links"] = []
+    return content
+
+def _local(tag: str) -> str:
+    return tag.rpartition('}')[2].lower()
+
+def _pieces(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Chunks cut to FEED_CHUNK_SIZE, so the parser never queues more than one piece's events"""
+    for chunk in chunks:
+        for offset in range(0, len(chunk), FEED_CHUNK_SIZE):
+            yield chunk[offset:offset + FEED_CHUNK_SIZE]
+
+def iter_feed(body: Union[bytes, Iterable[bytes]]) -> Iterator[Dict[str, str]]:
+    """
+    Incrementally parse an RSS, RDF or Atom feed.
+
+    The first record describes the feed itself; every later record is an
+    item. Items are cleared from the tree once read, and chunks are only
+    pulled from `body` as records are consumed.
+
+    Args:
+        body (Union[bytes, Iterable[bytes]]): The feed, whole or as chunks while it downloads
+
+    Returns:
+        Iterator[Dict[str, str]]: Records with title, link and summary
+    """
+    chunks = (body,) if isinstance(body, (bytes, bytearray)) else body
+    parser = ElementTree.XMLPullParser(events=('start', 'end'))
+    stack = []
+    feed = {'title': '', 'link': '', 'summary': ''}
+    item = None
+    feed_sent = False
+    try:
+        for piece in _pieces(chunks):
+            parser.feed(piece)
+            for event, element in parser.read_events():
+                tag = _local(element.tag)
+                if event == 'start':
+                    stack.append(element)
+                    if tag in ('item', 'entry'):
+                        if not feed_sent:
+                            feed_sent = True
+                            yield feed
+                        item = {'title': '', 'link': '', 'summary': ''}
+                    continue
+                stack.pop()
+                record = item if item is not None else feed
+                if tag in ('item', 'entry'):
+                    yield item
+                    item = None
+                    if stack:
+                        stack[-1].remove(element)
+                elif tag == 'title' and not record['title']:
+                    record['title'] = _clean(element.text or '')
+                elif tag == 'link' and not record['link']:
+                    # Atom puts the URL in href, preferring rel="alternate"
+                    if element.get('rel', 'alternate') == 'alternate':
+                        record['link'] = (element.get('href') or element.text or '').strip()
+                elif tag in ('description', 'summary', 'subtitle') and not record['summary']:
+                    record['summary'] = _clean(element.text or '')
+                elif tag == 'content' and not record['summary']:
+                    record['summary'] = _clean(element.text or '')
+    except ElementTree.ParseError:
+        pass
+    if not feed_sent:
+        yield feed
+
+def read_feed(chunks: Iterable[bytes], sniff: bool = False,
+              max_items: int = MAX_FEED_ITEMS) -> Optional[List[Dict[str, str]]]:
+    """
+    Parse a feed as its body arrives, reading no further than the items kept.
+
+    Args:
+        chunks (Iterable[bytes]): Body chunks, e.g. straight from the response
+        sniff (bool): Check the start of the body with is_feed first, for generic XML types
+        max_items (int): Items to read
+
+    Returns:
+        Optional[List[Dict[str, str]]]: The feed record followed by its items, or None
+        when sniffing finds the document is not a feed
+    """
+    chunks = iter(chunks)
+    if sniff:
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= 1024:
+                break
+        if not is_feed(head):
+            return None
+        chunks = itertools.chain((head,), chunks)
+    return list(itertools.islice(iter_feed(chunks), max_items + 1))
+
+def feed_content(records: Iterable[Dict[str, str]], base_url: Optional[str] = None,
+                 include_links: bool = True, compact_links: bool = False,
+                 max_items: int = MAX_FEED_ITEMS) -> Dict:
+    """Content of a feed from its records: the items become the body text and the link list"""
+    records = iter(records)
+    feed = next(records)
+    links = LinkGraph(base_url)
+    paragraphs = []
+    for index, item in enumerate(records):
+        if index >= max_items:
+            break
+        paragraphs.append('. '.join(part for part in (item['title'], item['summary']) if part))
+        if item['link']:
+            links.add(item['link'], item['title'])
+    content = {
+        "title": feed['title'],
+        "main_content": ' '.join(paragraphs)[:MAX_TEXT_LENGTH],
+        "meta_description": feed['summary'],
+    }
+    if include_links:
+        content["links"] = links.to_compact() if compact_links else links.to_list()
+    return content
+
+def extract_feed(body: bytes, base_url: Optional[str] = None, include_links: bool = True,
+                 compact_links: bool = False, max_items: int = MAX_FEED_ITEMS) -> Dict:
+    """Content of a feed: its items become the body text and the link list"""
+    return feed_content(iter_feed(body), base_url, include_links, compact_links, max_items)
@@ -0,0 +1,426 @@
+"""
+Same-site crawler built on the analysis pipeline.
+
+A crawl starts from a seed URL, optionally seeds its frontier from the
+site's sitemaps, and follows internal links found by ContentExtractor up to
+a depth and page budget. Pages are analyzed concurrently through
+WebContentAnalyzer, URLs already seen are tracked in a Bloom filter, and
+the crawl state is checkpointed to disk so an interrupted crawl can resume.
+
+A checkpoint holds the frontier, the seen set and the job's counters, not
+the page results: those live in the in-memory ResultStore. A crawl resumed
+after a restart carries on where it stopped, but its result_ids only list
+the results the store still holds.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import base64
+import functools
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+from backend.admission import AdmissionController, Overloaded
+from backend.app import WebContentAnalyzer
+from backend.export_jobs import ResultStore
+from backend.link_graph import iter_links, normalize_url
+from backend.response_profiles import ResponseProfile
+from backend.robots import RobotsCache, robots_cache
+
+# Link types worth following; assets and other sites are never crawled
+FOLLOW_LINK_TYPES = ('internal', 'nav')
+# Crawled pages always keep their links, in the compact form
+CRAWL_PROFILE = ResponseProfile(compact_links=True)
+
+class BloomFilter:
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            capacity (int): Number of items the filter is sized for
+            error_rate (float): False positive rate at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> bool:
+        """
+        Adds an item.
+
+        Returns:
+            bool: True if the item was not in the filter before
+        """
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+    def copy(self) -> 'BloomFilter':
+        bloom = BloomFilter.__new__(BloomFilter)
+        bloom.__dict__.update(self.__dict__)
+        bloom.bits = bytearray(self.bits)
+        return bloom
+
+    def to_dict(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'count': self.count,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BloomFilter':
+        bloom = cls(data['capacity'], data['error_rate'])
+        bloom.bits = bytearray(base64.b64decode(data['bits']))
+        bloom.count = data['count']
+        return bloom
+
+def _site_of(url: str) -> str:
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+@dataclass
+class CrawlJob:
+    crawl_id: str
+    seed: str
+    max_depth: int = 2
+    max_pages: int = 100
+    use_sitemaps: bool = True
+    custom_prompt: Optional[str] = None
+    status: str = 'pending'
+    pages_crawled: int = 0
+    pages_failed: int = 0
+    scheduled: int = 0
+    blocked_by_robots: int = 0
+    result_ids: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def to_dict(self) -> Dict:
+        return {
+            'crawl_id': self.crawl_id,
+            'status': self.status,
+            'seed': self.seed,
+            'max_depth': self.max_depth,
+            'max_pages': self.max_pages,
+            'pages_crawled': self.pages_crawled,
+            'pages_failed': self.pages_failed,
+            'scheduled': self.scheduled,
+            'blocked_by_robots': self.blocked_by_robots,
+            'result_ids': self.result_ids,
+            'error': self.error,
+            'created_at': self.created_at,
+        }
+
+@dataclass
+class CrawlState:
+    """Everything needed to resume a crawl, besides the job itself"""
+    frontier: deque = field(default_factory=deque)
+    seen: BloomFilter = field(default_factory=BloomFilter)
+
+class CheckpointStore:
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        # Snapshots are numbered so that a write finishing late never replaces a newer checkpoint
+        self._lock = threading.Lock()
+        self._taken = 0
+        self._written: Dict[str, int] = {}
+
+    def path(self, crawl_id: str) -> Path:
+        return self.directory / f"{crawl_id}.json"
+
+    def snapshot(self, job: CrawlJob, state: CrawlState, in_flight: Iterable[Tuple[str, int]] = ()) -> Dict:
+        """
+        Copy the crawl state for a checkpoint; cheap enough to take on the event loop.
+
+        Pages still being fetched are saved back into the frontier, so a
+        resumed crawl fetches them again instead of losing them.
+        """
+        with self._lock:
+            self._taken += 1
+            number = self._taken
+        return {
+            'number': number,
+            'job': asdict(job),
+            'frontier': list(in_flight) + list(state.frontier),
+            'seen': state.seen.copy(),
+        }
+
+    def write(self, snapshot: Dict):
+        """Encode a snapshot and replace the crawl's checkpoint with it atomically; blocks on I/O"""
+        crawl_id = snapshot['job']['crawl_id']
+        checkpoint = {'job': snapshot['job'], 'frontier': snapshot['frontier'], 'seen': snapshot['seen'].to_dict()}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(checkpoint, f)
+            with self._lock:
+                if self._written.get(crawl_id, 0) > snapshot['number']:
+                    os.unlink(temp_path)
+                    return
+                os.replace(temp_path, self.path(crawl_id))
+                self._written[crawl_id] = snapshot['number']
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def save(self, job: CrawlJob, state: CrawlState, in_flight: Iterable[Tuple[str, int]] = ()):
+        """Write a crawl checkpoint atomically"""
+        self.write(self.snapshot(job, state, in_flight))
+
+    async def save_async(self, job: CrawlJob, state: CrawlState, in_flight: Iterable[Tuple[str, int]] = ()):
+        """Write a crawl checkpoint from the event loop; encoding and writing run on the executor"""
+        snapshot = self.snapshot(job, state, in_flight)
+        await asyncio.get_running_loop().run_in_executor(None, self.write, snapshot)
+
+    def load(self, crawl_id: str) -> Optional[Tuple[CrawlJob, CrawlState]]:
+        """Read a checkpoint, or None if the crawl has none"""
+        try:
+            checkpoint = json.loads(self.path(crawl_id).read_text())
+        except (OSError, ValueError):
+            return None
+        job = CrawlJob(**checkpoint['job'])
+        state = CrawlState(
+            frontier=deque((url, depth) for url, depth in checkpoint['frontier']),
+            seen=BloomFilter.from_dict(checkpoint['seen'])
+        )
+        return job, state
+
+class Crawler:
+    def __init__(self, analyzer: WebContentAnalyzer, result_store: ResultStore,
+                 checkpoints: CheckpointStore, concurrency: int = 4,
+                 checkpoint_every: int = 20, seen_capacity: int = 1_000_000,
+                 robots: RobotsCache = robots_cache, admission: Optional[AdmissionController] = None):
+        """
+        Args:
+            analyzer (WebContentAnalyzer): Pipeline every page goes through
+            result_store (ResultStore): Receives each page's result
+            checkpoints (CheckpointStore): Where crawl state is saved
+            concurrency (int): Pages analyzed at the same time
+            checkpoint_every (int): Pages between checkpoints
+            seen_capacity (int): URLs the seen-set Bloom filter is sized for
+            robots (RobotsCache): robots.txt and sitemap cache
+            admission (Optional[AdmissionController]): Each page waits for a slot in its 'crawl'
+                pool; pages are not admission-controlled if None
+        """
+        self.analyzer = analyzer
+        self.result_store = result_store
+        self.checkpoints = checkpoints
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.seen_capacity = seen_capacity
+        self.robots = robots
+        self.admission = admission
+
+    async def new_state(self, job: CrawlJob) -> CrawlState:
+        """Fresh crawl state holding only the seed"""
+        state = CrawlState(seen=BloomFilter(self.seen_capacity))
+        seed = normalize_url(job.seed) or job.seed
+        await self._schedule(job, state, seed, 0)
+        return state
+
+    async def run(self, job: CrawlJob, state: CrawlState):
+        """
+        Crawl until the frontier is empty or the page budget is spent.
+
+        Args:
+            job (CrawlJob): Crawl settings and progress, updated in place
+            state (CrawlState): Frontier and seen set, from new_state or a checkpoint
+        """
+        loop = asyncio.get_running_loop()
+        job.status = 'running'
+        pending: Dict[asyncio.Task, Tuple[str, int]] = {}
+        since_checkpoint = 0
+        try:
+            if job.use_sitemaps and job.pages_crawled == 0:
+                site = _site_of(job.seed)
+                for url in await loop.run_in_executor(None, self.robots.sitemap_urls, job.seed):
+                    url = normalize_url(url)
+                    if url and _site_of(url) == site:
+                        await self._schedule(job, state, url, 1)
+
+            while state.frontier or pending:
+                while state.frontier and len(pending) < self.concurrency:
+                    url, depth = state.frontier.popleft()
+                    task = loop.create_task(self._analyze(job, url))
+                    pending[task] = (url, depth)
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url, depth = pending.pop(task)
+                    await self._record(job, state, task.result(), depth)
+                    since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    await self.checkpoints.save_async(job, state, pending.values())
+                    since_checkpoint = 0
+            job.status = 'completed'
+        except asyncio.CancelledError:
+            job.status = 'cancelled'
+            for task in pending:
+                task.cancel()
+            raise
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            await self.checkpoints.save_async(job, state, pending.values())
+
+    async def _analyze(self, job: CrawlJob, url: str) -> Dict:
+        """Analyze a page on the analyzer's background threads, once admission control lets it in"""
+        analysis = functools.partial(
+            self.analyzer.analyze_url, url, job.custom_prompt, CRAWL_PROFILE, executor=self.analyzer.batch_executor
+        )
+        if self.admission is None:
+            return await analysis()
+        while True:
+            try:
+                async with self.admission.admit('crawl'):
+                    return await analysis()
+            except Overloaded as e:
+                # Crawls are background work: wait for capacity instead of dropping the page
+                await asyncio.sleep(e.retry_after)
+
+    async def _record(self, job: CrawlJob, state: CrawlState, result: Dict, depth: int):
+        """Store a page result and queue the internal links it found"""
+        job.result_ids.append(self.result_store.add(result))
+        if result.get('status') != 'success':
+            job.pages_failed += 1
+            return
+        job.pages_crawled += 1
+        if depth >= job.max_depth:
+            return
+        site = _site_of(job.seed)
+        for link in iter_links((result.get('content') or {}).get('links')):
+            if link.get('type') in FOLLOW_LINK_TYPES and _site_of(link['href']) == site:
+                await self._schedule(job, state, link['href'], depth + 1)
+
+    async def _schedule(self, job: CrawlJob, state: CrawlState, url: str, depth: int):
+        if job.scheduled >= job.max_pages or not state.seen.add(url):
+            return
+        # Served from the robots cache; only an origin's first lookup waits on a fetch
+        if not await self.robots.allowed_async(url):
+            job.blocked_by_robots += 1
+            return
+        job.scheduled += 1
+        state.frontier.append((url, depth))
+
+class CrawlManager:
+    def __init__(self, crawler: Crawler, max_jobs: int = 100):
+        self.crawler = crawler
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict = OrderedDict()
+        # The event loop only keeps weak references to tasks
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, seed: str, max_depth: int = 2, max_pages: int = 100, use_sitemaps: bool = True,
+               custom_prompt: Optional[str] = None) -> CrawlJob:
+        """
+        Start a crawl in the background.
+
+        Args:
+            seed (str): URL the crawl starts from
+            max_depth (int): Link hops followed from the seed
+            max_pages (int): Pages analyzed at most
+            use_sitemaps (bool): Whether to seed the frontier from the site's sitemaps
+            custom_prompt (Optional[str]): Prompt passed to the analysis of every page
+
+        Returns:
+            CrawlJob: The started crawl
+        """
+        job = CrawlJob(
+            crawl_id=uuid.uuid4().hex, seed=seed, max_depth=max_depth, max_pages=max_pages,
+            use_sitemaps=use_sitemaps, custom_prompt=custom_prompt
+        )
+        self._start(job, None)
+        return job
+
+    def resume(self, crawl_id: str) -> Optional[CrawlJob]:
+        """
+        Resume a crawl from its last checkpoint.
+
+        The frontier, seen set and counters are restored; result ids of pages
+        the result store no longer holds, e.g. after a restart, are dropped.
+
+        Returns:
+            Optional[CrawlJob]: The resumed crawl, or None if there is no checkpoint
+        """
+        running = self._tasks.get(crawl_id)
+        if running is not None and not running.done():
+            return self._jobs[crawl_id]
+        loaded = self.crawler.checkpoints.load(crawl_id)
+        if loaded is None:
+            return None
+        job, state = loaded
+        result_store = self.crawler.result_store
+        job.result_ids = [result_id for result_id in job.result_ids if result_store.get(result_id) is not None]
+        if job.status == 'completed':
+            self._jobs[crawl_id] = job
+            return job
+        job.error = None
+        self._start(job, state)
+        return job
+
+    def cancel(self, crawl_id: str) -> Optional[CrawlJob]:
+        """Stop a running crawl; it can be resumed later"""
+        task = self._tasks.get(crawl_id)
+        if task is not None:
+            task.cancel()
+        return self._jobs.get(crawl_id)
+
+    def get(self, crawl_id: str) -> Optional[CrawlJob]:
+        """Look up a crawl by id"""
+        return self._jobs.get(crawl_id)
+
+    async def shutdown(self):
+        """Cancel running crawls, leaving a checkpoint for each"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start(self, job: CrawlJob, state: Optional[CrawlState]):
+        self._jobs[job.crawl_id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        task = asyncio.get_running_loop().create_task(self._run(job, state))
+        self._tasks[job.crawl_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.crawl_id, None))
+
+    async def _run(self, job: CrawlJob, state: Optional[CrawlState]):
+        try:
+            if state is None:
+                state = await self.crawler.new_state(job)
+            await self.crawler.run(job, state)
+        except asyncio.CancelledError:
+            job.status = 'cancelled'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
@@ -0,0 +1,98 @@
+"""
+Request deadlines carried through the analysis pipeline.
+
+A Deadline is created when a request arrives, from the X-Request-Timeout
+header or the configured default, and handed to every stage. Stages check
+it before starting, clip their own timeouts to what is left, and stop
+early once it has passed or the client has gone away.
+"""
+from typing import Optional
+import math
+import time
+
+# Header carrying the client's timeout in seconds
+DEADLINE_HEADER = 'x-request-timeout'
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time before a stage could run"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded before {stage} finished")
+        self.stage = stage
+
+class Deadline:
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds (float): Budget from now; math.inf for no deadline
+        """
+        self.expires_at = time.monotonic() + seconds
+        self.cancelled = False
+
+    @classmethod
+    def at(cls, expires_at: float) -> 'Deadline':
+        """A deadline expiring at a time.monotonic() instant"""
+        deadline = cls(0)
+        deadline.expires_at = expires_at
+        return deadline
+
+    @classmethod
+    def unbounded(cls) -> 'Deadline':
+        return cls(math.inf)
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default: float, maximum: float) -> 'Deadline':
+        """
+        Build a request deadline from the client's X-Request-Timeout header.
+
+        Args:
+            value (Optional[str]): Header value in seconds, if sent
+            default (float): Budget when the header is missing or invalid; math.inf for none
+            maximum (float): Largest budget a client may ask for
+
+        Returns:
+            Deadline: The request's deadline
+        """
+        if value:
+            try:
+                seconds = float(value)
+            except ValueError:
+                seconds = 0
+            if seconds > 0:
+                return cls(min(seconds, maximum))
+        return cls(default)
+
+    def remaining(self) -> float:
+        """Seconds left, or 0 once expired or cancelled"""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str):
+        """
+        Raises:
+            DeadlineExceeded: If no time is left to run the stage
+        """
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+    def clip(self, timeout: float) -> float:
+        """A stage timeout shortened to the time left"""
+        return min(timeout, self.remaining())
+
+    def wait_timeout(self, grace: float = 0.0) -> Optional[float]:
+        """Timeout for asyncio waits; None when there is no deadline"""
+        remaining = self.remaining()
+        return None if math.isinf(remaining) else remaining + grace
+
+    def extend_to(self, other: 'Deadline'):
+        """Push this deadline out to another one's, if that is later"""
+        self.expires_at = max(self.expires_at, other.expires_at)
+
+    def cancel(self):
+        """Expire the deadline now, e.g. because every waiting client disconnected"""
+        self.cancelled = True
@@ -0,0 +1,294 @@
+"""
+Background export jobs rendered from stored analysis results.
+
+Artifacts are named by a hash of their inputs, so repeating an export
+serves the file already on disk instead of rendering it again. The store
+is bounded: artifacts unused for longer than its maximum age, and the
+least recently used ones beyond its size limit, are deleted as new
+artifacts are written.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from backend.export_service import ExportService, STREAM_MEDIA_TYPES
+from backend.pdf_renderer import pdf_renderer
+from backend.metrics import CACHE_HITS, CACHE_MISSES
+from backend.result_model import as_dict
+from backend.aggregates import batch_overview
+
+# Media type and file extension for every format an export job can produce
+ARTIFACT_TYPES = {
+    **{fmt: (media_type, fmt) for fmt, media_type in STREAM_MEDIA_TYPES.items()},
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'pdf': ('application/pdf', 'pdf'),
+}
+
+class ResultStore:
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._results: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, result: Dict) -> str:
+        """
+        Store an analysis result, evicting the oldest once the store is full.
+
+        Args:
+            result (Dict): Analysis result to keep, as an AnalysisResult or a plain dict
+
+        Returns:
+            str: Identifier to reference the result in export jobs
+        """
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = result
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Dict]:
+        """Look up a stored result by id"""
+        with self._lock:
+            return self._results.get(result_id)
+
+    def get_many(self, result_ids: List[str]) -> List[Dict]:
+        """
+        Look up several stored results, in order.
+
+        Raises:
+            KeyError: If any of the ids is unknown or has been evicted
+        """
+        with self._lock:
+            missing = [result_id for result_id in result_ids if result_id not in self._results]
+            if missing:
+                raise KeyError(f"Unknown result ids: {', '.join(missing)}")
+            return [self._results[result_id] for result_id in result_ids]
+
+class ArtifactStore:
+    def __init__(self, directory: str, max_bytes: int = 0, max_age: float = 0):
+        """
+        Args:
+            directory (str): Where artifacts are written
+            max_bytes (int): Total size of the stored artifacts; 0 for no limit
+            max_age (float): Seconds an artifact is kept after it was last used; 0 for no limit
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def key(self, fmt: str, columns: Optional[List[str]], results: List[Dict]) -> str:
+        """
+        Content hash identifying an export.
+
+        Args:
+            fmt (str): Export format
+            columns (Optional[List[str]]): Column selection, if any
+            results (List[Dict]): Results included in the export
+
+        Returns:
+            str: Hex digest of the format, columns and results
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([fmt, columns]).encode())
+        for result in results:
+            digest.update(json.dumps(as_dict(result), sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str, fmt: str) -> Path:
+        """Location of the artifact for an export key"""
+        return self.directory / f"{key}.{ARTIFACT_TYPES[fmt][1]}"
+
+    def lookup(self, key: str, fmt: str) -> bool:
+        """Whether the artifact for an export key is stored, marking it as just used if so"""
+        path = self.path(key, fmt)
+        try:
+            if self.max_age and time.time() - path.stat().st_mtime > self.max_age:
+                return False
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def prune(self, keep: Optional[Path] = None):
+        """
+        Delete expired artifacts, then the least recently used until the store fits max_bytes.
+
+        Args:
+            keep (Optional[Path]): Artifact never deleted, e.g. the one just written
+        """
+        if not self.max_bytes and not self.max_age:
+            return
+        with self._lock:
+            entries = []
+            for path in self.directory.iterdir():
+                if path.suffix == '.part' or path == keep:
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            if keep is not None:
+                total += keep.stat().st_size
+            now = time.time()
+            for used, size, path in sorted(entries):
+                expired = self.max_age and now - used > self.max_age
+                if not expired and (not self.max_bytes or total <= self.max_bytes):
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def write(self, key: str, fmt: str, render: Callable[[Any], None]) -> Path:
+        """
+        Render an artifact into the store, pruning it afterwards.
+
+        The file is written under a temporary name and renamed into place, so
+        readers never see a partially written artifact.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.path(key, fmt)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                render(f)
+            os.replace(temp_path, target)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.prune(keep=target)
+        return target
+
+@dataclass
+class ExportJob:
+    job_id: str
+    format: str
+    result_ids: List[str]
+    columns: Optional[List[str]] = None
+    status: str = 'pending'
+    key: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'format': self.format,
+            'result_count': len(self.result_ids),
+            'cached': self.cached,
+            'error': self.error,
+            'created_at': self.created_at,
+        }
+
+class ExportJobManager:
+    def __init__(self, result_store: ResultStore, artifact_store: ArtifactStore,
+                 export_service: Optional[ExportService] = None, max_jobs: int = 1000):
+        self.result_store = result_store
+        self.artifact_store = artifact_store
+        self.export_service = export_service or ExportService()
+        self.max_jobs = max_jobs
+        self.executor = pdf_renderer.executor
+        self._jobs: OrderedDict = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # The event loop only keeps weak references to tasks
+        self._tasks: set = set()
+
+    async def submit(self, result_ids: List[str], fmt: str,
+                     columns: Optional[List[str]] = None) -> ExportJob:
+        """
+        Queue an export of stored results.
+
+        Args:
+            result_ids (List[str]): Ids returned by ResultStore.add
+            fmt (str): One of ARTIFACT_TYPES
+            columns (Optional[List[str]]): Column selection for tabular formats
+
+        Returns:
+            ExportJob: The queued job
+
+        Raises:
+            KeyError: If a result id is unknown
+            ValueError: If the format or columns are invalid
+        """
+        if fmt not in ARTIFACT_TYPES:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if columns is not None:
+            columns = self.export_service.resolve_columns(columns)
+        results = self.result_store.get_many(result_ids)
+
+        job = ExportJob(job_id=uuid.uuid4().hex, format=fmt, result_ids=list(result_ids), columns=columns)
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        task = asyncio.get_running_loop().create_task(self._run(job, results))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """Look up a job by id"""
+        return self._jobs.get(job_id)
+
+    def artifact_path(self, job: ExportJob) -> Optional[Path]:
+        """Path of a completed job's artifact"""
+        if job.status != 'completed' or job.key is None:
+            return None
+        return self.artifact_store.path(job.key, job.format)
+
+    async def _run(self, job: ExportJob, results: List[Dict]):
+        """Hash, render and store a job's artifact off the event loop"""
+        loop = asyncio.get_running_loop()
+        job.status = 'running'
+        try:
+            key = await loop.run_in_executor(
+                self.executor, self.artifact_store.key, job.format, job.columns, results
+            )
+            if self.artifact_store.lookup(key, job.format):
+                job.cached = True
+                CACHE_HITS.inc(cache='export_artifact')
+            elif key in self._inflight:
+                # An identical export is already rendering; share its artifact
+                await asyncio.shield(self._inflight[key])
+                job.cached = True
+                CACHE_HITS.inc(cache='export_artifact')
+            else:
+                CACHE_MISSES.inc(cache='export_artifact')
+                future = loop.run_in_executor(
+                    self.executor, self.artifact_store.write, key, job.format,
+                    lambda f: self._render(job.format, results, job.columns, f)
+                )
+                self._inflight[key] = future
+                try:
+                    await future
+                finally:
+                    self._inflight.pop(key, None)
+            job.key = key
+            job.status = 'completed'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+
+    def _render(self, fmt: str, results: List[Dict], columns: Optional[List[str]], f: Any):
+        """Write results in the requested format to a binary file"""
+        # Stored results are records; each is turned into its dict form as it is written
+        if fmt == 'pdf':
+            # Artifacts are cached by their results, so the report carries no time of its own
+            pdf_renderer.render(map(as_dict, results), f, batch_overview(results), stamped=False)
+        elif fmt == 'parquet':
+            self.export_service.to_parquet(map(as_dict, results), f)
+        else:
+            for chunk in self.export_service.iter_export(map(as_dict, results), fmt, columns):
+                f.write(chunk.encode('utf-8'))
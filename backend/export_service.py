@@ -1,15 +1,99 @@
 """
 Export service for generating reports in various formats.
 """
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
 import json
 import csv
 import io
 from datetime import datetime
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from urllib.parse import urlparse
+from backend.pdf_renderer import pdf_renderer
+from backend.link_graph import count_links, iter_links
+from backend.lazy import optional_module
+
+# Parquet export is optional; pyarrow is imported on first use
+pa = optional_module('pyarrow')
+pq = optional_module('pyarrow.parquet')
+
+def _content(result: Dict) -> Dict:
+    return result.get('content') or {}
+
+def _analysis(result: Dict) -> Dict:
+    analysis = result.get('analysis')
+    return analysis if isinstance(analysis, dict) else {}
+
+# Columns understood by the streaming exporters, in default output order.
+# Each getter receives a single analysis result and returns the cell value.
+EXPORT_COLUMNS: Dict[str, Callable[[Dict], Any]] = {
+    'url': lambda r: r.get('url', ''),
+    'status': lambda r: r.get('status', ''),
+    'title': lambda r: _content(r).get('title', ''),
+    'meta_description': lambda r: _content(r).get('meta_description', ''),
+    'content_length': lambda r: len(_content(r).get('main_content') or ''),
+    'link_count': lambda r: count_links(_content(r).get('links')),
+    'summary': lambda r: _analysis(r).get('summary', ''),
+    'sentiment': lambda r: _analysis(r).get('sentiment', ''),
+    'topics': lambda r: _analysis(r).get('topics', []),
+    'key_points': lambda r: _analysis(r).get('key_points', []),
+    'error': lambda r: r.get('error', ''),
+    'main_content': lambda r: _content(r).get('main_content', ''),
+    'links': lambda r: list(iter_links(_content(r).get('links'))),
+}
+
+# Columns that carry the page body or link list; left out unless requested
+HEAVY_COLUMNS = ('main_content', 'links')
+DEFAULT_COLUMNS = [name for name in EXPORT_COLUMNS if name not in HEAVY_COLUMNS]
+
+STREAM_MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+# Low-cardinality columns stored dictionary-encoded in Arrow and Parquet
+DICTIONARY_COLUMNS = ('domain', 'status', 'sentiment')
+
+def arrow_schema(include_content: bool = False) -> 'pa.Schema':
+    """
+    Typed Arrow schema used for columnar exports.
+    
+    Args:
+        include_content (bool): Whether to add the main_content column
+        
+    Returns:
+        pa.Schema: Schema for the record batches written by ExportService.to_parquet
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Parquet export")
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    fields = [
+        pa.field('url', pa.string()),
+        pa.field('domain', dictionary),
+        pa.field('status', dictionary),
+        pa.field('status_code', pa.int32()),
+        pa.field('title', pa.string()),
+        pa.field('meta_description', pa.string()),
+        pa.field('content_length', pa.int64()),
+        pa.field('summary', pa.string()),
+        pa.field('sentiment', dictionary),
+        pa.field('confidence_score', pa.float64()),
+        pa.field('key_points', pa.list_(pa.string())),
+        pa.field('topics', pa.list_(pa.string())),
+        pa.field('suggestions', pa.list_(pa.string())),
+        pa.field('links', pa.list_(pa.struct([('href', pa.string()), ('text', pa.string()), ('type', pa.string())]))),
+        pa.field('error', pa.string()),
+    ]
+    if include_content:
+        fields.append(pa.field('main_content', pa.string()))
+    return pa.schema(fields)
+
+class _RowBuffer:
+    """Write target for csv.writer that keeps only the last formatted row."""
+    def __init__(self):
+        self.row = ''
+
+    def write(self, row: str):
+        self.row = row
 
 class ExportService:
     def __init__(self):
@@ -68,89 +152,258 @@ class ExportService:
                 self._extract_key_points(analysis)
             ])
 
-    def to_pdf(self, data: Dict) -> bytes:
+    def resolve_columns(self, columns: Optional[Iterable[str]] = None) -> List[str]:
         """
-        Export analysis results to PDF format.
+        Validate a column selection for the streaming exporters.
         
         Args:
-            data (Dict): Analysis results to export
+            columns (Optional[Iterable[str]]): Requested column names, or None for the defaults
             
         Returns:
-            bytes: PDF document
+            List[str]: Column names in the requested order
         """
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30
-        )
-        elements.append(Paragraph("Web Content Analysis Report", title_style))
-        elements.append(Spacer(1, 12))
-        
-        # Add timestamp
-        elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-        elements.append(Spacer(1, 12))
-
-        if isinstance(data, list):
-            # Batch analysis results
-            for item in data:
-                elements.extend(self._create_pdf_section(item, styles))
-        else:
-            # Single analysis result
-            elements.extend(self._create_pdf_section(data, styles))
+        if columns is None:
+            return list(DEFAULT_COLUMNS)
+        selected = [name for name in columns if name]
+        unknown = [name for name in selected if name not in EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+        return selected
 
-        doc.build(elements)
-        return buffer.getvalue()
+    def project(self, result: Dict, columns: List[str]) -> Dict:
+        """Build a flat record holding only the selected columns of a result"""
+        return {name: EXPORT_COLUMNS[name](result) for name in columns}
 
-    def _create_pdf_section(self, data: Dict, styles: Dict) -> List:
-        """Helper method to create PDF elements for a single analysis"""
-        elements = []
+    def iter_csv(self, data: Union[Dict, Iterable[Dict]],
+                 columns: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """
+        Stream analysis results as CSV, one row per chunk.
         
-        if data.get('status') == 'success':
-            content = data.get('content', {})
-            analysis = data.get('analysis', {})
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            columns (Optional[Iterable[str]]): Columns to include, defaults to DEFAULT_COLUMNS
             
-            # URL and title
-            elements.append(Paragraph(f"URL: {data.get('url')}", styles['Heading2']))
-            elements.append(Paragraph(f"Title: {content.get('title')}", styles['Heading3']))
-            elements.append(Spacer(1, 12))
+        Returns:
+            Iterator[str]: Header row followed by one chunk per result
+        """
+        columns = self.resolve_columns(columns)
+        buffer = _RowBuffer()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.row
+        for item in self._iter_results(data):
+            writer.writerow([self._csv_cell(EXPORT_COLUMNS[name](item)) for name in columns])
+            yield buffer.row
+
+    def iter_ndjson(self, data: Union[Dict, Iterable[Dict]],
+                    columns: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """
+        Stream analysis results as newline-delimited JSON.
+        
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            columns (Optional[Iterable[str]]): Columns to include, None keeps the full result
             
-            # Content statistics
-            stats_data = [
-                ['Content Length', str(len(content.get('main_content', '')))],
-                ['Links Found', str(len(content.get('links', [])))],
-                ['Analysis Status', data.get('status')]
-            ]
+        Returns:
+            Iterator[str]: One JSON line per result
+        """
+        for record in self._iter_records(data, columns):
+            yield json.dumps(record) + '\n'
+
+    def iter_json(self, data: Union[Dict, Iterable[Dict]],
+                  columns: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """
+        Stream analysis results as a single JSON array.
+        
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            columns (Optional[Iterable[str]]): Columns to include, None keeps the full result
             
-            stats_table = Table(stats_data, colWidths=[200, 300])
-            stats_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(stats_table)
-            elements.append(Spacer(1, 12))
+        Returns:
+            Iterator[str]: Array chunks, one element per chunk
+        """
+        yield '['
+        separator = ''
+        for record in self._iter_records(data, columns):
+            yield separator + json.dumps(record)
+            separator = ','
+        yield ']'
+
+    def iter_export(self, data: Union[Dict, Iterable[Dict]], fmt: str,
+                    columns: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """
+        Stream analysis results in one of the STREAM_MEDIA_TYPES formats.
+        
+        Columns are validated before the first chunk is produced so that a bad
+        selection fails the request instead of truncating the stream.
+        """
+        if fmt not in STREAM_MEDIA_TYPES:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if columns is not None:
+            columns = self.resolve_columns(columns)
+        if fmt == 'csv':
+            return self.iter_csv(data, columns)
+        if fmt == 'ndjson':
+            return self.iter_ndjson(data, columns)
+        return self.iter_json(data, columns)
+
+    def export_json(self, data: Union[Dict, Iterable[Dict]], path: str,
+                    columns: Optional[Iterable[str]] = None):
+        """
+        Write analysis results to a JSON file without building the document in memory.
+        
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            path (str): Destination file path
+            columns (Optional[Iterable[str]]): Columns to include, None keeps the full result
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            if isinstance(data, dict):
+                record = data if columns is None else self.project(data, self.resolve_columns(columns))
+                json.dump(record, f)
+            else:
+                f.writelines(self.iter_json(data, columns))
+
+    def export_csv(self, data: Union[Dict, Iterable[Dict]], path: str,
+                   columns: Optional[Iterable[str]] = None):
+        """
+        Write analysis results to a CSV file row by row.
+        
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            path (str): Destination file path
+            columns (Optional[Iterable[str]]): Columns to include, defaults to DEFAULT_COLUMNS
+        """
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(self.iter_csv(data, columns))
+
+    def _iter_results(self, data: Union[Dict, Iterable[Dict]]) -> Iterator[Dict]:
+        """Yield results one at a time from a single result or an iterable"""
+        if isinstance(data, dict):
+            yield data
+        else:
+            yield from data
+
+    def _iter_records(self, data: Union[Dict, Iterable[Dict]],
+                      columns: Optional[Iterable[str]]) -> Iterator[Dict]:
+        """Yield full results, or their projections when columns are given"""
+        if columns is None:
+            yield from self._iter_results(data)
+            return
+        columns = self.resolve_columns(columns)
+        for item in self._iter_results(data):
+            yield self.project(item, columns)
+
+    def _csv_cell(self, value: Any) -> Any:
+        """Flatten list values into a single CSV cell"""
+        if isinstance(value, list):
+            return '; '.join(
+                item.get('href', '') if isinstance(item, dict) else str(item)
+                for item in value
+            )
+        return value
+
+    def to_parquet(self, data: Union[Dict, Iterable[Dict]], destination: Any,
+                   batch_size: int = 10000, include_content: bool = False) -> int:
+        """
+        Export analysis results to Parquet, one row group per record batch.
+        
+        Results are consumed incrementally, so only batch_size rows are held
+        in memory regardless of how many results are exported.
+        
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            destination (Any): File path or writable binary file object
+            batch_size (int): Rows per record batch and row group
+            include_content (bool): Whether to store the full main_content text
             
-            # AI Analysis
-            if analysis:
-                elements.append(Paragraph("AI Analysis", styles['Heading3']))
-                elements.append(Paragraph(str(analysis.get('analysis', 'No analysis available')), styles['Normal']))
+        Returns:
+            int: Number of rows written
+        """
+        schema = arrow_schema(include_content)
+        names = schema.names
+        rows = 0
+        with pq.ParquetWriter(destination, schema, compression='zstd',
+                              use_dictionary=list(DICTIONARY_COLUMNS)) as writer:
+            columns = {name: [] for name in names}
+            for item in self._iter_results(data):
+                for name, value in self._arrow_row(item, include_content).items():
+                    columns[name].append(value)
+                rows += 1
+                if len(columns['url']) >= batch_size:
+                    writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+                    columns = {name: [] for name in names}
+            if columns['url'] or rows == 0:
+                writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+        return rows
+
+    def _arrow_row(self, data: Dict, include_content: bool) -> Dict:
+        """Map a single analysis result onto the arrow_schema columns"""
+        content = _content(data)
+        analysis = _analysis(data)
+        metadata = data.get('metadata') or {}
+        url = data.get('url') or ''
+        confidence = analysis.get('confidence_score')
+        row = {
+            'url': url,
+            'domain': urlparse(url).netloc or None,
+            'status': data.get('status'),
+            'status_code': metadata.get('status_code'),
+            'title': content.get('title'),
+            'meta_description': content.get('meta_description'),
+            'content_length': len(content.get('main_content') or ''),
+            'summary': analysis.get('summary'),
+            'sentiment': analysis.get('sentiment') or None,
+            'confidence_score': float(confidence) if isinstance(confidence, (int, float)) else None,
+            'key_points': self._string_list(analysis.get('key_points')),
+            'topics': self._string_list(analysis.get('topics')),
+            'suggestions': self._string_list(analysis.get('suggestions')),
+            'links': [
+                {'href': link.get('href'), 'text': link.get('text'), 'type': link.get('type')}
+                for link in iter_links(content.get('links'))
+                if isinstance(link, dict)
+            ],
+            'error': data.get('error'),
+        }
+        if include_content:
+            row['main_content'] = content.get('main_content')
+        return row
+
+    def _string_list(self, value: Any) -> List[str]:
+        """Normalize an analysis list field to a list of strings"""
+        if not value:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return [str(item) for item in value]
+
+    def to_pdf(self, data: Union[Dict, Iterable[Dict]]) -> bytes:
+        """
+        Export analysis results to PDF format.
+        
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
             
-            elements.append(Spacer(1, 20))
+        Returns:
+            bytes: PDF document
+        """
+        return pdf_renderer.render_bytes(data)
+
+    def export_pdf(self, data: Union[Dict, Iterable[Dict]], path: str):
+        """
+        Write analysis results to a paginated PDF file.
         
-        return elements
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            path (str): Destination file path
+        """
+        with open(path, 'wb') as f:
+            pdf_renderer.render(data, f)
 
     def _extract_topics(self, analysis: Dict) -> str:
         """Extract topics from AI analysis"""
+        if isinstance(analysis, dict) and analysis.get('topics'):
+            return '; '.join(self._string_list(analysis['topics']))
         if isinstance(analysis, dict) and 'analysis' in analysis:
             text = analysis['analysis']
             if 'Topics:' in text:
@@ -160,6 +413,8 @@ class ExportService:
 
     def _extract_key_points(self, analysis: Dict) -> str:
         """Extract key points from AI analysis"""
+        if isinstance(analysis, dict) and analysis.get('key_points'):
+            return '; '.join(self._string_list(analysis['key_points']))
         if isinstance(analysis, dict) and 'analysis' in analysis:
             text = analysis['analysis']
             if 'Key points:' in text:
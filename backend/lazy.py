@@ -0,0 +1,63 @@
+"""
+Deferred imports for heavy dependencies.
+
+PDF rendering, Parquet export, the LLM client, HTTP/2 and the browser
+tier each pull in large packages that most requests never touch. Loading
+them on first use keeps worker startup and `--reload` cycles fast.
+"""
+from typing import Optional
+import importlib
+import importlib.util
+import threading
+
+class LazyModule:
+    """A module that is imported the first time one of its attributes is read"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_module(name: str) -> LazyModule:
+    """
+    Defer importing a module until it is used.
+
+    Args:
+        name (str): Dotted module name
+
+    Returns:
+        LazyModule: Proxy that imports the module on first attribute access
+    """
+    return LazyModule(name)
+
+def optional_module(name: str, *requires: str) -> Optional[LazyModule]:
+    """
+    Defer importing an optional module, or return None if it is not installed.
+
+    Only the top-level packages are looked up, which does not import them.
+
+    Args:
+        name (str): Dotted module name
+        *requires (str): Further packages the module needs to be usable
+
+    Returns:
+        Optional[LazyModule]: Proxy for the module, or None when a package is missing
+    """
+    for package in (name, *requires):
+        if importlib.util.find_spec(package.partition('.')[0]) is None:
+            return None
+    return LazyModule(name)
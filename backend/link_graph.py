@@ -0,0 +1,260 @@
+"""
+Link graph extraction for crawled pages.
+
+Links are resolved against the page URL and any <base> tag, normalized,
+deduplicated and classified as internal, external, nav or asset. A page's
+links are stored column-wise: origins are interned once per page and each
+link keeps an origin index, a kind code, its path and the first non-empty
+anchor text, so repeated hosts and anchor texts cost nothing extra.
+"""
+from array import array
+from bs4 import BeautifulSoup, Tag
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit
+import os
+import sys
+
+LINK_KINDS = ('internal', 'external', 'nav', 'asset')
+INTERNAL, EXTERNAL, NAV, ASSET = range(len(LINK_KINDS))
+
+# Elements whose links are site navigation rather than content
+NAV_TAGS = {'nav', 'header', 'footer'}
+# File extensions treated as static assets rather than pages
+ASSET_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.json', '.xml', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif',
+    '.ico', '.bmp', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp3', '.mp4', '.webm', '.ogg', '.wav',
+    '.mov', '.avi', '.pdf', '.zip', '.gz', '.tgz', '.rar', '.7z', '.exe', '.dmg', '.apk', '.iso'
+}
+# Query parameters that only track the referrer and never change the page
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+MAX_TEXT_LENGTH = 200
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Normalizes an absolute URL for deduplication.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and gives empty paths a trailing slash.
+
+    Args:
+        url (str): Absolute URL
+
+    Returns:
+        Optional[str]: Normalized URL, or None if it is not an http(s) URL
+    """
+    parts = _split_normalized(url)
+    if parts is None:
+        return None
+    origin, _, path = parts
+    return origin + path
+
+def _split_normalized(url: str) -> Optional[Tuple[str, str, str]]:
+    """Splits a URL into normalized origin, host and path-with-query in one parse"""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+    # hostname drops the brackets around IPv6 literals, which the URL needs back
+    netloc = f"[{host}]" if ':' in host else host
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    path = parts.path or '/'
+    query = parts.query
+    if query:
+        lowered = query.lower()
+        if any(param in lowered for param in TRACKING_PARAMS):
+            query = urlencode([
+                (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+                if not key.lower().startswith(TRACKING_PARAMS)
+            ])
+        if query:
+            path = f"{path}?{query}"
+    return f"{scheme}://{netloc}", host, path
+
+def _site_host(host: str) -> str:
+    return host[4:] if host.startswith('www.') else host
+
+def _in_nav(tag: Tag) -> bool:
+    for parent in tag.parents:
+        if parent.name in NAV_TAGS or parent.get('role') == 'navigation':
+            return True
+    return False
+
+class LinkGraph:
+    """Deduplicated, column-wise store of the links found on one page"""
+
+    def __init__(self, base_url: Optional[str] = None, max_links: Optional[int] = None):
+        """
+        Args:
+            base_url (Optional[str]): URL links are resolved against
+            max_links (Optional[int]): Links kept per page; further links are counted in `dropped`
+        """
+        self.base_url = base_url or ''
+        self.max_links = max_links or None
+        self.site = _site_host(urlsplit(self.base_url).hostname or '')
+        self.origins: List[str] = []
+        self._origin_ids: Dict[str, int] = {}
+        self.origin_ids = array('I')
+        self.kinds = array('B')
+        self.paths: List[str] = []
+        self.texts: List[str] = []
+        self.dropped = 0
+        self._seen: Dict[str, int] = {}
+
+    @classmethod
+    def from_soup(cls, soup: BeautifulSoup, base_url: Optional[str] = None,
+                  max_links: Optional[int] = None) -> 'LinkGraph':
+        """
+        Collects the links of a parsed page.
+
+        Must run before nav, header and footer elements are removed from the soup.
+
+        Args:
+            soup (BeautifulSoup): Parsed HTML content
+            base_url (Optional[str]): URL the page was fetched from
+            max_links (Optional[int]): Links kept per page
+
+        Returns:
+            LinkGraph: The page's links
+        """
+        base = soup.find('base', href=True)
+        if base is not None:
+            base_url = urljoin(base_url or '', base['href'])
+        graph = cls(base_url, max_links)
+        for link in soup.find_all('a', href=True):
+            graph.add(link['href'], link.get_text(' '), nav=_in_nav(link))
+        return graph
+
+    def add(self, href: str, text: str = '', nav: bool = False) -> bool:
+        """
+        Adds a link, resolving and normalizing its target.
+
+        Args:
+            href (str): Link target as written in the page
+            text (str): Anchor text
+            nav (bool): Whether the link sits in site navigation
+
+        Returns:
+            bool: True if the link was stored, False if it was invalid, a duplicate or over the cap
+        """
+        href = href.strip()
+        if not href or href.startswith('#'):
+            return False
+        parts = _split_normalized(urljoin(self.base_url, href))
+        if parts is None:
+            return False
+        origin, host, path = parts
+        url = origin + path
+        text = ' '.join(text.split())[:MAX_TEXT_LENGTH]
+        index = self._seen.get(url)
+        if index is not None:
+            # Keep the first descriptive anchor text instead of repeating it
+            if text and not self.texts[index]:
+                self.texts[index] = text
+            return False
+        if self.max_links is not None and len(self.paths) >= self.max_links:
+            self.dropped += 1
+            return False
+
+        origin = sys.intern(origin)
+        origin_id = self._origin_ids.get(origin)
+        if origin_id is None:
+            origin_id = self._origin_ids[origin] = len(self.origins)
+            self.origins.append(origin)
+
+        self._seen[url] = len(self.paths)
+        self.origin_ids.append(origin_id)
+        self.kinds.append(self._classify(host, path, nav))
+        self.paths.append(path)
+        self.texts.append(text)
+        return True
+
+    def seal(self) -> 'LinkGraph':
+        """
+        Drop the lookup tables only needed while links are added.
+
+        A sealed graph is read-only; results keep their links this way until
+        they are serialized.
+
+        Returns:
+            LinkGraph: The graph itself
+        """
+        self._seen = None
+        self._origin_ids = None
+        return self
+
+    def _classify(self, host: str, path: str, nav: bool) -> int:
+        if os.path.splitext(path.partition('?')[0])[1].lower() in ASSET_EXTENSIONS:
+            return ASSET
+        if nav:
+            return NAV
+        return INTERNAL if _site_host(host) == self.site else EXTERNAL
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for origin_id, kind, path, text in zip(self.origin_ids, self.kinds, self.paths, self.texts):
+            yield {"href": self.origins[origin_id] + path, "text": text, "type": LINK_KINDS[kind]}
+
+    def urls(self, kinds: Iterable[str] = ('internal', 'nav')) -> List[str]:
+        """Absolute URLs of the links of the given kinds, in page order"""
+        wanted = {LINK_KINDS.index(kind) for kind in kinds}
+        return [
+            self.origins[origin_id] + path
+            for origin_id, kind, path in zip(self.origin_ids, self.kinds, self.paths)
+            if kind in wanted
+        ]
+
+    def to_list(self) -> List[Dict[str, str]]:
+        """Links as a list of {href, text, type} dicts"""
+        return list(self)
+
+    def to_compact(self) -> Dict:
+        """
+        Links in the column-wise form used for compact responses.
+
+        Returns:
+            Dict: Interned origins and kinds plus parallel origin, kind, path and text columns
+        """
+        return {
+            "origins": self.origins,
+            "kinds": list(LINK_KINDS),
+            "origin": self.origin_ids.tolist(),
+            "kind": self.kinds.tolist(),
+            "path": self.paths,
+            "text": self.texts,
+            "dropped": self.dropped,
+        }
+
+def iter_links(links) -> Iterator[Dict[str, str]]:
+    """
+    Iterates links stored either as a list of dicts or in compact form.
+
+    Args:
+        links: `content.links` from an analysis result
+
+    Returns:
+        Iterator[Dict[str, str]]: One {href, text, type} dict per link
+    """
+    if not links:
+        return iter(())
+    if isinstance(links, dict):
+        origins, kinds = links.get("origins", []), links.get("kinds", LINK_KINDS)
+        return (
+            {"href": origins[origin] + path, "text": text, "type": kinds[kind]}
+            for origin, kind, path, text in zip(links["origin"], links["kind"], links["path"], links["text"])
+        )
+    return iter(links)
+
+def count_links(links) -> int:
+    """Number of links in either storage form"""
+    if isinstance(links, dict):
+        return len(links.get("path", ()))
+    return len(links or ())
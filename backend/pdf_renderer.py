@@ -0,0 +1,220 @@
+"""
+PDF rendering engine shared by the export service and the API endpoints.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from backend.link_graph import count_links
+from backend.lazy import lazy_module
+
+# reportlab is only imported once the first report is rendered
+colors = lazy_module('reportlab.lib.colors')
+pagesizes = lazy_module('reportlab.lib.pagesizes')
+stylesheets = lazy_module('reportlab.lib.styles')
+platypus = lazy_module('reportlab.platypus')
+
+# Results rendered to memory before the output spills to a temp file
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+@lru_cache(maxsize=1)
+def get_styles() -> Dict[str, Any]:
+    """Build the report stylesheet (ParagraphStyle by name) once per process"""
+    styles = stylesheets.getSampleStyleSheet()
+    return {
+        'title': stylesheets.ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=30),
+        'heading': styles['Heading2'],
+        'subheading': styles['Heading3'],
+        'normal': styles['Normal'],
+        'bullet': stylesheets.ParagraphStyle('Bullet', parent=styles['Normal'], leftIndent=6),
+    }
+
+@lru_cache(maxsize=1)
+def get_stats_table_style() -> Any:
+    """Table style for the per-result statistics block"""
+    return platypus.TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+class _FlowableStream(list):
+    """
+    Flowable list that refills itself from a generator as the document consumes it.
+
+    The platypus build loop checks len() before handling each flowable, so
+    only a small window of flowables exists at any time.
+    """
+    def __init__(self, source: Iterator, window: int = 64):
+        super().__init__()
+        self._source = source
+        self._window = window
+
+    def __len__(self) -> int:
+        while self._source is not None and list.__len__(self) < self._window:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
+
+class PDFRenderer:
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pdf-render')
+
+    def render(self, data: Union[Dict, Iterable[Dict]], destination: Optional[Any] = None,
+               overview: Optional[Dict] = None, stamped: bool = True) -> Any:
+        """
+        Render one result or a batch of results to a paginated PDF.
+
+        Args:
+            data (Union[Dict, Iterable[Dict]]): A single result or an iterable of results
+            destination (Optional[Any]): Writable binary file object; a spooled temp file by default
+            overview (Optional[Dict]): Batch aggregates (see backend.aggregates) shown before the results
+            stamped (bool): Print the generation time; without it the same results always
+                render the same document, as cached artifacts must
+
+        Returns:
+            Any: The destination file, rewound to the start
+        """
+        if destination is None:
+            destination = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        doc = platypus.SimpleDocTemplate(destination, pagesize=pagesizes.letter,
+                                         title="Web Content Analysis Report", invariant=not stamped)
+        doc.build(_FlowableStream(self._iter_flowables(data, overview, stamped)))
+        destination.seek(0)
+        return destination
+
+    def render_bytes(self, data: Union[Dict, Iterable[Dict]]) -> bytes:
+        """Render a report and return the PDF document as bytes"""
+        with self.render(data) as output:
+            return output.read()
+
+    async def render_async(self, data: Union[Dict, Iterable[Dict]], overview: Optional[Dict] = None) -> Any:
+        """Render a report on the worker pool so the event loop stays free"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.render, data, None, overview)
+
+    def _iter_flowables(self, data: Union[Dict, Iterable[Dict]], overview: Optional[Dict] = None,
+                        stamped: bool = True) -> Iterator:
+        """Yield the report flowables, one result section at a time"""
+        styles = get_styles()
+        yield platypus.Paragraph("Web Content Analysis Report", styles['title'])
+        yield platypus.Spacer(1, 12)
+        if stamped:
+            yield platypus.Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['normal'])
+            yield platypus.Spacer(1, 12)
+        if overview:
+            yield from self._overview_section(overview, styles)
+
+        results = [data] if isinstance(data, dict) else data
+        for item in results:
+            yield from self._result_section(item, styles)
+
+    def _result_section(self, data: Dict, styles: Dict) -> List:
+        """Create PDF elements for a single analysis result"""
+        elements = []
+        content = data.get('content') or {}
+        analysis = data.get('analysis') or {}
+
+        elements.append(platypus.Paragraph(f"URL: {self._text(data.get('url', 'N/A'))}", styles['heading']))
+        title = content.get('title') or analysis.get('title')
+        if title:
+            elements.append(platypus.Paragraph(f"Title: {self._text(title)}", styles['subheading']))
+        elements.append(platypus.Spacer(1, 12))
+
+        if data.get('status', 'success') != 'success':
+            elements.append(platypus.Paragraph(f"Error: {self._text(data.get('error', 'Unknown error'))}", styles['normal']))
+            elements.append(platypus.Spacer(1, 20))
+            return elements
+
+        if content:
+            stats_table = platypus.Table([
+                ['Content Length', str(len(content.get('main_content') or ''))],
+                ['Links Found', str(count_links(content.get('links')))],
+                ['Analysis Status', str(data.get('status', 'N/A'))]
+            ], colWidths=[200, 300])
+            stats_table.setStyle(get_stats_table_style())
+            elements.append(stats_table)
+            elements.append(platypus.Spacer(1, 12))
+
+        if isinstance(analysis, dict) and analysis:
+            elements.append(platypus.Paragraph("AI Analysis", styles['subheading']))
+            for key in ('summary', 'sentiment', 'readability', 'confidence_score', 'analysis'):
+                value = analysis.get(key)
+                if isinstance(value, (str, int, float)) and value != '':
+                    label = key.replace('_', ' ').title()
+                    elements.append(platypus.Paragraph(f"<b>{label}:</b> {self._text(value)}", styles['normal']))
+            for key in ('key_points', 'topics', 'suggestions'):
+                items = analysis.get(key)
+                if isinstance(items, list) and items:
+                    elements.append(platypus.Spacer(1, 6))
+                    elements.append(platypus.Paragraph(f"<b>{key.replace('_', ' ').title()}:</b>", styles['normal']))
+                    elements.append(platypus.ListFlowable(
+                        [platypus.ListItem(platypus.Paragraph(self._text(item), styles['bullet'])) for item in items],
+                        bulletType='bullet'
+                    ))
+
+        elements.append(platypus.Spacer(1, 20))
+        return elements
+
+    def _overview_section(self, overview: Dict, styles: Dict) -> List:
+        """Create PDF elements for the batch aggregates"""
+        elements = [platypus.Paragraph("Batch Overview", styles['heading'])]
+        word_count = overview.get('word_count') or {}
+        fetch_ms = overview.get('fetch_ms') or {}
+        stats_table = platypus.Table([
+            ['Results', str(overview.get('results', 0))],
+            ['Failed', f"{overview.get('failed', 0)} ({self._percent(overview.get('error_rate'))})"],
+            ['Words (median / p90)', f"{self._value(word_count.get('p50'))} / {self._value(word_count.get('p90'))}"],
+            ['Fetch ms (median / p90)', f"{self._value(fetch_ms.get('p50'))} / {self._value(fetch_ms.get('p90'))}"],
+        ], colWidths=[200, 300])
+        stats_table.setStyle(get_stats_table_style())
+        elements.append(stats_table)
+        elements.append(platypus.Spacer(1, 12))
+
+        sentiment = overview.get('sentiment') or {}
+        if sentiment:
+            counts = ', '.join(f"{self._text(name)}: {count}" for name, count in sentiment.items())
+            elements.append(platypus.Paragraph(f"<b>Sentiment:</b> {counts}", styles['normal']))
+        topics = overview.get('top_topics') or []
+        if topics:
+            listed = ', '.join(f"{self._text(topic['topic'])} ({topic['results']})" for topic in topics)
+            elements.append(platypus.Paragraph(f"<b>Top Topics:</b> {listed}", styles['normal']))
+
+        hosts = overview.get('hosts') or []
+        if hosts:
+            elements.append(platypus.Spacer(1, 12))
+            elements.append(platypus.Paragraph("Hosts", styles['subheading']))
+            rows = [['Host', 'Results', 'Error Rate', 'Fetch ms p50', 'Fetch ms p90']]
+            for host in hosts:
+                rows.append([
+                    host['host'] or 'N/A', str(host['results']), self._percent(host['error_rate']),
+                    self._value(host['fetch_ms'].get('p50')), self._value(host['fetch_ms'].get('p90')),
+                ])
+            hosts_table = platypus.Table(rows, colWidths=[190, 60, 70, 80, 80], repeatRows=1)
+            hosts_table.setStyle(get_stats_table_style())
+            elements.append(hosts_table)
+
+        elements.append(platypus.Spacer(1, 20))
+        return elements
+
+    def _value(self, value: Any) -> str:
+        """Table cell for a number that may be missing"""
+        return 'N/A' if value is None else f"{value:g}"
+
+    def _percent(self, value: Any) -> str:
+        return 'N/A' if value is None else f"{value:.1%}"
+
+    def _text(self, value: Any) -> str:
+        """Escape a value for use inside Paragraph markup"""
+        return escape(str(value))
+
+# Shared renderer so the stylesheet and worker pool are reused across requests
+pdf_renderer = PDFRenderer()
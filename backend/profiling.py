@@ -0,0 +1,207 @@
+"""
+Low-overhead sampling profiler producing flamegraph-ready collapsed stacks.
+
+Stacks are sampled from sys._current_frames() on a background thread, so
+profiled code runs unmodified and the cost is one stack walk per interval.
+Cluster-wide profiles are coordinated through a shared directory: every
+worker polls it for profile requests and writes its own collapsed stacks
+next to them.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+# Profile requests remembered as handled; older ones have expired long before they are forgotten
+MAX_HANDLED_REQUESTS = 1024
+
+# Profiler of the request being served, when the request asked to be profiled
+current_profiler: ContextVar[Optional['SamplingProfiler']] = ContextVar('current_profiler', default=None)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, thread_ids: Optional[Iterable[int]] = None):
+        """
+        Args:
+            interval (float): Seconds between samples
+            thread_ids (Optional[Iterable[int]]): Threads to sample; all threads when None
+        """
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'SamplingProfiler':
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def add_thread(self, thread_id: int) -> bool:
+        """Start sampling another thread; returns False if it was sampled already"""
+        if self.thread_ids is None or thread_id in self.thread_ids:
+            return False
+        self.thread_ids.add(thread_id)
+        return True
+
+    def remove_thread(self, thread_id: int):
+        if self.thread_ids is not None:
+            self.thread_ids.discard(thread_id)
+
+    def __enter__(self) -> 'SamplingProfiler':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        Render samples in the collapsed-stack format read by flamegraph tools.
+
+        Returns:
+            str: One 'frame;frame;frame count' line per distinct stack
+        """
+        return format_collapsed(self.stacks)
+
+@contextmanager
+def sampled_thread() -> Iterator[None]:
+    """
+    Have the current request's profiler, if any, sample the calling thread while inside.
+
+    Work a request hands to an executor thread runs in a copy of its context,
+    so the thread picks up the profiler the request set in current_profiler.
+    """
+    profiler = current_profiler.get()
+    thread_id = threading.get_ident()
+    added = profiler is not None and profiler.add_thread(thread_id)
+    try:
+        yield
+    finally:
+        if added:
+            profiler.remove_thread(thread_id)
+
+def format_collapsed(stacks: Dict[str, int]) -> str:
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+def parse_collapsed(text: str) -> Counter:
+    stacks = Counter()
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+class ProfileCoordinator:
+    def __init__(self, directory: str, poll_interval: float = 0.5):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._handled: OrderedDict = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start polling for profile requests on the running event loop"""
+        if self._task is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def profile_cluster(self, seconds: float, interval: float = 0.005) -> str:
+        """
+        Profile every worker sharing the directory for a number of seconds.
+
+        Args:
+            seconds (float): Sampling duration
+            interval (float): Seconds between samples in each worker
+
+        Returns:
+            str: Collapsed stacks merged across workers
+        """
+        request_id = uuid.uuid4().hex
+        request_path = self.directory / f"{request_id}.request"
+        request_path.write_text(json.dumps({
+            'seconds': seconds, 'interval': interval, 'expires': time.time() + seconds + 5
+        }))
+        try:
+            # Workers notice the request within one poll interval and write results when done
+            await asyncio.sleep(seconds + 2 * self.poll_interval + 0.5)
+            merged = Counter()
+            for path in self.directory.glob(f"{request_id}.*.collapsed"):
+                merged.update(parse_collapsed(path.read_text()))
+                path.unlink()
+            return format_collapsed(merged)
+        finally:
+            request_path.unlink(missing_ok=True)
+
+    async def _watch(self):
+        while True:
+            for path in self._pending_requests():
+                self._handled[path.stem] = None
+                if len(self._handled) > MAX_HANDLED_REQUESTS:
+                    self._handled.popitem(last=False)
+                try:
+                    request = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                if request.get('expires', 0) < time.time():
+                    continue
+                asyncio.get_running_loop().run_in_executor(None, self._profile_worker, path.stem, request)
+            await asyncio.sleep(self.poll_interval)
+
+    def _pending_requests(self) -> List[Path]:
+        pending = []
+        try:
+            for path in self.directory.glob('*.request'):
+                if path.stem in self._handled:
+                    # Still on disk, so keep it among the most recently handled
+                    self._handled.move_to_end(path.stem)
+                else:
+                    pending.append(path)
+        except OSError:
+            pass
+        return pending
+
+    def _profile_worker(self, request_id: str, request: Dict):
+        """Sample this worker and write its share of the cluster profile"""
+        with SamplingProfiler(interval=request.get('interval', 0.005)) as profiler:
+            time.sleep(request['seconds'])
+        output = self.directory / f"{request_id}.{os.getpid()}.collapsed"
+        output.write_text(profiler.collapsed())
@@ -0,0 +1,177 @@
+"""
+Density-based main content scorer in the style of Readability.
+
+Scores are computed bottom-up in a single pass over the element tree:
+text and link lengths are accumulated from children into parents, and
+every paragraph-like element credits its parent and grandparent. The best
+scoring container is then merged with related siblings.
+"""
+from bs4 import NavigableString, Tag
+from typing import Dict, List, Optional
+import re
+
+# Class and id patterns that mark boilerplate or content containers
+NEGATIVE_PATTERN = re.compile(
+    r'comment|meta|footer|footnote|sidebar|widget|nav|menu|share|social|cookie|consent|'
+    r'banner|promo|related|advert|\bads?\b|sponsor|popup|modal|subscribe|newsletter|breadcrumb|'
+    r'masthead|skip|tags?\b|author-bio|pagination', re.IGNORECASE
+)
+POSITIVE_PATTERN = re.compile(
+    r'article|body|content|entry|hentry|main|page|post|text|blog|story|prose', re.IGNORECASE
+)
+
+# Elements whose text is scored as a paragraph
+PARAGRAPH_TAGS = {'p', 'pre', 'td', 'blockquote'}
+# Starting score by element type
+TAG_WEIGHTS = {
+    'article': 10, 'main': 10, 'section': 3, 'div': 5, 'pre': 3, 'td': 3, 'blockquote': 3,
+    'address': -3, 'ol': -3, 'ul': -3, 'dl': -3, 'dd': -3, 'dt': -3, 'li': -3, 'form': -3,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'h5': -5, 'h6': -5, 'th': -5, 'aside': -25,
+}
+MIN_PARAGRAPH_LENGTH = 25
+
+class _NodeStats:
+    __slots__ = ('tag', 'text_length', 'link_length', 'commas', 'score', 'scored')
+
+    def __init__(self, tag: Tag):
+        self.tag = tag
+        self.text_length = 0
+        self.link_length = 0
+        self.commas = 0
+        self.score = 0.0
+        self.scored = False
+
+    @property
+    def link_density(self) -> float:
+        return self.link_length / self.text_length if self.text_length else 0.0
+
+class ContentScorer:
+    def __init__(self, sibling_threshold: float = 0.2):
+        """
+        Args:
+            sibling_threshold (float): Fraction of the top score a sibling needs to be merged
+        """
+        self.sibling_threshold = sibling_threshold
+
+    def find_main_content(self, root: Tag) -> Optional[List[Tag]]:
+        """
+        Finds the elements holding the main content.
+
+        Args:
+            root (Tag): Element to search, usually the page body
+
+        Returns:
+            Optional[List[Tag]]: Top candidate and merged siblings in document order, or None
+        """
+        stats = self.score(root)
+        candidates = [node for node in stats.values() if node.scored and node.text_length]
+        if not candidates:
+            return None
+        top = max(candidates, key=lambda node: node.score * (1 - node.link_density))
+        return self._merge_siblings(top, stats)
+
+    def extract_text(self, root: Tag) -> Optional[str]:
+        """Returns the main content text, or None when nothing scores"""
+        elements = self.find_main_content(root)
+        if not elements:
+            return None
+        return ' '.join(element.get_text(' ') for element in elements)
+
+    def score(self, root: Tag) -> Dict[int, _NodeStats]:
+        """
+        Computes text statistics and content scores for every element under root.
+
+        Elements are visited in reverse document order, so every element is
+        finished before its parent reads from it. Stats are keyed by id()
+        because bs4 hashes a Tag by serializing it.
+        """
+        stats: Dict[int, _NodeStats] = {}
+        elements = [root]
+        elements.extend(node for node in root.descendants if isinstance(node, Tag))
+        for tag in reversed(elements):
+            node = stats[id(tag)] = _NodeStats(tag)
+            if self._is_hidden(tag):
+                continue
+            for child in tag.children:
+                if isinstance(child, Tag):
+                    child_stats = stats.get(id(child))
+                    if child_stats is not None:
+                        node.text_length += child_stats.text_length
+                        node.link_length += child_stats.link_length
+                        node.commas += child_stats.commas
+                elif type(child) is NavigableString:
+                    text = child.strip()
+                    node.text_length += len(text)
+                    node.commas += text.count(',')
+            if tag.name == 'a':
+                node.link_length = node.text_length
+
+        for tag in elements:
+            if tag.name not in PARAGRAPH_TAGS:
+                continue
+            node = stats[id(tag)]
+            if node.text_length < MIN_PARAGRAPH_LENGTH:
+                continue
+            content_score = 1 + node.commas + min(node.text_length // 100, 3)
+            parent = tag.parent
+            for share in (1.0, 0.5):
+                parent_stats = stats.get(id(parent))
+                if parent_stats is None:
+                    break
+                self._credit(parent_stats, content_score * share)
+                parent = parent.parent
+        return stats
+
+    def _credit(self, node: _NodeStats, amount: float):
+        if not node.scored:
+            node.scored = True
+            node.score = TAG_WEIGHTS.get(node.tag.name, 0) + self._class_weight(node.tag)
+        node.score += amount
+
+    def _class_weight(self, tag: Tag) -> int:
+        weight = 0
+        for value in (' '.join(tag.get('class') or []), tag.get('id') or ''):
+            if not value:
+                continue
+            if NEGATIVE_PATTERN.search(value):
+                weight -= 25
+            if POSITIVE_PATTERN.search(value):
+                weight += 25
+        return weight
+
+    def _is_hidden(self, tag: Tag) -> bool:
+        attrs = tag.attrs
+        if not attrs:
+            return False
+        style = (attrs.get('style') or '').replace(' ', '').lower()
+        return (
+            'hidden' in attrs
+            or attrs.get('aria-hidden') == 'true'
+            or 'display:none' in style
+            or 'visibility:hidden' in style
+        )
+
+    def _merge_siblings(self, top_stats: _NodeStats, stats: Dict[int, _NodeStats]) -> List[Tag]:
+        """Adds siblings of the top candidate that look like part of the same content"""
+        top = top_stats.tag
+        parent = top.parent
+        if parent is None:
+            return [top]
+        threshold = max(10.0, top_stats.score * self.sibling_threshold)
+        top_classes = top.get('class')
+        merged = []
+        for sibling in parent.children:
+            if not isinstance(sibling, Tag):
+                continue
+            if sibling is top:
+                merged.append(sibling)
+                continue
+            node = stats.get(id(sibling))
+            if node is None or node.text_length == 0:
+                continue
+            bonus = top_stats.score * 0.2 if top_classes and sibling.get('class') == top_classes else 0
+            if node.scored and node.score + bonus >= threshold and node.link_density < 0.5:
+                merged.append(sibling)
+            elif sibling.name == 'p' and node.text_length > 80 and node.link_density < 0.25:
+                merged.append(sibling)
+        return merged
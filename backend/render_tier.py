@@ -0,0 +1,243 @@
+"""
+Headless-browser render tier for pages built client-side.
+
+A cheap detector looks at the static HTML and only pages that look like
+empty single-page-app shells are sent to a pool of headless browser
+contexts. Contexts are reused across requests and recycled after a fixed
+number of pages, so browser startup is paid once per pool slot rather
+than once per page.
+"""
+from typing import Optional
+import asyncio
+import re
+import threading
+from dataclasses import dataclass
+from bs4 import BeautifulSoup
+from backend.security import check_url_security
+from backend.metrics import registry
+from backend.transport import USER_AGENT
+from backend.config import get_settings
+from backend.lazy import optional_module
+
+# Rendering is optional; static fetches work without it
+playwright_api = optional_module('playwright.async_api')
+
+RENDER_DECISIONS = registry.counter(
+    'wca_render_decisions_total', 'Static pages checked for client-side rendering, by outcome', ('reason',)
+)
+
+# Mount points and attributes left in the static HTML by client-side frameworks
+FRAMEWORK_MARKERS = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|___gatsby|svelte)["\'][^>]*>\s*</div>'
+    r'|\bng-version=|\bng-app\b|\bdata-reactroot\b|\bdata-v-app\b|\bember-application\b',
+    re.IGNORECASE
+)
+NOSCRIPT_HINT = re.compile(r'enable javascript|javascript is (?:disabled|required)|requires javascript', re.IGNORECASE)
+# Elements whose text is never visible on the page
+INVISIBLE_TAGS = {'script', 'style', 'noscript', 'template', 'head', 'title'}
+# Subresources the render tier never downloads
+BLOCKED_RESOURCES = {'image', 'media', 'font', 'stylesheet'}
+
+@dataclass(frozen=True)
+class RenderDecision:
+    render: bool
+    reason: str
+    text_length: int
+    script_count: int
+
+class RenderDetector:
+    def __init__(self, min_text_length: int = 200, heavy_script_count: int = 3, heavy_script_ratio: float = 0.5):
+        """
+        Args:
+            min_text_length (int): Visible characters above which a page counts as rendered already
+            heavy_script_count (int): Script tags that mark a page as script-heavy
+            heavy_script_ratio (float): Share of the HTML taken by inline scripts that marks it script-heavy
+        """
+        self.min_text_length = min_text_length
+        self.heavy_script_count = heavy_script_count
+        self.heavy_script_ratio = heavy_script_ratio
+
+    def check(self, html: str, soup: BeautifulSoup) -> RenderDecision:
+        """
+        Decide whether a statically fetched page needs a browser to show its content.
+
+        Must run before content extraction, which removes elements from the soup.
+
+        Args:
+            html (str): Raw HTML as fetched
+            soup (BeautifulSoup): The parsed HTML
+
+        Returns:
+            RenderDecision: Whether to render, and why
+        """
+        body = soup.body or soup
+        text_length = 0
+        for text in body.find_all(string=True):
+            if text.parent is not None and text.parent.name not in INVISIBLE_TAGS:
+                text_length += len(text.strip())
+                if text_length >= self.min_text_length:
+                    return self._decide(False, 'has_text', text_length, 0)
+
+        scripts = soup.find_all('script')
+        inline_length = sum(len(script.string or '') for script in scripts)
+        if FRAMEWORK_MARKERS.search(html):
+            return self._decide(True, 'framework_marker', text_length, len(scripts))
+        noscript = soup.find('noscript')
+        if noscript is not None and NOSCRIPT_HINT.search(noscript.get_text()):
+            return self._decide(True, 'noscript_hint', text_length, len(scripts))
+        if len(scripts) >= self.heavy_script_count or inline_length >= self.heavy_script_ratio * max(len(html), 1):
+            return self._decide(True, 'script_heavy', text_length, len(scripts))
+        return self._decide(False, 'static', text_length, len(scripts))
+
+    def _decide(self, render: bool, reason: str, text_length: int, script_count: int) -> RenderDecision:
+        RENDER_DECISIONS.inc(reason=reason)
+        return RenderDecision(render, reason, text_length, script_count)
+
+class _ContextSlot:
+    __slots__ = ('context', 'pages')
+
+    def __init__(self):
+        self.context = None
+        self.pages = 0
+
+class BrowserPool:
+    def __init__(self, size: int = 2, max_pages_per_context: int = 50, timeout: float = 15.0):
+        """
+        Args:
+            size (int): Browser contexts rendering at the same time
+            max_pages_per_context (int): Pages rendered before a context is replaced
+            timeout (float): Seconds a single render may take
+        """
+        self.size = size
+        self.max_pages_per_context = max_pages_per_context
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._slots: Optional[asyncio.Queue] = None
+
+    @property
+    def available(self) -> bool:
+        """Whether the browser dependency is installed"""
+        return playwright_api is not None
+
+    def render(self, url: str, timeout: Optional[float] = None) -> str:
+        """
+        Render a page in a pooled browser context and return the resulting HTML.
+
+        Safe to call from any thread; callers wait while every context is busy.
+
+        Args:
+            url (str): Page to render
+            timeout (Optional[float]): Seconds this render may take, if less than the pool's timeout
+
+        Returns:
+            str: HTML after scripts have run
+
+        Raises:
+            RuntimeError: If the browser dependency is not installed
+            Exception: Navigation errors and timeouts from the browser
+        """
+        if not self.available:
+            raise RuntimeError("Rendering requires playwright; install it with `pip install playwright`")
+        timeout = min(timeout, self.timeout) if timeout is not None else self.timeout
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._render(url, timeout), self._loop)
+        # Slack on top of the navigation timeout covers waiting for a free context
+        return future.result(timeout=timeout * 4)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name='render-tier', daemon=True)
+            self._thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+            except Exception:
+                self._shutdown_loop()
+                raise
+
+    def _shutdown_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    async def _start(self):
+        self._playwright = await playwright_api.async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=True)
+        except Exception:
+            await self._playwright.stop()
+            self._playwright = None
+            raise
+        self._slots = asyncio.Queue()
+        for _ in range(self.size):
+            self._slots.put_nowait(_ContextSlot())
+
+    async def _render(self, url: str, timeout: float) -> str:
+        slot = await self._slots.get()
+        try:
+            if slot.context is None or slot.pages >= self.max_pages_per_context:
+                if slot.context is not None:
+                    await slot.context.close()
+                slot.context = await self._browser.new_context(java_script_enabled=True, user_agent=USER_AGENT)
+                await slot.context.route('**/*', self._route)
+                slot.pages = 0
+            slot.pages += 1
+            page = await slot.context.new_page()
+            try:
+                await page.goto(url, wait_until='networkidle', timeout=timeout * 1000)
+                return await page.content()
+            finally:
+                await page.close()
+        except Exception:
+            # A context that failed mid-render is not trusted for the next page
+            if slot.context is not None:
+                await slot.context.close()
+                slot.context = None
+            raise
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def _route(self, route):
+        """Skip heavy subresources and apply the SSRF check to every request the page makes"""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCES:
+            await route.abort()
+            return
+        secure = await asyncio.get_running_loop().run_in_executor(None, check_url_security, request.url)
+        if secure:
+            await route.continue_()
+        else:
+            await route.abort()
+
+    def close(self):
+        """Shut the browser down; the pool starts again on the next render"""
+        with self._lock:
+            if self._thread is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+            self._shutdown_loop()
+
+    async def _stop(self):
+        while self._slots is not None and not self._slots.empty():
+            slot = self._slots.get_nowait()
+            if slot.context is not None:
+                await slot.context.close()
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = self._slots = None
+
+browser_pool = BrowserPool(
+    size=get_settings().render_pool_size,
+    max_pages_per_context=get_settings().render_pages_per_context,
+    timeout=get_settings().render_timeout
+)
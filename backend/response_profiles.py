@@ -0,0 +1,106 @@
+"""
+Response profiles for trimming analysis results.
+
+A profile is threaded through the analysis pipeline so fields a caller did
+not ask for are skipped at the source instead of being built and dropped.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+# Fields left out of each named profile, as dotted paths into the result
+PROFILE_EXCLUDES = {
+    'full': (),
+    'summary': ('content.main_content', 'content.links', 'metadata.headers'),
+}
+
+# Fields kept in every projection so callers can always tell what happened
+ALWAYS_INCLUDED = ('status', 'url', 'error', 'partial', 'deadline_exceeded')
+
+# Fields only produced when the structured extraction mode is requested
+STRUCTURED_FIELDS = ('content.document', 'content.metadata')
+
+@dataclass(frozen=True)
+class ResponseProfile:
+    name: str = 'full'
+    fields: Optional[Tuple[str, ...]] = None
+    structured: bool = False
+    compact_links: bool = False
+
+    @classmethod
+    def parse(cls, name: Optional[str] = None, fields: Optional[Iterable[str]] = None,
+              structured: bool = False, compact_links: bool = False) -> 'ResponseProfile':
+        """
+        Build a profile from request parameters.
+
+        Args:
+            name (Optional[str]): Profile name, one of PROFILE_EXCLUDES
+            fields (Optional[Iterable[str]]): Dotted field paths to project onto, or a comma-separated string
+            structured (bool): Whether to produce the structured document model
+            compact_links (bool): Whether to return links in the column-wise compact form
+
+        Returns:
+            ResponseProfile: The requested profile
+
+        Raises:
+            ValueError: If the profile name is unknown
+        """
+        name = name or 'full'
+        if name not in PROFILE_EXCLUDES:
+            raise ValueError(f"Unknown response profile: {name}")
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        if fields is not None:
+            fields = tuple(path.strip() for path in fields if path.strip()) or None
+        return cls(name=name, fields=fields, structured=structured, compact_links=compact_links)
+
+    def includes(self, path: str) -> bool:
+        """
+        Whether a field, or anything below it, is part of the response.
+
+        Args:
+            path (str): Dotted field path such as 'content.links'
+
+        Returns:
+            bool: True if the pipeline needs to produce the field
+        """
+        if not self.structured and any(
+            path == field or path.startswith(field + '.') for field in STRUCTURED_FIELDS
+        ):
+            return False
+        for excluded in PROFILE_EXCLUDES[self.name]:
+            if path == excluded or path.startswith(excluded + '.'):
+                return False
+        if self.fields is None or path in ALWAYS_INCLUDED:
+            return True
+        return any(
+            field == path or field.startswith(path + '.') or path.startswith(field + '.')
+            for field in self.fields
+        )
+
+    def apply(self, result: Dict) -> Dict:
+        """Return a copy of a result holding only the included fields"""
+        if self.name == 'full' and self.fields is None:
+            return result
+        return self._project(result, '')
+
+    def _project(self, value: Dict, prefix: str) -> Dict:
+        projected = {}
+        for key, item in value.items():
+            path = prefix + key
+            if not self.includes(path):
+                continue
+            if isinstance(item, dict) and not self._wholly_included(path):
+                item = self._project(item, path + '.')
+            projected[key] = item
+        return projected
+
+    def _wholly_included(self, path: str) -> bool:
+        """Whether a subtree can be copied as-is without filtering its children"""
+        for excluded in PROFILE_EXCLUDES[self.name]:
+            if excluded.startswith(path + '.'):
+                return False
+        if self.fields is None:
+            return True
+        return any(path == field or path.startswith(field + '.') for field in self.fields)
+
+FULL_PROFILE = ResponseProfile()
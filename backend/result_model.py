@@ -0,0 +1,268 @@
+"""
+Typed, compact analysis results.
+
+Results move between pipeline stages, the result store and crawls as slotted
+records instead of nested dicts. Repeated strings such as statuses, header
+names and sentiment labels are interned. Response headers are kept as one
+tuple of pairs, and page links stay in their column-wise LinkGraph until
+the result is serialized.
+
+Records read like the dicts they replace (`result['content']['title']`,
+`result.get('error')`), so code that only inspects results works with
+either. They are turned into plain dicts, in the original JSON shape, with
+`to_dict()` at the API and export boundaries. A field set to None is
+absent from both views.
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+import sys
+from backend.link_graph import LinkGraph
+from backend.response_profiles import ResponseProfile
+
+# Headers whose values repeat across responses, so their values are interned as well
+INTERNED_HEADER_VALUES = frozenset({
+    'content-type', 'content-encoding', 'transfer-encoding', 'connection', 'server', 'vary',
+    'cache-control', 'accept-ranges', 'x-frame-options', 'x-content-type-options', 'x-xss-protection',
+    'referrer-policy', 'strict-transport-security', 'access-control-allow-origin', 'pragma', 'via',
+})
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _strings(value: Any) -> Any:
+    """Store list fields as tuples, which are smaller and never over-allocated"""
+    return tuple(value) if isinstance(value, list) else value
+
+def _plain(value: Any) -> Any:
+    """JSON-ready form of a record field"""
+    if isinstance(value, (Record, Headers)):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+class Headers(Mapping):
+    """Response headers as a tuple of (name, value) pairs with interned names"""
+    __slots__ = ('pairs',)
+
+    def __init__(self, pairs: Tuple[Tuple[str, str], ...] = ()):
+        self.pairs = pairs
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[str, str]]) -> 'Headers':
+        """
+        Args:
+            items (Iterable[Tuple[str, str]]): Header names and values, e.g. `response.headers.items()`
+
+        Returns:
+            Headers: The headers, with names and low-cardinality values interned
+        """
+        return cls(tuple(
+            (sys.intern(name), sys.intern(value) if name.lower() in INTERNED_HEADER_VALUES else value)
+            for name, value in items
+        ))
+
+    def __getitem__(self, name: str) -> str:
+        for key, value in self.pairs:
+            if key == name:
+                return value
+        lowered = name.lower()
+        for key, value in self.pairs:
+            if key.lower() == lowered:
+                return value
+        raise KeyError(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, _ in self.pairs)
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self.pairs)
+
+class Record(Mapping):
+    """
+    Read-only mapping view over a slotted record.
+
+    Subclasses list their output keys in `_keys`, in serialization order, and
+    keep fields they do not model in `extra`.
+    """
+    __slots__ = ()
+    _keys: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Union[Mapping, 'Record', None]):
+        """
+        Build a record from its dict form, keeping unknown keys in `extra`.
+
+        Args:
+            data: The dict form, or a record, which is returned unchanged
+
+        Returns:
+            The record, or None if data is None
+        """
+        if data is None or isinstance(data, cls):
+            return data
+        known = {}
+        extra = {}
+        for key, value in data.items():
+            if key in cls._keys:
+                known[key] = value
+            else:
+                extra[key] = value
+        return cls(**known, extra=extra or None)
+
+    def _value(self, key: str) -> Any:
+        """Value of a key as a dict reader expects it"""
+        return getattr(self, key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._keys:
+            value = getattr(self, key)
+            if value is not None:
+                return _plain(value) if isinstance(value, tuple) else self._value(key)
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._keys:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The record as plain dicts and lists, in its JSON shape"""
+        data = {}
+        for key in self._keys:
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = _plain(self._value(key))
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+@dataclass(slots=True, eq=False)
+class PageContent(Record):
+    _keys = ('title', 'main_content', 'meta_description', 'links', 'metadata', 'document')
+
+    title: str = ''
+    main_content: str = ''
+    meta_description: str = ''
+    # A LinkGraph from HTML extraction, or the list/compact form from other content types
+    links: Any = None
+    compact_links: bool = False
+    metadata: Optional[Dict[str, Any]] = None
+    document: Optional[Dict[str, Any]] = None
+    extra: Optional[Dict[str, Any]] = None
+    # Words in main_content, kept for batch aggregates; not part of the JSON shape
+    word_count: Optional[int] = None
+
+    def words(self) -> int:
+        """Number of words in the main content, counted once"""
+        if self.word_count is None:
+            self.word_count = len(self.main_content.split()) if self.main_content else 0
+        return self.word_count
+
+    def _value(self, key: str) -> Any:
+        value = getattr(self, key)
+        if isinstance(value, LinkGraph):
+            return value.to_compact() if self.compact_links else value.to_list()
+        return value
+
+@dataclass(slots=True, eq=False)
+class PageMetadata(Record):
+    _keys = ('status_code', 'content_kind', 'encoding', 'headers', 'rendered', 'timings', 'deadline_exceeded')
+
+    status_code: Optional[int] = None
+    content_kind: Optional[str] = None
+    encoding: Optional[str] = None
+    headers: Optional[Headers] = None
+    rendered: Optional[bool] = None
+    timings: Optional[Dict[str, float]] = None
+    deadline_exceeded: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        self.content_kind = _intern(self.content_kind)
+        self.encoding = _intern(self.encoding)
+        if self.headers is not None and not isinstance(self.headers, Headers):
+            self.headers = Headers.from_items(self.headers.items())
+
+@dataclass(slots=True, eq=False)
+class Analysis(Record):
+    _keys = ('status', 'error', 'title', 'summary', 'sentiment', 'key_points', 'suggestions',
+             'confidence_score', 'topics', 'readability')
+
+    status: Optional[str] = None
+    error: Optional[str] = None
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    sentiment: Optional[str] = None
+    key_points: Optional[Tuple[str, ...]] = None
+    suggestions: Optional[Tuple[str, ...]] = None
+    confidence_score: Optional[float] = None
+    topics: Optional[Tuple[str, ...]] = None
+    readability: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        self.status = _intern(self.status)
+        self.sentiment = _intern(self.sentiment)
+        self.readability = _intern(self.readability)
+        self.key_points = _strings(self.key_points)
+        self.suggestions = _strings(self.suggestions)
+        self.topics = _strings(self.topics)
+
+@dataclass(slots=True, eq=False)
+class AnalysisResult(Record):
+    _keys = ('status', 'error', 'url', 'content', 'analysis', 'metadata', 'partial', 'deadline_exceeded')
+
+    status: str = 'success'
+    error: Optional[str] = None
+    url: Optional[str] = None
+    content: Optional[PageContent] = None
+    analysis: Optional[Analysis] = None
+    metadata: Optional[PageMetadata] = None
+    partial: Optional[bool] = None
+    deadline_exceeded: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+    # Fields the caller asked for; applied when the result is serialized
+    profile: Optional[ResponseProfile] = None
+
+    def __post_init__(self):
+        self.status = _intern(self.status)
+        self.content = PageContent.from_dict(self.content)
+        self.analysis = Analysis.from_dict(self.analysis)
+        self.metadata = PageMetadata.from_dict(self.metadata)
+
+    @classmethod
+    def failure(cls, url: str, error: str, deadline_exceeded: Optional[str] = None) -> 'AnalysisResult':
+        """An error result"""
+        return cls(status='error', error=error, url=url, deadline_exceeded=deadline_exceeded)
+
+    def with_url(self, url: str) -> 'AnalysisResult':
+        """A shallow copy answering for another URL, e.g. for a coalesced caller"""
+        return replace(self, url=url)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = Record.to_dict(self)
+        return self.profile.apply(data) if self.profile is not None else data
+
+def as_dict(result: Union[Mapping, Record]) -> Dict[str, Any]:
+    """
+    Plain-dict form of a result at an API or export boundary.
+
+    Args:
+        result: An AnalysisResult or an already plain result dict
+
+    Returns:
+        Dict[str, Any]: The result in its JSON shape
+    """
+    return result.to_dict() if isinstance(result, Record) else result
@@ -0,0 +1,356 @@
+"""
+robots.txt and sitemap handling shared by every fetch path.
+
+Each origin's robots.txt is fetched once, compiled into a matcher and
+cached with a TTL. Expired entries keep being served for a grace period
+while a single background refresh runs (stale-while-revalidate), and
+concurrent first lookups for the same origin share one fetch. Sitemaps are
+parsed incrementally, so a 50,000-URL sitemap never sits in memory whole.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+import requests
+from backend.security import check_url_security
+from backend.metrics import CACHE_HITS, CACHE_MISSES
+from backend.config import get_settings
+from backend.transport import PRODUCT_TOKEN
+
+# User agent token matched against robots.txt groups; page fetches send the same token
+ROBOTS_USER_AGENT = PRODUCT_TOKEN
+# Bytes of robots.txt read at most, as recommended by RFC 9309
+MAX_ROBOTS_SIZE = 500 * 1024
+SITEMAP_CHUNK_SIZE = 64 * 1024
+# Largest piece decompressed at once from a gzipped sitemap
+MAX_SITEMAP_SIZE = 1024 * 1024
+
+class RobotsRules:
+    """Compiled allow/disallow rules of the robots.txt group that applies to one agent"""
+
+    def __init__(self, rules: List[Tuple[bool, str]] = (), sitemaps: List[str] = (),
+                 crawl_delay: Optional[float] = None, disallow_all: bool = False):
+        """
+        Args:
+            rules (List[Tuple[bool, str]]): (allow, path pattern) pairs
+            sitemaps (List[str]): Sitemap URLs listed in the file
+            crawl_delay (Optional[float]): Requested seconds between fetches
+            disallow_all (bool): Block everything, used while robots.txt is unreachable
+        """
+        self.sitemaps = list(sitemaps)
+        self.crawl_delay = crawl_delay
+        self.disallow_all = disallow_all
+        # Longest pattern first, allow before disallow on equal length: the first match decides
+        ordered = sorted(rules, key=lambda rule: (-len(rule[1]), not rule[0]))
+        self._rules = [(allow, self._compile(pattern)) for allow, pattern in ordered if pattern]
+
+    @staticmethod
+    def _compile(pattern: str):
+        anchored = pattern.endswith('$')
+        body = re.escape(pattern.rstrip('$')).replace(r'\*', '.*')
+        return re.compile(body + ('$' if anchored else '')).match
+
+    @classmethod
+    def parse(cls, text: str, user_agent: str = ROBOTS_USER_AGENT) -> 'RobotsRules':
+        """
+        Parse robots.txt, keeping only the group for a user agent.
+
+        Args:
+            text (str): robots.txt content
+            user_agent (str): Product token to match groups against; a full user agent
+                string such as 'WebContentAnalyzer/1.0 (+url)' is reduced to its token
+
+        Returns:
+            RobotsRules: Rules of the group naming the token, compared case-insensitively
+                as RFC 9309 requires, or of the `*` group
+        """
+        parts = user_agent.split('/', 1)[0].split()
+        agent = parts[0].lower() if parts else '*'
+        groups: Dict[str, List[Tuple[bool, str]]] = {}
+        delays: Dict[str, float] = {}
+        sitemaps = []
+        current: List[str] = []
+        in_rules = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            key, _, value = line.partition(':')
+            key, value = key.strip().lower(), value.strip()
+            if key == 'user-agent':
+                # Consecutive user-agent lines share the group that follows them
+                if in_rules:
+                    current, in_rules = [], False
+                current.append(value.lower())
+                for name in current:
+                    groups.setdefault(name, [])
+            elif key in ('allow', 'disallow') and current:
+                in_rules = True
+                for name in current:
+                    groups[name].append((key == 'allow', value))
+            elif key == 'crawl-delay' and current:
+                in_rules = True
+                try:
+                    for name in current:
+                        delays[name] = float(value)
+                except ValueError:
+                    pass
+            elif key == 'sitemap' and value:
+                sitemaps.append(value)
+
+        name = agent if agent in groups else '*'
+        return cls(groups.get(name, []), sitemaps, delays.get(name))
+
+    def allowed(self, url: str) -> bool:
+        """Whether the rules allow fetching a URL"""
+        if self.disallow_all:
+            return False
+        parts = urlsplit(url)
+        path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        for allow, match in self._rules:
+            if match(path):
+                return allow
+        return True
+
+class _Entry:
+    __slots__ = ('rules', 'expires', 'stale_until')
+
+    def __init__(self, rules: RobotsRules, expires: float, stale_until: float):
+        self.rules = rules
+        self.expires = expires
+        self.stale_until = stale_until
+
+class RobotsCache:
+    def __init__(self, ttl: float = 86400, stale_ttl: float = 3600, error_ttl: float = 600,
+                 max_origins: int = 10000, timeout: float = 10, user_agent: str = ROBOTS_USER_AGENT):
+        """
+        Args:
+            ttl (float): Seconds a fetched robots.txt is fresh
+            stale_ttl (float): Seconds an expired entry is still served while it refreshes
+            error_ttl (float): Seconds an unreachable robots.txt blocks the origin before retrying
+            max_origins (int): Origins kept before the least recently used is evicted
+            timeout (float): Fetch timeout in seconds
+            user_agent (str): Product token matched against robots.txt groups
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.max_origins = max_origins
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = f'Mozilla/5.0 (compatible; {user_agent})'
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='robots')
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def allowed(self, url: str) -> bool:
+        """
+        Whether robots.txt lets us fetch a URL, fetching it first if needed.
+
+        Args:
+            url (str): Absolute URL to check
+
+        Returns:
+            bool: False if the URL is disallowed for our user agent
+        """
+        return self.get_rules(url).allowed(url)
+
+    async def allowed_async(self, url: str) -> bool:
+        """Like allowed, but waits for a first fetch without blocking the event loop"""
+        return (await self.get_rules_async(url)).allowed(url)
+
+    def get_rules(self, url: str) -> RobotsRules:
+        """Rules for the origin of a URL, blocking on a first fetch"""
+        origin = self._origin(url)
+        rules = self._cached(origin)
+        if rules is None:
+            rules = self._refresh(origin).result()
+        return rules
+
+    async def get_rules_async(self, url: str) -> RobotsRules:
+        """Rules for the origin of a URL, awaiting a first fetch"""
+        origin = self._origin(url)
+        rules = self._cached(origin)
+        if rules is None:
+            rules = await asyncio.wrap_future(self._refresh(origin))
+        return rules
+
+    def _origin(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def _cached(self, origin: str) -> Optional[RobotsRules]:
+        """Fresh or stale-but-usable rules, starting a background refresh for stale ones"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry is None or now >= entry.stale_until:
+                CACHE_MISSES.inc(cache='robots')
+                return None
+            self._entries.move_to_end(origin)
+        CACHE_HITS.inc(cache='robots')
+        if now >= entry.expires:
+            self._refresh(origin)
+        return entry.rules
+
+    def _refresh(self, origin: str) -> Future:
+        """Fetch an origin's robots.txt, sharing the fetch with concurrent callers"""
+        with self._lock:
+            future = self._inflight.get(origin)
+            if future is None:
+                future = self._inflight[origin] = self.executor.submit(self._load, origin)
+        return future
+
+    def _load(self, origin: str) -> RobotsRules:
+        try:
+            rules, ttl = self._fetch(origin)
+        except BaseException:
+            with self._lock:
+                self._inflight.pop(origin, None)
+            raise
+        now = time.monotonic()
+        with self._lock:
+            self._entries[origin] = _Entry(rules, now + ttl, now + ttl + self.stale_ttl)
+            self._entries.move_to_end(origin)
+            while len(self._entries) > self.max_origins:
+                self._entries.popitem(last=False)
+            # Cleared with the entry in place, so no caller sees neither
+            self._inflight.pop(origin, None)
+        return rules
+
+    def _fetch(self, origin: str) -> Tuple[RobotsRules, float]:
+        """
+        Fetch and parse robots.txt following RFC 9309.
+
+        A 4xx response means no restrictions; a 5xx or network failure
+        blocks the origin for error_ttl seconds.
+        """
+        url = origin + '/robots.txt'
+        if not check_url_security(url):
+            return RobotsRules(disallow_all=True), self.ttl
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                if 400 <= response.status_code < 500:
+                    return RobotsRules(), self.ttl
+                if response.status_code >= 500:
+                    return RobotsRules(disallow_all=True), self.error_ttl
+                body = response.raw.read(MAX_ROBOTS_SIZE, decode_content=True)
+                encoding = response.encoding or 'utf-8'
+        except requests.RequestException:
+            return RobotsRules(disallow_all=True), self.error_ttl
+        return RobotsRules.parse(body.decode(encoding, errors='replace'), self.user_agent), self.ttl
+
+    def sitemap_urls(self, url: str, limit: int = 10000, max_depth: int = 2) -> List[str]:
+        """
+        Page URLs from a site's sitemaps.
+
+        Sitemaps come from robots.txt, falling back to /sitemap.xml. Sitemap
+        indexes are followed up to max_depth levels.
+
+        Args:
+            url (str): Any URL on the site
+            limit (int): Page URLs returned at most
+            max_depth (int): Sitemap index levels followed
+
+        Returns:
+            List[str]: Page URLs in sitemap order
+        """
+        origin = self._origin(url)
+        sitemaps = deque((sitemap, 0) for sitemap in self.get_rules(url).sitemaps or [origin + '/sitemap.xml'])
+        visited = set()
+        urls: List[str] = []
+        while sitemaps and len(urls) < limit:
+            sitemap, depth = sitemaps.popleft()
+            if sitemap in visited:
+                continue
+            visited.add(sitemap)
+            for kind, location in self.iter_sitemap(sitemap):
+                if kind == 'sitemap':
+                    if depth < max_depth:
+                        sitemaps.append((urljoin(sitemap, location), depth + 1))
+                else:
+                    urls.append(urljoin(sitemap, location))
+                    if len(urls) >= limit:
+                        break
+        return urls
+
+    def iter_sitemap(self, url: str) -> Iterator[Tuple[str, str]]:
+        """
+        Stream the entries of one sitemap or sitemap index.
+
+        The response is parsed chunk by chunk and entries are dropped once
+        read, so memory stays flat however many entries the file holds.
+        Gzipped sitemaps are supported.
+
+        Args:
+            url (str): Sitemap URL
+
+        Returns:
+            Iterator[Tuple[str, str]]: ('url', location) or ('sitemap', location) pairs
+        """
+        if not check_url_security(url):
+            return
+        try:
+            response = self.session.get(url, timeout=self.timeout, stream=True)
+        except requests.RequestException:
+            return
+        with response:
+            if response.status_code != 200:
+                return
+            yield from parse_sitemap(_gunzip(response.iter_content(SITEMAP_CHUNK_SIZE)))
+
+def _gunzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Unpack gzip-compressed chunks; anything else passes through"""
+    decompressor = None
+    for index, chunk in enumerate(chunks):
+        # requests undoes Content-Encoding; .xml.gz files are still compressed
+        if index == 0 and chunk[:2] == b'\x1f\x8b':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if decompressor is None:
+            yield chunk
+            continue
+        # Bounded output per call keeps a highly compressed chunk from expanding all at once
+        yield decompressor.decompress(chunk, MAX_SITEMAP_SIZE)
+        while decompressor.unconsumed_tail:
+            yield decompressor.decompress(decompressor.unconsumed_tail, MAX_SITEMAP_SIZE)
+
+def parse_sitemap(chunks: Iterable[bytes]) -> Iterator[Tuple[str, str]]:
+    """
+    Incrementally parse sitemap XML.
+
+    Args:
+        chunks (Iterable[bytes]): The sitemap XML in pieces, as they arrive
+
+    Returns:
+        Iterator[Tuple[str, str]]: ('url', location) or ('sitemap', location) pairs
+    """
+    parser = ElementTree.XMLPullParser(events=('start', 'end'))
+    location = None
+    root = None
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if root is None:
+                    root = element
+                if event == 'start':
+                    continue
+                tag = element.tag.rpartition('}')[2]
+                if tag == 'loc':
+                    location = (element.text or '').strip()
+                elif tag in ('url', 'sitemap'):
+                    if location:
+                        yield tag, location
+                    location = None
+                    # Drop finished entries from the tree so it never grows
+                    root.clear()
+    except (ElementTree.ParseError, zlib.error, requests.RequestException):
+        return
+
+robots_cache = RobotsCache(ttl=get_settings().robots_ttl, stale_ttl=get_settings().robots_stale_ttl)
@@ -6,68 +6,151 @@ from backend.web_scraper import WebScraper
 from backend.content_extractor import ContentExtractor
 from backend.validators import validate_url
 from backend.security import check_url_security
+from backend.response_profiles import ResponseProfile, FULL_PROFILE
+from backend.metrics import track_stage
+from backend.config import get_settings
+from backend.robots import robots_cache
+from backend.render_tier import RenderDetector, browser_pool
+from backend.content_types import extract_pdf, extract_text, feed_content
+from backend.deadline import Deadline, DeadlineExceeded
+from backend.result_model import AnalysisResult, PageContent, PageMetadata
+
+# Seconds a request must have left for a browser render to be attempted
+MIN_RENDER_BUDGET = 1.0
 
 class ScrapingService:
-    def __init__(self):
-        self.scraper = WebScraper()
-        self.extractor = ContentExtractor()
+    def __init__(self, scraper: Optional[WebScraper] = None):
+        """
+        Args:
+            scraper (Optional[WebScraper]): Where pages come from; the network by default. An offline
+                scraper such as ReplayScraper also skips the DNS, robots.txt and browser stages.
+        """
+        self.scraper = scraper or WebScraper()
+        self.extractor = ContentExtractor(max_links=get_settings().max_links_per_page or None)
+        self.respect_robots = get_settings().respect_robots and not self.scraper.offline
+        self.render_detector = RenderDetector()
+        self.render_pool = None
+        if get_settings().render_enabled and browser_pool.available and not self.scraper.offline:
+            self.render_pool = browser_pool
 
-    def analyze_url(self, url: str) -> Dict:
+    def analyze_url(self, url: str, profile: ResponseProfile = FULL_PROFILE,
+                    timings: Optional[Dict[str, float]] = None,
+                    deadline: Optional[Deadline] = None) -> AnalysisResult:
         """
         Analyzes a URL by scraping and extracting its content.
         
         Args:
             url (str): URL to analyze
+            profile (ResponseProfile): Fields to produce; others are skipped
+            timings (Optional[Dict[str, float]]): Receives per-stage durations in milliseconds
+            deadline (Optional[Deadline]): Request deadline; checked before each stage
             
         Returns:
-            Dict containing analysis results and any errors
+            AnalysisResult: Scraped content and metadata, or the error; reads like the result dict
         """
+        deadline = deadline or Deadline.unbounded()
         try:
             # Initial validation
-            if not validate_url(url):
-                return {
-                    "status": "error",
-                    "error": "Invalid URL format",
-                    "url": url
-                }
-
-            # Security check
-            if not check_url_security(url):
-                return {
-                    "status": "error",
-                    "error": "URL failed security check",
-                    "url": url
-                }
+            with track_stage("validate", timings):
+                valid = validate_url(url)
+            if not valid:
+                return AnalysisResult.failure(url, "Invalid URL format")
+
+            # Security check; resolving the host makes this the DNS stage
+            with track_stage("dns", timings):
+                secure = self.scraper.offline or check_url_security(url)
+            if not secure:
+                return AnalysisResult.failure(url, "URL failed security check")
+
+            if self.respect_robots:
+                with track_stage("robots", timings):
+                    allowed = robots_cache.allowed(url)
+                if not allowed:
+                    return AnalysisResult.failure(url, "Blocked by robots.txt")
 
             # Fetch page content
-            page_result = self.scraper.fetch_page(url)
+            include_headers = profile.includes("metadata.headers")
+            deadline.check("fetch")
+            with track_stage("fetch", timings):
+                page_result = self.scraper.fetch_page(url, include_headers=include_headers, deadline=deadline)
             if page_result["status"] == "error":
-                return page_result
+                if deadline.expired:
+                    raise DeadlineExceeded("fetch")
+                return AnalysisResult.from_dict(page_result)
+
+            include_links = profile.includes("content.links")
+            kind = page_result.get("kind", "html")
+            if kind != "html":
+                deadline.check("extract")
+                with track_stage("extract", timings):
+                    content = self._extract_document(page_result, include_links, profile.compact_links)
+                return self._success(url, content, page_result, include_headers)
 
             # Parse content
-            soup = self.scraper.get_soup(page_result["content"])
+            deadline.check("parse")
+            with track_stage("parse", timings):
+                soup = self.scraper.get_soup(page_result["content"])
+
+            # Send empty client-side shells through the browser pool
+            rendered = False
+            if self.render_pool is not None:
+                decision = self.render_detector.check(page_result["content"], soup)
+                # Rendering is skipped rather than started without time to finish
+                if decision.render and deadline.remaining() >= MIN_RENDER_BUDGET:
+                    soup, rendered = self._render(page_result.get("url", url), soup, timings, deadline)
             
             # Extract content
-            content = self.extractor.extract_content(soup)
-
-            return {
-                "status": "success",
-                "url": url,
-                "content": content,
-                "metadata": {
-                    "status_code": page_result["status_code"],
-                    "headers": page_result["headers"]
-                }
-            }
+            deadline.check("extract")
+            with track_stage("extract", timings):
+                content = self.extractor.extract_page(
+                    soup,
+                    include_links=include_links,
+                    structured=profile.includes("content.document"),
+                    base_url=page_result.get("url", url),
+                    compact_links=profile.compact_links
+                )
+
+            result = self._success(url, content, page_result, include_headers)
+            if rendered:
+                result.metadata.rendered = True
+            return result
 
+        except DeadlineExceeded as e:
+            return AnalysisResult.failure(url, str(e), deadline_exceeded=e.stage)
         except Exception as e:
-            return {
-                "status": "error",
-                "error": f"Unexpected error: {str(e)}",
-                "url": url
-            }
+            return AnalysisResult.failure(url, f"Unexpected error: {str(e)}")
+
+    def _success(self, url: str, content: PageContent, page_result: Dict, include_headers: bool) -> AnalysisResult:
+        metadata = PageMetadata(
+            status_code=page_result["status_code"],
+            content_kind=page_result.get("kind", "html"),
+            encoding=page_result.get("encoding"),
+            headers=page_result["headers"] if include_headers else None
+        )
+        return AnalysisResult(status="success", url=url, content=content, metadata=metadata)
+
+    def _extract_document(self, page_result: Dict, include_links: bool, compact_links: bool) -> PageContent:
+        """Map a non-HTML response onto the content schema without touching BeautifulSoup"""
+        kind = page_result["kind"]
+        if kind == "text":
+            content = extract_text(page_result["content"], include_links)
+        elif kind == "pdf":
+            content = extract_pdf(page_result["body"], include_links)
+        else:
+            content = feed_content(page_result["records"], page_result.get("url"), include_links, compact_links)
+        return PageContent.from_dict(content)
+
+    def _render(self, url: str, soup, timings: Optional[Dict[str, float]], deadline: Deadline):
+        """Render a page in the browser pool, keeping the static soup if rendering fails"""
+        try:
+            with track_stage("render", timings):
+                html = self.render_pool.render(url, timeout=deadline.clip(self.render_pool.timeout))
+        except Exception:
+            return soup, False
+        with track_stage("parse", timings):
+            return self.scraper.get_soup(html), True
 
-    def analyze_multiple_urls(self, urls: list[str]) -> list[Dict]:
+    def analyze_multiple_urls(self, urls: list[str]) -> list[AnalysisResult]:
         """
         Analyzes multiple URLs in sequence.
         
@@ -75,7 +158,7 @@ class ScrapingService:
             urls (list[str]): List of URLs to analyze
             
         Returns:
-            list[Dict]: List of analysis results
+            list[AnalysisResult]: List of analysis results
         """
         results = []
         for url in urls:
@@ -3,6 +3,7 @@ Security module for preventing SSRF attacks and other security checks.
 """
 import ipaddress
 import socket
+import threading
 from urllib.parse import urlparse
 from typing import List, Union, Optional
 from backend.validators import get_domain
@@ -58,6 +59,15 @@ class SecurityChecker:
         except ValueError:
             return False
 
+    def resolve(self, host: str) -> str:
+        """
+        Resolve a host name to the IPv4 address it will be fetched from.
+
+        Raises:
+            socket.gaierror: If the name does not resolve
+        """
+        return socket.gethostbyname(host)
+
     def check_url_security(self, url: str) -> bool:
         """
         Performs security checks on the URL.
@@ -73,9 +83,15 @@ class SecurityChecker:
             if not domain:
                 return False
 
+            # Resolve the host alone; the netloc may also carry credentials and a port,
+            # and URLs with a port are checked like any other
+            host = urlparse(url).hostname
+            if not host:
+                return False
+
             # Try to resolve domain to IP
             try:
-                ip = socket.gethostbyname(domain)
+                ip = self.resolve(host)
                 if self._is_ip_private(ip):
                     return False
             except socket.gaierror:
@@ -90,8 +106,23 @@ class SecurityChecker:
         except Exception:
             return False
 
-# Create a singleton instance
-security_checker = SecurityChecker()
+_security_checker: Optional[SecurityChecker] = None
+_security_checker_lock = threading.Lock()
+
+def get_security_checker() -> SecurityChecker:
+    """The shared checker, built on first use"""
+    global _security_checker
+    if _security_checker is None:
+        with _security_checker_lock:
+            if _security_checker is None:
+                _security_checker = SecurityChecker()
+    return _security_checker
+
+def __getattr__(name: str):
+    # `security_checker` stays importable as a module attribute without being built at import
+    if name == 'security_checker':
+        return get_security_checker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def check_url_security(url: str) -> bool:
     """
@@ -103,5 +134,5 @@ def check_url_security(url: str) -> bool:
     Returns:
         bool: True if URL passes security checks, False otherwise
     """
-    return security_checker.check_url_security(url)
+    return get_security_checker().check_url_security(url)
 
@@ -0,0 +1,435 @@
+"""
+Local similarity index over analyzed pages.
+
+Pages are embedded as hashed TF-IDF vectors. Words and word pairs of the
+page text are hashed with CRC-32 into a fixed number of signed dimensions,
+weighted by log term frequency and by inverse document frequency (counted
+over 2**20 hash buckets), and L2-normalized. Embedding works on whole
+batches with NumPy, so indexing many pages at once costs one matrix build
+rather than a loop per page.
+
+Vectors live in a memory-mapped float16 matrix on disk. Random-hyperplane
+LSH signatures, in several tables of 16 bits each, index them: a query
+gathers the rows that share a bucket with it, or sit one bit away, in any
+table and ranks only those by exact cosine similarity. Small indexes are
+scanned in full instead.
+
+Inserts only append. Re-adding a URL writes a new row and hides the old
+one, and the line in `urls.txt`, written last, is what commits a row.
+Document frequencies keep growing as pages are added, so stored vectors
+carry the weights of the time they were added. One process writes an
+index directory at a time.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import argparse
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from backend.config import get_settings
+from backend.lazy import optional_module
+from backend.link_graph import normalize_url
+from backend.metrics import registry
+
+np = optional_module('numpy')
+
+INDEXED_PAGES = registry.gauge('wca_similarity_pages', 'Pages in the similarity index')
+QUERY_LATENCY = registry.histogram(
+    'wca_similarity_query_seconds', 'Time to answer a similarity query',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+TOKEN_PATTERN = re.compile(r"\w\w+")
+# Words read from one page; enough to characterize it without embedding whole books
+MAX_WORDS = 20000
+DF_BUCKETS = 1 << 20
+BITS = 16
+TABLES = 16
+# Indexes up to this many rows are scanned in full, which is exact and still fast
+BRUTE_FORCE_ROWS = 4096
+# Rows taken from one LSH bucket, so template-heavy sites cannot flood a query
+MAX_BUCKET_ROWS = 2000
+# Rows added since the last sort that are scanned linearly before re-sorting
+MIN_UNSORTED_ROWS = 4096
+INITIAL_CAPACITY = 1024
+
+class Neighbor(NamedTuple):
+    url: str
+    score: float
+
+class SimilarityIndex:
+    def __init__(self, directory: str, dim: int = 256, duplicate_threshold: float = 0.9, seed: int = 0):
+        """
+        Args:
+            directory (str): Where the index files live; created if missing
+            dim (int): Embedding dimensions for a new index, a power of two up to 2048;
+                an existing index keeps its own
+            duplicate_threshold (float): Cosine similarity from which add() reports a duplicate
+            seed (int): Seed of the LSH hyperplanes for a new index
+
+        Raises:
+            RuntimeError: If numpy is not installed
+            ValueError: If dim is not a power of two up to 2048
+        """
+        if np is None:
+            raise RuntimeError("The similarity index requires numpy")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path = self.directory / 'meta.json'
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+        else:
+            meta = {'dim': dim, 'tables': TABLES, 'bits': BITS, 'seed': seed}
+        # The hash's top bit is the sign and bits 20-30 the dimension, so at most 2**11 of them
+        if meta['dim'] & (meta['dim'] - 1) or not 0 < meta['dim'] <= 2048:
+            raise ValueError(f"Similarity dimensions must be a power of two up to 2048, got {meta['dim']}")
+        if not meta_path.exists():
+            meta_path.write_text(json.dumps(meta))
+        self.dim = meta['dim']
+        self.tables = meta['tables']
+        self.duplicate_threshold = duplicate_threshold
+        self._planes = np.random.default_rng(meta['seed']).standard_normal(
+            (self.dim, self.tables * BITS)
+        ).astype(np.float32)
+        self._bit_values = (1 << np.arange(BITS)).astype(np.uint32)
+        # XOR masks for the bucket itself and the buckets one bit away
+        self._probes = np.array([0] + [1 << bit for bit in range(BITS)], dtype=np.uint16)
+        self._lock = threading.Lock()
+
+        self._urls = self._read_urls()
+        self._ids: Dict[str, int] = {}
+        for row, url in enumerate(self._urls):
+            self._ids[url] = row
+        self._rows = len(self._urls)
+        self._capacity = max(INITIAL_CAPACITY, self._rows)
+        self._df = self._open('df.i32', np.int32, (DF_BUCKETS,))
+        self._vectors = self._open('vectors.f16', np.float16, (self._capacity, self.dim))
+        self._signatures = self._open('signatures.u16', np.uint16, (self._capacity, self.tables))
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._alive[list(self._ids.values())] = True
+        self._urls_file = open(self.directory / 'urls.txt', 'a', encoding='utf-8')
+        # Per table, row numbers ordered by signature and the signatures in that order
+        self._sorted_rows = 0
+        self._order: List = []
+        self._sorted: List = []
+        INDEXED_PAGES.set(len(self._ids))
+
+    def _read_urls(self) -> List[str]:
+        """Committed rows; a line cut short by a crash is dropped"""
+        path = self.directory / 'urls.txt'
+        if not path.exists():
+            return []
+        text = path.read_text(encoding='utf-8')
+        committed = text[:text.rfind('\n') + 1]
+        if len(committed) != len(text):
+            path.write_text(committed, encoding='utf-8')
+        return committed.splitlines()
+
+    def _open(self, name: str, dtype, shape: Tuple[int, ...]):
+        """Memory-map a file of the given shape, growing the file if it is smaller"""
+        path = self.directory / name
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, 'a+b') as f:
+            if f.seek(0, 2) < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+
+    def _grow(self, rows: int):
+        capacity = self._capacity
+        while capacity < rows:
+            capacity *= 2
+        self._vectors.flush()
+        self._signatures.flush()
+        self._vectors = self._open('vectors.f16', np.float16, (capacity, self.dim))
+        self._signatures = self._open('signatures.u16', np.uint16, (capacity, self.tables))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._capacity] = self._alive
+        self._alive = alive
+        self._capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, url: str) -> bool:
+        return self._key(url) in self._ids
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return normalize_url(url) or url
+
+    def embed(self, texts: List[str], update_df: bool = False):
+        """
+        Hashed TF-IDF vectors for a batch of texts.
+
+        Args:
+            texts (List[str]): Page texts
+            update_df (bool): Count the texts into the document frequencies first, as when indexing them
+
+        Returns:
+            np.ndarray: One L2-normalized float32 row per text; all zeros for a text without words
+        """
+        cache: Dict[str, int] = {}
+        rows = []
+        for text in texts:
+            words = TOKEN_PATTERN.findall(text.lower())[:MAX_WORDS]
+            row = []
+            for feature in itertools.chain(words, map(' '.join, zip(words, words[1:]))):
+                hashed = cache.get(feature)
+                if hashed is None:
+                    hashed = cache[feature] = zlib.crc32(feature.encode('utf-8'))
+                row.append(hashed)
+            rows.append(row)
+
+        count = len(rows)
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=count)
+        hashes = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.uint64, count=int(lengths.sum()))
+        docs = np.repeat(np.arange(count, dtype=np.uint64), lengths)
+        # One entry per distinct (text, feature) pair, with how often the feature occurs
+        keys, counts = np.unique((docs << np.uint64(32)) | hashes, return_counts=True)
+        docs = (keys >> np.uint64(32)).astype(np.intp)
+        hashes = keys & np.uint64(0xFFFFFFFF)
+
+        buckets = (hashes & np.uint64(DF_BUCKETS - 1)).astype(np.intp)
+        if update_df:
+            np.add.at(self._df, buckets, 1)
+            documents = self._rows + count
+        else:
+            documents = max(self._rows, 1)
+        idf = np.log((1 + documents) / (1 + self._df[buckets])) + 1
+        weights = (1 + np.log(counts)) * idf
+        weights[(hashes >> np.uint64(31)) == 1] *= -1
+        columns = ((hashes >> np.uint64(20)) & np.uint64(self.dim - 1)).astype(np.intp)
+
+        vectors = np.bincount(docs * self.dim + columns, weights=weights, minlength=count * self.dim)
+        vectors = vectors.reshape(count, self.dim).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _signatures_of(self, vectors):
+        """LSH signature of each vector, one 16-bit bucket per table"""
+        bits = (vectors @ self._planes > 0).reshape(len(vectors), self.tables, BITS)
+        return (bits * self._bit_values).sum(axis=2).astype(np.uint16)
+
+    def add(self, url: str, text: str) -> Optional[Neighbor]:
+        """
+        Index one page.
+
+        Args:
+            url (str): Page URL; a page already indexed under it is replaced
+            text (str): Page text
+
+        Returns:
+            Optional[Neighbor]: The most similar other page, if it is at least duplicate_threshold alike
+        """
+        return self.add_batch([(url, text)])[0]
+
+    def add_batch(self, pages: Iterable[Tuple[str, str]], find_duplicates: bool = True) -> List[Optional[Neighbor]]:
+        """
+        Index pages, embedding them as one batch.
+
+        Args:
+            pages (Iterable[Tuple[str, str]]): URL and text of each page
+            find_duplicates (bool): Look up each page's nearest neighbour before adding it;
+                bulk loads can skip this
+
+        Returns:
+            List[Optional[Neighbor]]: Per page, the duplicate it matched, if any
+        """
+        pages = list(pages)
+        with self._lock:
+            vectors = self.embed([text for _, text in pages], update_df=True)
+            return self._insert([url for url, _ in pages], vectors, find_duplicates)
+
+    def add_vectors(self, urls: List[str], vectors, find_duplicates: bool = False) -> List[Optional[Neighbor]]:
+        """
+        Index precomputed embeddings, e.g. from embed().
+
+        Args:
+            urls (List[str]): Page URLs
+            vectors (np.ndarray): One L2-normalized row of `dim` values per URL
+            find_duplicates (bool): Look up each page's nearest neighbour before adding it
+
+        Returns:
+            List[Optional[Neighbor]]: Per page, the duplicate it matched, if any
+        """
+        with self._lock:
+            return self._insert(urls, np.asarray(vectors, dtype=np.float32), find_duplicates)
+
+    def _insert(self, urls: List[str], vectors, find_duplicates: bool) -> List[Optional[Neighbor]]:
+        keep = np.flatnonzero(vectors.any(axis=1))
+        signatures = self._signatures_of(vectors[keep])
+        duplicates: List[Optional[Neighbor]] = [None] * len(urls)
+        if self._rows + len(keep) > self._capacity:
+            self._grow(self._rows + len(keep))
+
+        if find_duplicates:
+            # Row by row, so pages of one batch are also checked against each other
+            for position, signature in zip(keep, signatures):
+                key = self._key(urls[position])
+                nearest = self._search(vectors[position], signature, 1, self._ids.get(key))
+                if nearest and nearest[0].score >= self.duplicate_threshold:
+                    duplicates[position] = nearest[0]
+                self._append([key], vectors[position:position + 1], signature[None])
+        elif len(keep):
+            self._append([self._key(urls[position]) for position in keep], vectors[keep], signatures)
+        self._urls_file.flush()
+        INDEXED_PAGES.set(len(self._ids))
+        return duplicates
+
+    def _append(self, keys: List[str], vectors, signatures):
+        start = self._rows
+        end = start + len(keys)
+        self._vectors[start:end] = vectors
+        self._signatures[start:end] = signatures
+        for row, key in enumerate(keys, start):
+            previous = self._ids.get(key)
+            if previous is not None:
+                self._alive[previous] = False
+            self._ids[key] = row
+            self._alive[row] = True
+        self._urls.extend(keys)
+        # Written last: a row exists once its URL line does
+        self._urls_file.write(''.join(key + '\n' for key in keys))
+        self._rows = end
+
+    def similar(self, url: Optional[str] = None, text: Optional[str] = None, limit: int = 10) -> List[Neighbor]:
+        """
+        Pages most similar to an indexed URL or to a piece of text.
+
+        Args:
+            url (Optional[str]): An indexed page; it is left out of its own results
+            text (Optional[str]): Text to match when no URL is given
+            limit (int): Number of neighbours to return
+
+        Returns:
+            List[Neighbor]: Neighbours, most similar first
+
+        Raises:
+            KeyError: If the URL is not in the index
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if url is not None:
+                row = self._ids.get(self._key(url))
+                if row is None:
+                    raise KeyError(url)
+                vector = np.asarray(self._vectors[row], dtype=np.float32)
+                signature = np.array(self._signatures[row])
+            else:
+                vector = self.embed([text or ''])[0]
+                if not vector.any():
+                    return []
+                signature = self._signatures_of(vector[None])[0]
+                row = None
+            neighbors = self._search(vector, signature, limit, row)
+        QUERY_LATENCY.observe(time.perf_counter() - start)
+        return neighbors
+
+    def _search(self, vector, signature, limit: int, exclude: Optional[int]) -> List[Neighbor]:
+        if self._rows <= BRUTE_FORCE_ROWS:
+            candidates = np.flatnonzero(self._alive[:self._rows])
+        else:
+            candidates = self._candidates(signature)
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        if not len(candidates) or limit < 1:
+            return []
+        scores = self._vectors[candidates].astype(np.float32) @ vector
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        # float16 storage can put a page's score with itself a hair above 1
+        return [Neighbor(self._urls[candidates[i]], round(min(float(scores[i]), 1.0), 4)) for i in top]
+
+    def _candidates(self, signature):
+        """Live rows sharing a bucket with the signature, or one bit away, in any table"""
+        self._sort()
+        probes = signature[:, None] ^ self._probes
+        parts = []
+        for table in range(self.tables):
+            ordered = self._sorted[table]
+            lows = np.searchsorted(ordered, probes[table], 'left')
+            highs = np.searchsorted(ordered, probes[table], 'right')
+            for low, high in zip(lows, highs):
+                if high > low:
+                    parts.append(self._order[table][low:min(high, low + MAX_BUCKET_ROWS)])
+        unsorted = self._signatures[self._sorted_rows:self._rows] ^ signature
+        # Zero or one bit set: a power of two (or zero) cleared by x & (x - 1)
+        near = ((unsorted & (unsorted - np.uint16(1))) == 0).any(axis=1)
+        parts.append(np.flatnonzero(near) + self._sorted_rows)
+        candidates = np.unique(np.concatenate(parts))
+        return candidates[self._alive[candidates]]
+
+    def _sort(self):
+        """Re-sort the tables once the unsorted tail is too long to scan cheaply"""
+        unsorted = self._rows - self._sorted_rows
+        if self._order and unsorted <= max(MIN_UNSORTED_ROWS, self._sorted_rows // 8):
+            return
+        signatures = np.array(self._signatures[:self._rows])
+        self._order = []
+        self._sorted = []
+        for table in range(self.tables):
+            order = np.argsort(signatures[:, table], kind='stable')
+            self._order.append(order)
+            self._sorted.append(signatures[order, table])
+        self._sorted_rows = self._rows
+
+    def close(self):
+        with self._lock:
+            self._urls_file.close()
+            for mapped in (self._df, self._vectors, self._signatures):
+                mapped.flush()
+
+def page_text(title: Optional[str], main_content: Optional[str]) -> str:
+    """The text a page is embedded from"""
+    return f"{title or ''}\n{main_content or ''}"
+
+def create_similarity_index() -> Optional[SimilarityIndex]:
+    """The similarity index configured in settings, or None when it is off"""
+    settings = get_settings()
+    if not settings.similarity_dir:
+        return None
+    return SimilarityIndex(settings.similarity_dir, settings.similarity_dim,
+                           settings.similarity_duplicate_threshold)
+
+def main(argv: List[str] = None) -> int:
+    """Index backfill output: python -m backend.similarity INDEX_DIR RESULTS.ndjson"""
+    parser = argparse.ArgumentParser(description="Add analysis results from an NDJSON file to a similarity index")
+    parser.add_argument("index", help="Index directory")
+    parser.add_argument("results", help="NDJSON results, e.g. from python -m backend.backfill")
+    parser.add_argument("--batch-size", type=int, default=1024, help="Pages embedded at a time")
+    parser.add_argument("--duplicates", action="store_true", help="Print pages that duplicate an indexed one")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    index = SimilarityIndex(args.index, settings.similarity_dim, settings.similarity_duplicate_threshold)
+    start = time.perf_counter()
+    added = duplicates = 0
+    with open(args.results, encoding='utf-8') as f:
+        pages = ((result['url'], page_text(result['content'].get('title'), result['content'].get('main_content')))
+                 for result in map(json.loads, f)
+                 if result.get('status') == 'success' and result.get('content'))
+        while True:
+            batch = list(itertools.islice(pages, args.batch_size))
+            if not batch:
+                break
+            for (url, _), duplicate in zip(batch, index.add_batch(batch, args.duplicates)):
+                if duplicate is not None:
+                    duplicates += 1
+                    print(f"{url}\t{duplicate.url}\t{duplicate.score}")
+            added += len(batch)
+    index.close()
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {added} pages ({duplicates} duplicates) in {elapsed:.1f}s; {len(index)} pages in the index",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
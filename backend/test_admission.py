@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from backend.admission import AdmissionController, CapacityPool, Overloaded
+
+def _controller(limit=2, queue_size=2, queue_timeout=0.2, key_limit=0):
+    return AdmissionController({
+        'interactive': CapacityPool('interactive', limit, queue_size, queue_timeout),
+        'batch': CapacityPool('batch', 1, 0, queue_timeout),
+    }, key_limit=key_limit)
+
+async def _hold(controller, pool, seconds, log, name, api_key=None):
+    try:
+        async with controller.admit(pool, api_key):
+            log.append(('start', name))
+            await asyncio.sleep(seconds)
+        return 'ok'
+    except Overloaded as e:
+        return e
+
+def test_requests_beyond_the_queue_are_rejected_fast():
+    controller = _controller()
+    log = []
+
+    async def burst():
+        return await asyncio.gather(*(_hold(controller, 'interactive', 0.1, log, i) for i in range(6)))
+
+    results = asyncio.run(burst())
+
+    # Two run, two wait for a slot, two are turned away without waiting
+    assert results[:4] == ['ok'] * 4
+    assert all(isinstance(result, Overloaded) and result.status_code == 503 for result in results[4:])
+    assert all(result.retry_after >= 1 for result in results[4:])
+    assert [name for _, name in log] == [0, 1, 2, 3]
+    assert controller.stats()['interactive'] == {'active': 0, 'queued': 0, 'limit': 2}
+
+def test_queued_requests_give_up_at_the_deadline():
+    controller = _controller(limit=1, queue_timeout=0.05)
+
+    async def burst():
+        return await asyncio.gather(_hold(controller, 'interactive', 0.3, [], 'slow'),
+                                    _hold(controller, 'interactive', 0, [], 'late'))
+
+    slow, late = asyncio.run(burst())
+
+    assert slow == 'ok'
+    assert isinstance(late, Overloaded) and 'within' in str(late)
+
+def test_batch_traffic_has_its_own_pool():
+    controller = _controller(limit=1)
+    log = []
+
+    async def burst():
+        return await asyncio.gather(_hold(controller, 'batch', 0.1, log, 'batch'),
+                                    _hold(controller, 'batch', 0.1, log, 'batch-2'),
+                                    _hold(controller, 'interactive', 0.1, log, 'interactive'))
+
+    batch, second_batch, interactive = asyncio.run(burst())
+
+    assert batch == interactive == 'ok'
+    assert isinstance(second_batch, Overloaded)
+
+def test_api_key_quota():
+    controller = _controller(limit=4, key_limit=1)
+
+    async def burst():
+        return await asyncio.gather(_hold(controller, 'interactive', 0.05, [], 'a1', 'tenant-a'),
+                                    _hold(controller, 'interactive', 0.05, [], 'a2', 'tenant-a'),
+                                    _hold(controller, 'interactive', 0.05, [], 'b1', 'tenant-b'))
+
+    first, second, other = asyncio.run(burst())
+
+    assert first == other == 'ok'
+    assert isinstance(second, Overloaded) and second.status_code == 429
+    assert controller._keys == {}
+
+def test_cancelled_waiter_frees_its_place():
+    controller = _controller(limit=1)
+    log = []
+
+    async def scenario():
+        holder = asyncio.ensure_future(_hold(controller, 'interactive', 0.1, log, 'holder'))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(_hold(controller, 'interactive', 0, log, 'cancelled'))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        result = await _hold(controller, 'interactive', 0, log, 'next')
+        await holder
+        return result
+
+    assert asyncio.run(scenario()) == 'ok'
+    assert [name for _, name in log] == ['holder', 'next']
+    assert controller.stats()['interactive']['active'] == 0
+
+@pytest.mark.parametrize('limit', [1, 3])
+def test_slots_are_handed_over_in_arrival_order(limit):
+    controller = _controller(limit=limit, queue_size=10, queue_timeout=1)
+    log = []
+
+    async def burst():
+        await asyncio.gather(*(_hold(controller, 'interactive', 0.01, log, i) for i in range(8)))
+
+    asyncio.run(burst())
+
+    assert [name for _, name in log] == list(range(8))
+
+def test_requests_without_an_api_key_share_the_anonymous_quota():
+    from starlette.requests import Request
+    import frontend.app as api
+
+    def request(*headers):
+        return Request({'type': 'http', 'headers': [(name.encode(), value.encode()) for name, value in headers]})
+
+    assert api._api_key(request()) == api._api_key(request()) == api.ANONYMOUS_API_KEY
+    assert api._api_key(request(('x-api-key', 'tenant-a'))) == 'tenant-a'
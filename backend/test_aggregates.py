@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from backend.aggregates import ResultAggregator, batch_overview, group_percentiles, host_of
+from backend.export_jobs import ArtifactStore, ExportJobManager, ResultStore
+from backend.result_model import Analysis, AnalysisResult, PageContent, PageMetadata
+
+np = pytest.importorskip('numpy')
+
+def _record(url, sentiment, fetch, words, topics=()):
+    return AnalysisResult(
+        url=url,
+        content=PageContent(title='Page', main_content=' '.join(['word'] * words)),
+        analysis=Analysis(sentiment=sentiment, topics=topics),
+        metadata=PageMetadata(timings={'fetch': fetch, 'total': fetch * 2}),
+    )
+
+RESULTS = [
+    _record('https://news.example.com/a', 'positive', 100.0, 10, ('Markets', 'Energy')),
+    _record('https://NEWS.example.com:443/b', 'Positive', 300.0, 30, ('markets', 'Markets ')),
+    AnalysisResult.failure('https://news.example.com/c', 'Request timed out'),
+    # Posted results arrive as plain dicts
+    {'status': 'success', 'url': 'https://blog.example.org/post', 'content': {'main_content': 'one two three'},
+     'analysis': {'sentiment': 'negative', 'topics': ['Energy']}, 'metadata': {'timings': {'fetch': 50.0}}},
+    {'status': 'error', 'url': 'https://down.example.net/', 'error': 'Connection refused'},
+]
+
+def test_host_of():
+    assert host_of('https://user:pw@Example.COM:8443/path?q=1') == 'example.com'
+    assert host_of('http://example.com?x=/y') == 'example.com'
+    assert host_of('http://[::1]:8000/') == '[::1]'
+    assert host_of(None) == ''
+
+def test_rollups_by_sentiment_topic_and_host():
+    aggregates = ResultAggregator().aggregate(RESULTS)
+
+    assert (aggregates['results'], aggregates['succeeded'], aggregates['failed']) == (5, 3, 2)
+    assert aggregates['error_rate'] == 0.4
+    assert aggregates['sentiment'] == {'positive': 2, 'negative': 1}
+    assert aggregates['top_topics'] == [{'topic': 'markets', 'results': 2}, {'topic': 'energy', 'results': 2}]
+    assert aggregates['word_count'] == {'p50': 10.0, 'p90': 26.0, 'p99': 29.6}
+
+    news, blog, down = aggregates['hosts']
+    assert news['host'] == 'news.example.com'
+    assert (news['results'], news['errors'], news['error_rate']) == (3, 1, 0.3333)
+    assert news['fetch_ms']['p50'] == 200.0 and news['total_ms']['p90'] == 560.0
+    assert blog['total_ms'] == {'p50': None, 'p90': None, 'p99': None}
+    assert (down['host'], down['error_rate'], down['word_count_p50']) == ('down.example.net', 1.0, None)
+
+def test_group_percentiles_match_numpy():
+    rng = np.random.default_rng(5)
+    groups = rng.integers(0, 6, 2000)
+    values = rng.exponential(100, 2000)
+    values[rng.random(2000) < 0.1] = np.nan
+    groups[groups == 4] = 3
+
+    result = group_percentiles(groups, values, 7, (0.0, 0.5, 0.9, 1.0))
+
+    for group in (0, 1, 2, 3, 5):
+        present = values[(groups == group) & ~np.isnan(values)]
+        assert np.allclose(result[group], np.quantile(present, (0.0, 0.5, 0.9, 1.0)))
+    assert np.isnan(result[4]).all() and np.isnan(result[6]).all()
+
+def test_pdf_exports_of_batches_start_with_an_overview(tmp_path, monkeypatch):
+    pytest.importorskip('reportlab')
+    from backend import export_jobs
+
+    overviews = []
+    render = export_jobs.pdf_renderer.render
+    monkeypatch.setattr(export_jobs.pdf_renderer, 'render', lambda data, f, overview=None, **kwargs: (
+        overviews.append(overview), render(data, f, overview, **kwargs)
+    ))
+    store = ResultStore()
+    manager = ExportJobManager(store, ArtifactStore(str(tmp_path)))
+    result_ids = [store.add(result) for result in RESULTS]
+
+    async def run():
+        job = await manager.submit(result_ids, 'pdf')
+        while job.status in ('pending', 'running'):
+            await asyncio.sleep(0.01)
+        return job
+
+    job = asyncio.run(run())
+
+    assert job.status == 'completed', job.error
+    assert manager.artifact_path(job).read_bytes().startswith(b'%PDF')
+    assert overviews[0]['results'] == 5 and overviews[0]['hosts'][0]['host'] == 'news.example.com'
+    assert batch_overview(RESULTS[:1]) is None
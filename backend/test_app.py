@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+import pytest
+from backend.app import WebContentAnalyzer
+from backend.metrics import COALESCED
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = WebContentAnalyzer()
+    calls = []
+    lock = threading.Lock()
+
+    def slow_scrape(url, profile, timings=None, deadline=None):
+        with lock:
+            calls.append(url)
+        time.sleep(0.2)
+        return {'status': 'success', 'url': url, 'content': {'title': 'Viral', 'main_content': 'text'}, 'metadata': {}}
+
+    monkeypatch.setattr(analyzer.scraping_service, 'analyze_url', slow_scrape)
+    analyzer.calls = calls
+    return analyzer
+
+def test_concurrent_identical_requests_share_one_analysis(analyzer):
+    before = COALESCED.value()
+    urls = ['https://Example.com/post?utm_source=x', 'https://example.com/post'] * 10
+
+    async def burst():
+        return await asyncio.gather(*(analyzer.analyze_url(url) for url in urls))
+
+    results = asyncio.run(burst())
+
+    assert len(analyzer.calls) == 1
+    assert COALESCED.value() - before == 19
+    assert [result['url'] for result in results] == urls
+    assert all(result['content']['title'] == 'Viral' for result in results)
+    assert analyzer._inflight == {}
+
+def test_different_prompts_are_not_coalesced(analyzer):
+    async def burst():
+        await asyncio.gather(analyzer.analyze_url('https://example.com/'),
+                             analyzer.analyze_url('https://example.com/', 'Summarize for kids'))
+
+    asyncio.run(burst())
+
+    assert len(analyzer.calls) == 2
+
+def test_cancelled_caller_does_not_cancel_shared_work(analyzer):
+    async def burst():
+        first = asyncio.ensure_future(analyzer.analyze_url('https://example.com/'))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(analyzer.analyze_url('https://example.com/'))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        return await second, first.cancelled()
+
+    result, first_cancelled = asyncio.run(burst())
+
+    assert first_cancelled
+    assert result['status'] == 'success'
+    assert len(analyzer.calls) == 1
+
+def test_batches_run_on_their_own_threads(monkeypatch):
+    analyzer = WebContentAnalyzer()
+    threads = []
+
+    def scrape(url, profile, timings=None, deadline=None):
+        threads.append(threading.current_thread().name)
+        return {'status': 'success', 'url': url, 'content': {'title': 'T', 'main_content': 'text'}, 'metadata': {}}
+
+    monkeypatch.setattr(analyzer.scraping_service, 'analyze_url', scrape)
+
+    async def run():
+        await analyzer.batch_analysis([f'https://example.com/{i}' for i in range(8)], concurrency=4)
+        await analyzer.analyze_url('https://example.com/interactive')
+
+    asyncio.run(run())
+
+    assert all(name.startswith('batch-analysis') for name in threads[:8])
+    assert not threads[8].startswith('batch-analysis')
@@ -0,0 +1,108 @@
+import io
+import json
+from http.server import BaseHTTPRequestHandler
+import pytest
+from backend.app import WebContentAnalyzer
+from backend.archive import ArchiveReader, WarcWriter
+from backend.backfill import backfill
+from backend.scraping_service import ScrapingService
+from backend.transport import HttpTransport
+from backend.web_scraper import ReplayScraper, WebScraper
+
+def _page(title: str) -> bytes:
+    return (f'<html><head><title>{title}</title></head><body><article>'
+            f'<p>{title} has a paragraph long enough to be kept as main content.</p>'
+            '</article></body></html>').encode()
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = _page(self.path.strip('/') or 'home')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def origin(serve):
+    return serve(_Handler)
+
+def _archive(directory, count, max_bytes=1 << 30):
+    writer = WarcWriter(str(directory), max_bytes=max_bytes)
+    for i in range(count):
+        writer.write(f'https://example.com/page/{i}', 200, {'Content-Type': 'text/html'}, _page(f'page-{i}'))
+    writer.close()
+
+def test_records_round_trip_through_the_index(tmp_path):
+    writer = WarcWriter(str(tmp_path))
+    writer.write('https://example.com/a', 200, {'Content-Type': 'text/html', 'Content-Encoding': 'gzip'}, b'first')
+    writer.write('https://example.com/a', 200, {'Content-Type': 'text/html'}, b'second')
+    writer.write('https://example.com/final', 404, {'Content-Type': 'text/plain'}, b'gone',
+                 requested_url='https://example.com/moved')
+    writer.close()
+
+    reader = ArchiveReader(str(tmp_path))
+    assert len(list(reader.entries())) == 3
+    assert len(reader.latest_entries()) == 2
+
+    latest = reader.read(reader.lookup('https://EXAMPLE.com/a'))
+    assert latest.body == b'second'
+    assert latest.headers['content-type'] == 'text/html'
+    assert 'Content-Encoding' not in latest.headers
+
+    moved = reader.read(reader.lookup('https://example.com/moved'))
+    assert (moved.url, moved.status_code, moved.body) == ('https://example.com/final', 404, b'gone')
+    assert reader.lookup('https://example.com/missing') is None
+    reader.close()
+
+def test_files_rotate_at_the_size_limit(tmp_path):
+    _archive(tmp_path, 20, max_bytes=1000)
+
+    reader = ArchiveReader(str(tmp_path))
+    assert len(list(tmp_path.glob('*.warc.gz'))) > 1
+    assert [reader.read(entry).body for entry in reader.latest_entries()] == [_page(f'page-{i}') for i in range(20)]
+
+def test_fetched_pages_replay_without_the_network(origin, tmp_path, monkeypatch):
+    writer = WarcWriter(str(tmp_path))
+    scraper = WebScraper(transport=HttpTransport(pool_size=1), archive=writer)
+    assert scraper.fetch_page(f'{origin}/archived')['status'] == 'success'
+    writer.close()
+
+    # Neither the security check nor the origin is consulted on replay
+    monkeypatch.setattr('backend.scraping_service.check_url_security', lambda url: False)
+    replay = ScrapingService(ReplayScraper(ArchiveReader(str(tmp_path))))
+    result = replay.analyze_url(f'{origin}/archived')
+
+    assert result['status'] == 'success'
+    assert result['content']['title'] == 'archived'
+    assert replay.analyze_url(f'{origin}/other')['error'] == f'Not in archive: {origin}/other'
+
+def test_backfill_reprocesses_every_capture_in_order(tmp_path):
+    _archive(tmp_path, 10, max_bytes=2000)
+    expected = [f'https://example.com/page/{i}' for i in range(10)]
+
+    inline = io.StringIO()
+    assert backfill(str(tmp_path), inline, workers=1, chunk_size=3) == (10, 0)
+    results = [json.loads(line) for line in inline.getvalue().splitlines()]
+    assert [result['url'] for result in results] == expected
+    assert results[0]['analysis']['title']
+
+    pooled = io.StringIO()
+    assert backfill(str(tmp_path), pooled, workers=2, chunk_size=3, columns=['url', 'title']) == (10, 0)
+    assert [json.loads(line) for line in pooled.getvalue().splitlines()] == [
+        {'url': url, 'title': f'page-{i}'} for i, url in enumerate(expected)
+    ]
+
+def test_replaying_uses_the_analyzer_pipeline(tmp_path):
+    _archive(tmp_path, 1)
+    analyzer = WebContentAnalyzer(ScrapingService(ReplayScraper(ArchiveReader(str(tmp_path)))))
+
+    result = analyzer.analyze_url_sync('https://example.com/page/0')
+
+    assert result.status == 'success'
+    assert result['content']['title'] == 'page-0'
@@ -0,0 +1,53 @@
+import codecs
+import time
+from backend.charset import DETECTION_SAMPLE, decode, resolve_encoding
+
+FRENCH = '<p>Le café était déjà fermé à côté de l’église.</p>'
+
+def test_header_charset_wins_over_meta():
+    body = '<meta charset="utf-8">Grüße'.encode('iso-8859-15')
+
+    assert resolve_encoding(body, 'text/html; charset=ISO-8859-15') == ('iso8859-15', 'header')
+    assert decode(body, 'text/html; charset=ISO-8859-15')[0].endswith('Grüße')
+
+def test_byte_order_mark():
+    body = codecs.BOM_UTF8 + 'naïve'.encode('utf-8')
+
+    assert resolve_encoding(body, 'text/html; charset=iso-8859-1') == ('utf-8-sig', 'bom')
+    assert decode(body)[0] == 'naïve'
+    assert decode('naïve'.encode('utf-16'))[0] == 'naïve'
+
+def test_declared_charset_is_sniffed():
+    html = '<html><head><meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS"></head>'
+    body = (html + '<body>日本語のページ</body></html>').encode('shift_jis')
+
+    assert resolve_encoding(body, 'text/html') == ('shift_jis', 'meta')
+    assert '日本語のページ' in decode(body, 'text/html')[0]
+    assert resolve_encoding(b'<?xml version="1.0" encoding="windows-1251"?><r/>') == ('cp1251', 'meta')
+
+def test_latin1_labels_decode_as_windows_1252():
+    body = '<meta charset="iso-8859-1">“quoted”'.encode('cp1252')
+
+    assert decode(body)[0].endswith('“quoted”')
+
+def test_detection_prefers_utf8_then_samples():
+    assert resolve_encoding(FRENCH.encode('utf-8')) == ('utf-8', 'detected')
+
+    encoding, source = resolve_encoding((FRENCH * 50).encode('cp1252'))
+    assert source == 'detected'
+    assert (FRENCH * 50).encode('cp1252').decode(encoding) == FRENCH * 50
+
+    russian = '<p>Привет, это тестовая страница на русском языке.</p>' * 20
+    assert resolve_encoding(russian.encode('cp1251')) == ('cp1251', 'detected')
+
+def test_detection_time_does_not_grow_with_the_page():
+    sample = (FRENCH * 2000).encode('cp1252')[:DETECTION_SAMPLE]
+
+    start = time.perf_counter()
+    resolve_encoding(sample)
+    small = time.perf_counter() - start
+    start = time.perf_counter()
+    resolve_encoding(sample * 100)
+    large = time.perf_counter() - start
+
+    assert large < small * 5 + 0.05
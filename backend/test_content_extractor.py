@@ -0,0 +1,70 @@
+import pytest
+from bs4 import BeautifulSoup
+from backend.content_extractor import ContentExtractor
+
+SAMPLE_PAGE = """
+<html lang="en">
+<head>
+  <title>Sample Article</title>
+  <meta property="og:title" content="OG Sample">
+  <meta name="author" content="Jane Doe">
+  <link rel="canonical" href="/articles/sample">
+  <script type="application/ld+json">{"@type": "Article", "datePublished": "2025-08-27"}</script>
+</head>
+<body>
+  <nav><a href="/">Home</a></nav>
+  <article class="post">
+    <h1>Main heading</h1>
+    <p>First <b>paragraph</b> text.</p>
+    Loose text in the article
+    <h2>Details</h2>
+    <ul><li>One</li><li>Two</li></ul>
+    <table><tr><th>Name</th><th>Value</th></tr><tr><td>a</td><td>1</td></tr></table>
+    <div itemscope itemtype="https://schema.org/Person"><span itemprop="name">Jane</span></div>
+  </article>
+  <footer>Footer</footer>
+</body>
+</html>
+"""
+
+@pytest.fixture
+def extractor():
+    return ContentExtractor()
+
+def test_extract_document_blocks(extractor):
+    document = extractor.extract_document(BeautifulSoup(SAMPLE_PAGE, 'html.parser'), 'https://example.com/a')
+
+    assert document['lang'] == 'en'
+    assert document['canonical_url'] == 'https://example.com/articles/sample'
+    assert document['outline'] == [{'level': 1, 'text': 'Main heading'}, {'level': 2, 'text': 'Details'}]
+    assert document['blocks'][1] == {'type': 'paragraph', 'text': 'First paragraph text.'}
+    assert document['blocks'][2] == {'type': 'paragraph', 'text': 'Loose text in the article'}
+    assert {'type': 'list', 'ordered': False, 'items': ['One', 'Two']} in document['blocks']
+    assert {'type': 'table', 'rows': [['Name', 'Value'], ['a', '1']]} in document['blocks']
+    # Navigation and footer are not part of the document model
+    assert all('Home' not in str(block) and 'Footer' not in str(block) for block in document['blocks'])
+
+def test_extract_document_metadata(extractor):
+    metadata = extractor.extract_document(BeautifulSoup(SAMPLE_PAGE, 'html.parser'))['metadata']
+
+    assert metadata['author'] == 'Jane Doe'
+    assert metadata['date'] == '2025-08-27'
+    assert metadata['opengraph'] == {'title': 'OG Sample'}
+    assert metadata['microdata'] == [{'type': 'https://schema.org/Person', 'properties': {'name': 'Jane'}}]
+
+def test_structured_mode_is_opt_in(extractor):
+    plain = extractor.extract_content(BeautifulSoup(SAMPLE_PAGE, 'html.parser'))
+    structured = extractor.extract_content(BeautifulSoup(SAMPLE_PAGE, 'html.parser'), structured=True)
+
+    assert 'document' not in plain
+    assert structured['metadata'] == {'author': 'Jane Doe', 'date': '2025-08-27'}
+    assert structured['document']['outline'][0]['text'] == 'Main heading'
+
+def test_pipeline_keeps_every_link_by_default():
+    from backend.scraping_service import ScrapingService
+    html = '<body>' + ''.join(f'<a href="/p/{i}">Page {i}</a>' for i in range(1500)) + '</body>'
+
+    content = ScrapingService().extractor.extract_content(BeautifulSoup(html, 'html.parser'),
+                                                          base_url='https://example.com/')
+
+    assert len(content['links']) == 1500
@@ -0,0 +1,127 @@
+import functools
+import io
+from http.server import SimpleHTTPRequestHandler
+import pytest
+from backend.content_types import MAX_FEED_ITEMS, classify, extract_feed, extract_pdf, extract_text, is_feed, read_feed
+from backend.response_profiles import FULL_PROFILE
+from backend.scraping_service import ScrapingService
+from backend.web_scraper import WebScraper
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel>
+  <title>Example News</title><link>https://example.com/</link><description>Daily updates</description>
+  <item><title>First story</title><link>https://example.com/1?utm_source=rss</link><description>Something happened.</description></item>
+  <item><title>Second story</title><link>/2</link><description>Something else happened.</description></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Example Blog</title><subtitle>Notes</subtitle>
+  <entry><title>Hello</title><link rel="edit" href="https://example.com/edit/1"/>
+    <link href="https://example.com/posts/1"/><summary>First post.</summary></entry>
+</feed>"""
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map, '.xml': 'application/xml', '.txt': 'text/plain'}
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site(tmp_path, serve):
+    (tmp_path / 'notes.txt').write_text('Release notes\n\nVersion 2 is out.')
+    (tmp_path / 'feed.xml').write_bytes(RSS)
+    (tmp_path / 'config.xml').write_bytes(b'<config><debug>true</debug></config>')
+    (tmp_path / 'logo.png').write_bytes(b'\x89PNG' + b'\0' * 1024)
+    return serve(functools.partial(_QuietHandler, directory=str(tmp_path)))
+
+def test_classify():
+    assert classify('text/html; charset=utf-8') == 'html'
+    assert classify('') == 'html'
+    assert classify('text/plain') == 'text'
+    assert classify('application/pdf') == 'pdf'
+    assert classify('application/rss+xml') == 'feed'
+    assert classify('text/xml') == 'xml'
+    assert classify('image/png') is None
+    assert is_feed(ATOM) and not is_feed(b'<config/>')
+
+def test_extract_text():
+    content = extract_text('\n  Release notes\n\nVersion   2 is out.\n')
+
+    assert content == {"title": "Release notes", "main_content": "Release notes Version 2 is out.",
+                       "meta_description": "", "links": []}
+
+def test_extract_rss_feed():
+    content = extract_feed(RSS, base_url='https://example.com/feed.xml')
+
+    assert content["title"] == "Example News"
+    assert content["meta_description"] == "Daily updates"
+    assert content["main_content"] == "First story. Something happened. Second story. Something else happened."
+    assert [link["href"] for link in content["links"]] == ['https://example.com/1', 'https://example.com/2']
+
+def test_extract_atom_feed_prefers_alternate_links():
+    content = extract_feed(ATOM, include_links=True, compact_links=True)
+
+    assert content["title"] == "Example Blog"
+    assert content["links"]["path"] == ['/posts/1']
+
+def test_feeds_are_parsed_from_chunks_as_they_arrive():
+    read = []
+
+    def chunks():
+        yield b'<rss version="2.0"><channel><title>Long</title>'
+        for i in range(MAX_FEED_ITEMS * 10):
+            read.append(i)
+            yield f'<item><title>Story {i}</title></item>'.encode()
+        yield b'</channel></rss>'
+
+    records = read_feed(chunks())
+
+    assert len(records) == MAX_FEED_ITEMS + 1
+    assert len(read) < MAX_FEED_ITEMS * 2
+    assert read_feed(iter([b'<config>', b'<debug>true</debug></config>']), sniff=True) is None
+    assert read_feed([RSS[:20], RSS[20:]], sniff=True) == read_feed([RSS])
+
+def test_extract_pdf():
+    pytest.importorskip('pypdf')
+    canvas = pytest.importorskip('reportlab.pdfgen.canvas')
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.setTitle('Quarterly report')
+    pdf.drawString(72, 720, 'Revenue grew in every region.')
+    pdf.showPage()
+    pdf.drawString(72, 720, 'Costs were flat.')
+    pdf.save()
+
+    content = extract_pdf(buffer.getvalue())
+
+    assert content["title"] == 'Quarterly report'
+    assert content["main_content"] == 'Revenue grew in every region. Costs were flat.'
+
+def test_service_dispatches_by_content_type(site):
+    service = ScrapingService()
+
+    text = service.analyze_url(f"{site}/notes.txt", FULL_PROFILE)
+    assert text["metadata"]["content_kind"] == 'text'
+    assert text["content"]["title"] == 'Release notes'
+
+    feed = service.analyze_url(f"{site}/feed.xml", FULL_PROFILE)
+    assert feed["metadata"]["content_kind"] == 'feed'
+    assert len(feed["content"]["links"]) == 2
+
+def test_unsupported_types_are_rejected(site):
+    service = ScrapingService()
+
+    image = service.analyze_url(f"{site}/logo.png", FULL_PROFILE)
+    assert image == {"status": "error", "error": "Unsupported content type: image/png"}
+
+    xml = service.analyze_url(f"{site}/config.xml", FULL_PROFILE)
+    assert xml["error"] == "Unsupported content type: application/xml"
+
+def test_bodies_over_the_limit_are_rejected(site):
+    scraper = WebScraper(max_body_bytes=512)
+
+    assert scraper.fetch_page(f"{site}/feed.xml")["status"] == 'success'
+    assert scraper.fetch_page(f"{site}/notes.txt")["status"] == 'success'
+    too_large = WebScraper(max_body_bytes=100).fetch_page(f"{site}/feed.xml")
+    assert too_large == {"status": "error", "error": "Response body is larger than 100 bytes"}
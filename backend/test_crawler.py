@@ -0,0 +1,125 @@
+import asyncio
+import functools
+from http.server import SimpleHTTPRequestHandler
+import pytest
+from backend.admission import AdmissionController, CapacityPool
+from backend.app import WebContentAnalyzer
+from backend.crawler import BloomFilter, CheckpointStore, CrawlJob, CrawlManager, CrawlState, Crawler
+from backend.export_jobs import ResultStore
+from backend.robots import RobotsCache
+
+SITE = {
+    'index.html': '<a href="/a.html">A</a> <a href="/b.html">B</a> <a href="https://other.org/">Out</a>',
+    'a.html': '<p>Page A</p><a href="/c.html">C</a> <a href="/index.html">Home</a>',
+    'b.html': '<p>Page B</p><a href="/private/d.html">D</a> <a href="/logo.png">Logo</a>',
+    'c.html': '<p>Page C</p><a href="/e.html">E</a>',
+    'e.html': '<p>Page E</p>',
+    'private/d.html': '<p>Secret</p>',
+    'robots.txt': 'User-agent: *\nDisallow: /private/\n',
+}
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site(tmp_path, serve):
+    root = tmp_path / 'site'
+    for name, body in SITE.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(body)
+    return serve(functools.partial(_QuietHandler, directory=str(root)))
+
+@pytest.fixture
+def crawler(tmp_path):
+    return Crawler(WebContentAnalyzer(), ResultStore(), CheckpointStore(str(tmp_path / 'crawls')),
+                   checkpoint_every=1, seen_capacity=1000, robots=RobotsCache())
+
+async def _crawl(crawler, job):
+    await crawler.run(job, await crawler.new_state(job))
+
+def _crawled_urls(crawler, job):
+    return sorted(crawler.result_store.get(result_id)['url'].rsplit('/', 1)[1] for result_id in job.result_ids)
+
+def test_bloom_filter_tracks_seen_items():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+
+    assert bloom.add('https://example.com/')
+    assert not bloom.add('https://example.com/')
+    assert 'https://example.com/' in bloom
+    assert sum(f'https://example.com/{i}' in bloom for i in range(1000)) < 30
+
+def test_crawl_follows_internal_links_within_depth(site, crawler):
+    job = CrawlJob(crawl_id='depth', seed=f"{site}/index.html", max_depth=2, use_sitemaps=False)
+
+    asyncio.run(_crawl(crawler, job))
+
+    assert job.status == 'completed'
+    # e.html is three hops away; private/ is disallowed; other sites and assets are skipped
+    assert _crawled_urls(crawler, job) == ['a.html', 'b.html', 'c.html', 'index.html']
+    assert job.blocked_by_robots == 1
+
+def test_crawl_resumes_from_checkpoint(site, crawler):
+    job = CrawlJob(crawl_id='resume', seed=f"{site}/index.html", max_depth=3, use_sitemaps=False)
+    state = asyncio.run(crawler.new_state(job))
+    crawler.checkpoints.save(job, state)
+
+    resumed_job, resumed_state = crawler.checkpoints.load('resume')
+    asyncio.run(crawler.run(resumed_job, resumed_state))
+
+    assert _crawled_urls(crawler, resumed_job) == ['a.html', 'b.html', 'c.html', 'e.html', 'index.html']
+    assert crawler.checkpoints.load('resume')[0].status == 'completed'
+
+def test_page_budget_is_respected(site, crawler):
+    job = CrawlJob(crawl_id='budget', seed=f"{site}/index.html", max_depth=5, max_pages=2, use_sitemaps=False)
+
+    asyncio.run(_crawl(crawler, job))
+
+    assert len(job.result_ids) == 2
+
+def test_late_checkpoint_writes_never_replace_newer_ones(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    job = CrawlJob(crawl_id='order', seed='https://example.com/')
+    state = CrawlState()
+    older = store.snapshot(job, state)
+    job.pages_crawled = 5
+    state.seen.add('https://example.com/')
+
+    asyncio.run(store.save_async(job, state))
+    store.write(older)
+
+    loaded_job, loaded_state = store.load('order')
+    assert loaded_job.pages_crawled == 5 and 'https://example.com/' in loaded_state.seen
+    assert list(tmp_path.glob('*.part')) == []
+
+def test_crawl_pages_go_through_admission_control(site, crawler, monkeypatch):
+    crawler.admission = AdmissionController({'crawl': CapacityPool('crawl', 1, 10, 5)})
+    analyze_url = crawler.analyzer.analyze_url
+    running = []
+
+    async def tracked(*args, **kwargs):
+        running.append(crawler.admission.pools['crawl'].active)
+        return await analyze_url(*args, **kwargs)
+
+    monkeypatch.setattr(crawler.analyzer, 'analyze_url', tracked)
+    job = CrawlJob(crawl_id='admitted', seed=f"{site}/index.html", max_depth=3, use_sitemaps=False)
+
+    asyncio.run(_crawl(crawler, job))
+
+    assert job.pages_crawled == 5
+    assert set(running) == {1}
+
+def test_resume_drops_results_the_store_no_longer_holds(site, crawler):
+    job = CrawlJob(crawl_id='restart', seed=f"{site}/index.html", max_depth=1, use_sitemaps=False)
+    asyncio.run(_crawl(crawler, job))
+    crawler.result_store = ResultStore()
+    manager = CrawlManager(crawler)
+
+    async def resume():
+        return manager.resume('restart')
+
+    resumed = asyncio.run(resume())
+
+    assert resumed.status == 'completed' and resumed.pages_crawled == 3
+    assert resumed.result_ids == []
@@ -0,0 +1,132 @@
+import asyncio
+import math
+import threading
+import time
+import pytest
+from backend.app import WebContentAnalyzer
+from backend.deadline import Deadline, DeadlineExceeded
+from backend.scraping_service import ScrapingService
+
+ARTICLE = "<html><body><article><p>" + "Plenty of text. " * 20 + "</p></article></body></html>"
+
+@pytest.mark.parametrize('header,seconds', [
+    (None, 30), ('5', 5), ('2.5', 2.5), ('600', 120), ('0', 30), ('-1', 30), ('soon', 30),
+])
+def test_header_budget_is_validated_and_capped(header, seconds):
+    deadline = Deadline.from_header(header, default=30, maximum=120)
+
+    assert seconds - 0.1 < deadline.remaining() <= seconds
+
+def test_default_budget_may_be_unbounded():
+    assert Deadline.from_header(None, default=math.inf, maximum=3600).wait_timeout() is None
+    assert 3599 < Deadline.from_header('7200', default=math.inf, maximum=3600).remaining() <= 3600
+
+def test_clip_check_and_cancel():
+    deadline = Deadline(10)
+
+    assert deadline.clip(3) == 3
+    assert deadline.clip(60) <= 10
+    assert Deadline.unbounded().wait_timeout() is None
+    deadline.check('fetch')
+
+    deadline.cancel()
+    assert deadline.clip(3) == 0
+    with pytest.raises(DeadlineExceeded, match='fetch'):
+        deadline.check('fetch')
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr('backend.scraping_service.check_url_security', lambda url: True)
+    service = ScrapingService()
+    service.render_pool = None
+    service.fetches = []
+
+    def fetch_page(url, include_headers=True, deadline=None):
+        service.fetches.append(deadline.remaining())
+        time.sleep(0.05)
+        return {'status': 'success', 'url': url, 'content': ARTICLE, 'status_code': 200, 'headers': {}}
+
+    monkeypatch.setattr(service.scraper, 'fetch_page', fetch_page)
+    return service
+
+def test_fetch_gets_the_remaining_budget(service):
+    result = service.analyze_url('https://example.com/', deadline=Deadline(5))
+
+    assert result['status'] == 'success'
+    assert 4 < service.fetches[0] <= 5
+
+def test_expired_deadline_names_the_stage(service):
+    result = service.analyze_url('https://example.com/', deadline=Deadline(0))
+    assert result['deadline_exceeded'] == 'fetch'
+    assert service.fetches == []
+
+    result = service.analyze_url('https://example.com/', deadline=Deadline(0.02))
+    assert result['status'] == 'error'
+    assert result['deadline_exceeded'] == 'parse'
+
+def test_analysis_is_skipped_when_time_runs_out(monkeypatch):
+    analyzer = WebContentAnalyzer()
+
+    def scrape(url, profile, timings=None, deadline=None):
+        time.sleep(0.1)
+        return {'status': 'success', 'url': url, 'content': {'title': 'Late', 'main_content': 'text'}, 'metadata': {}}
+
+    monkeypatch.setattr(analyzer.scraping_service, 'analyze_url', scrape)
+
+    result = asyncio.run(analyzer.analyze_url('https://example.com/', deadline=Deadline(0.05)))
+
+    assert result['status'] == 'success'
+    assert result['partial'] is True
+    assert result['metadata']['deadline_exceeded'] == 'analysis'
+    assert 'analysis' not in result
+
+def test_analysis_stage_gets_the_deadline(monkeypatch):
+    analyzer = WebContentAnalyzer()
+    deadlines = []
+
+    def analyze_content(content, deadline=None):
+        deadlines.append(deadline)
+        # Time ran out between the pipeline's check and the analysis starting
+        raise DeadlineExceeded('analysis')
+
+    monkeypatch.setattr(analyzer.scraping_service, 'analyze_url', lambda url, profile, timings=None, deadline=None: {
+        'status': 'success', 'url': url, 'content': {'title': 'T', 'main_content': 'text'}, 'metadata': {}
+    })
+    monkeypatch.setattr(analyzer.ai_service, 'analyze_content', analyze_content)
+    deadline = Deadline(5)
+
+    result = analyzer.analyze_url_sync('https://example.com/', deadline=deadline)
+
+    assert deadlines == [deadline]
+    assert result['partial'] is True and result['metadata']['deadline_exceeded'] == 'analysis'
+
+def test_shared_work_is_cancelled_only_when_every_caller_leaves(monkeypatch):
+    analyzer = WebContentAnalyzer()
+    release = threading.Event()
+    seen = []
+
+    def scrape(url, profile, timings=None, deadline=None):
+        release.wait(2)
+        seen.append(deadline.cancelled)
+        return {'status': 'success', 'url': url, 'content': {'title': 'T', 'main_content': ''}, 'metadata': {}}
+
+    monkeypatch.setattr(analyzer.scraping_service, 'analyze_url', scrape)
+
+    async def scenario():
+        first = asyncio.ensure_future(analyzer.analyze_url('https://example.com/', deadline=Deadline(5)))
+        await asyncio.sleep(0.01)
+        impatient = await analyzer.analyze_url('https://example.com/', deadline=Deadline(0.05))
+        flight = next(iter(analyzer._inflight.values()))
+        still_running = not flight.deadline.cancelled
+        first.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.shield(flight.future)
+        return impatient, still_running, flight
+
+    impatient, still_running, flight = asyncio.run(scenario())
+
+    assert impatient['deadline_exceeded'] == 'total'
+    assert still_running
+    assert flight.deadline.cancelled
+    assert seen == [True]
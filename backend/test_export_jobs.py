@@ -0,0 +1,77 @@
+import asyncio
+import io
+import os
+import time
+import pytest
+from backend.export_jobs import ArtifactStore, ExportJobManager, ResultStore
+
+@pytest.fixture
+def sample_result():
+    return {
+        'url': 'https://example.com',
+        'status': 'success',
+        'content': {'title': 'Test Page', 'main_content': 'Test content'},
+        'analysis': {'summary': 'Test summary', 'key_points': ['Point 1']}
+    }
+
+async def _wait(manager, job):
+    while job.status in ('pending', 'running'):
+        await asyncio.sleep(0.01)
+    return job
+
+def test_result_store_evicts_oldest(sample_result):
+    store = ResultStore(max_size=2)
+    first = store.add(sample_result)
+    store.add(sample_result)
+    store.add(sample_result)
+
+    assert store.get(first) is None
+    with pytest.raises(KeyError):
+        store.get_many([first])
+
+def test_identical_exports_reuse_artifact(sample_result, tmp_path):
+    store = ResultStore()
+    manager = ExportJobManager(store, ArtifactStore(str(tmp_path)))
+    result_id = store.add(sample_result)
+
+    async def run():
+        first = await _wait(manager, await manager.submit([result_id], 'csv'))
+        second = await _wait(manager, await manager.submit([result_id], 'csv'))
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.status == second.status == 'completed'
+    assert not first.cached and second.cached
+    assert manager.artifact_path(first) == manager.artifact_path(second)
+    assert manager.artifact_path(first).read_text().startswith('url,status')
+
+def test_artifact_store_evicts_expired_and_least_recently_used(tmp_path):
+    for key in ('old', 'a', 'b'):
+        ArtifactStore(str(tmp_path)).write(key, 'csv', lambda f: f.write(b'x' * 100))
+    store = ArtifactStore(str(tmp_path), max_bytes=250, max_age=3600)
+    day_ago = time.time() - 86400
+    os.utime(store.path('old', 'csv'), (day_ago, day_ago))
+    hour_ago = time.time() - 60
+    os.utime(store.path('a', 'csv'), (hour_ago, hour_ago))
+    os.utime(store.path('b', 'csv'), (hour_ago - 1, hour_ago - 1))
+
+    assert not store.lookup('old', 'csv')
+    # Serving `b` from the store makes `a` the least recently used
+    assert store.lookup('b', 'csv')
+    store.write('c', 'csv', lambda f: f.write(b'x' * 100))
+
+    assert sorted(path.stem for path in tmp_path.iterdir()) == ['b', 'c']
+
+def test_cached_pdf_reports_do_not_carry_a_render_time(sample_result, tmp_path):
+    pytest.importorskip('reportlab')
+    from backend.pdf_renderer import pdf_renderer
+    manager = ExportJobManager(ResultStore(), ArtifactStore(str(tmp_path)))
+    rendered = []
+    for _ in range(2):
+        buffer = io.BytesIO()
+        manager._render('pdf', [sample_result], None, buffer)
+        rendered.append(buffer.getvalue())
+
+    assert rendered[0] == rendered[1]
+    assert pdf_renderer.render_bytes(sample_result) != rendered[0]
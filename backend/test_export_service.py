@@ -69,3 +69,50 @@ def test_error_handling(export_service, sample_data):
     
     with pytest.raises(Exception):
         export_service.export_pdf(sample_data, "/invalid/path/file.pdf")
+
+def test_iter_csv_column_selection(export_service, sample_data):
+    chunks = list(export_service.iter_csv([sample_data, sample_data], ['url', 'key_points']))
+
+    # Header plus one chunk per result
+    assert len(chunks) == 3
+    rows = list(csv.reader(chunks))
+    assert rows[0] == ['url', 'key_points']
+    assert rows[1] == ['https://example.com', 'Point 1; Point 2']
+
+def test_iter_json_streams_valid_array(export_service, sample_data):
+    results = (dict(sample_data, url=f'https://example.com/{i}') for i in range(3))
+    exported = json.loads(''.join(export_service.iter_json(results, ['url', 'title'])))
+
+    assert exported[2] == {'url': 'https://example.com/2', 'title': 'Test Page'}
+
+def test_iter_ndjson_full_records(export_service, sample_data):
+    lines = list(export_service.iter_ndjson([sample_data]))
+
+    assert len(lines) == 1
+    assert json.loads(lines[0]) == sample_data
+
+def test_unknown_export_column(export_service, sample_data):
+    with pytest.raises(ValueError):
+        export_service.iter_export([sample_data], 'csv', ['not_a_column'])
+
+def test_to_parquet_typed_columns(export_service, sample_data, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    parquet_file = tmp_path / "test_export.parquet"
+
+    rows = export_service.to_parquet([sample_data] * 5, str(parquet_file), batch_size=2)
+
+    assert rows == 5
+    parquet = pq.ParquetFile(str(parquet_file))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column('key_points').to_pylist()[0] == ['Point 1', 'Point 2']
+    assert str(table.schema.field('sentiment').type).startswith('dictionary')
+    assert table.column('domain').to_pylist()[0] == 'example.com'
+
+def test_to_pdf_paginates_long_batches(export_service, sample_data):
+    long_result = dict(sample_data, analysis=dict(sample_data['analysis'], key_points=['A <point>'] * 200))
+
+    pdf = export_service.to_pdf([long_result, sample_data])
+
+    assert pdf.startswith(b'%PDF')
+    assert pdf.count(b'/Type /Page\n') > 1
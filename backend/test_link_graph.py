@@ -0,0 +1,65 @@
+import pytest
+from bs4 import BeautifulSoup
+from backend.link_graph import LinkGraph, count_links, iter_links, normalize_url
+from backend.content_extractor import ContentExtractor
+
+PAGE = """
+<html><head><base href="/blog/"></head>
+<body>
+  <nav><a href="/about">About</a></nav>
+  <a href="post-1">First post</a>
+  <a href="post-1#comments">  </a>
+  <a href="https://Example.com:443/blog/post-1?utm_source=feed">First post again</a>
+  <a href="https://www.example.com/shop">Shop</a>
+  <a href="https://other.org/page?id=2">Elsewhere</a>
+  <a href="/static/logo.PNG">Logo</a>
+  <a href="mailto:team@example.com">Mail</a>
+  <a href="javascript:void(0)">Nothing</a>
+  <a href="#top">Top</a>
+</body></html>
+"""
+
+@pytest.fixture
+def graph():
+    return LinkGraph.from_soup(BeautifulSoup(PAGE, 'html.parser'), 'https://example.com/index.html')
+
+def test_normalize_url():
+    assert normalize_url('HTTP://Example.COM:80?utm_medium=x&q=1#frag') == 'http://example.com/?q=1'
+    assert normalize_url('https://example.com:8443/a') == 'https://example.com:8443/a'
+    assert normalize_url('ftp://example.com/file') is None
+    assert normalize_url('http://[2001:DB8::1]:8080/a') == 'http://[2001:db8::1]:8080/a'
+    assert normalize_url('https://[2001:db8::1]:443') == 'https://[2001:db8::1]/'
+
+def test_links_are_resolved_deduplicated_and_classified(graph):
+    assert graph.to_list() == [
+        {'href': 'https://example.com/about', 'text': 'About', 'type': 'nav'},
+        {'href': 'https://example.com/blog/post-1', 'text': 'First post', 'type': 'internal'},
+        {'href': 'https://www.example.com/shop', 'text': 'Shop', 'type': 'internal'},
+        {'href': 'https://other.org/page?id=2', 'text': 'Elsewhere', 'type': 'external'},
+        {'href': 'https://example.com/static/logo.PNG', 'text': 'Logo', 'type': 'asset'},
+    ]
+    assert graph.urls(['internal']) == ['https://example.com/blog/post-1', 'https://www.example.com/shop']
+
+def test_compact_form_interns_origins(graph):
+    compact = graph.to_compact()
+
+    assert compact['origins'] == ['https://example.com', 'https://www.example.com', 'https://other.org']
+    assert compact['origin'] == [0, 0, 1, 2, 0]
+    assert count_links(compact) == 5
+    assert list(iter_links(compact)) == graph.to_list()
+
+def test_cap_counts_dropped_links():
+    graph = LinkGraph('https://example.com/', max_links=2)
+    for i in range(5):
+        graph.add(f'/page/{i}', f'Page {i}')
+
+    assert len(graph) == 2
+    assert graph.dropped == 3
+
+def test_extractor_keeps_nav_links_before_stripping():
+    content = ContentExtractor().extract_content(
+        BeautifulSoup(PAGE, 'html.parser'), base_url='https://example.com/', compact_links=True
+    )
+
+    assert content['links']['path'][0] == '/about'
+    assert 'About' not in content['main_content']
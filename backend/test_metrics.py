@@ -0,0 +1,38 @@
+import pytest
+from backend.metrics import MetricsRegistry, track_stage, STAGE_ERRORS, STAGE_LATENCY
+
+def test_histogram_exposition():
+    registry = MetricsRegistry()
+    latency = registry.histogram('test_latency_seconds', 'Test latency', ('stage',), buckets=(0.1, 1.0))
+    latency.observe(0.05, stage='fetch')
+    latency.observe(0.5, stage='fetch')
+
+    text = registry.expose()
+
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="fetch",le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count{stage="fetch"} 2' in text
+
+def test_track_stage_records_timings_and_errors():
+    timings = {}
+    errors = STAGE_ERRORS.value(stage='test_stage')
+
+    with track_stage('test_stage', timings):
+        pass
+    with pytest.raises(ValueError):
+        with track_stage('test_stage'):
+            raise ValueError('boom')
+
+    assert 'test_stage' in timings
+    assert STAGE_LATENCY.count(stage='test_stage') == 2
+    assert STAGE_ERRORS.value(stage='test_stage') == errors + 1
+
+def test_health_reports_only_checked_services():
+    from fastapi.testclient import TestClient
+    import frontend.app as api
+
+    services = TestClient(api.app).get('/health').json()['services']
+
+    assert 'web_scraper' not in services
+    assert 'wca_stage_duration_seconds' in TestClient(api.app).get('/metrics').text
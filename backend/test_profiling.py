@@ -0,0 +1,82 @@
+import asyncio
+import dataclasses
+import json
+import threading
+import time
+from backend import profiling
+from backend.profiling import ProfileCoordinator, SamplingProfiler, format_collapsed, parse_collapsed
+from backend.result_model import Headers
+from backend.scraping_service import ScrapingService
+from backend.web_scraper import WebScraper
+
+PAGE = ('<html><head><title>Long read</title></head><body><article>'
+        + '<p>A paragraph with <a href="/next">a link</a> and enough words to count.</p>' * 3000
+        + '</article></body></html>').encode()
+
+class _LocalScraper(WebScraper):
+    """Serves one large page without touching the network"""
+    offline = True
+
+    def fetch_page(self, url, include_headers=True, deadline=None):
+        return self._page_result(url, 200, Headers((('Content-Type', 'text/html'),)), PAGE, include_headers)
+
+def _busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+def test_sampling_profiler_captures_target_thread():
+    with SamplingProfiler(interval=0.001, thread_ids=[threading.get_ident()]) as profiler:
+        _busy_loop(0.1)
+
+    assert profiler.samples > 0
+    assert '_busy_loop' in profiler.collapsed()
+
+def test_collapsed_round_trip():
+    stacks = {'main (app.py:1);fetch (scraper.py:10)': 3, 'main (app.py:1)': 1}
+
+    assert parse_collapsed(format_collapsed(stacks)) == stacks
+
+def test_request_profile_samples_the_analysis_thread(monkeypatch):
+    from fastapi.testclient import TestClient
+    import frontend.app as api
+
+    monkeypatch.setattr(api, 'settings', dataclasses.replace(api.settings, profiling_enabled=True))
+    monkeypatch.setattr(api.analyzer, 'scraping_service', ScrapingService(_LocalScraper()))
+
+    response = TestClient(api.app).post(
+        '/analyze?profile=summary', json={'url': 'https://example.com/long-read'}, headers={'X-Profile': '1'}
+    )
+
+    assert response.headers['X-Profiled-Status'] == '200'
+    # Extraction runs on an executor thread, not the event loop thread serving the request
+    assert 'extract_page (content_extractor.py' in response.text
+
+def test_coordinator_remembers_a_bounded_number_of_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'MAX_HANDLED_REQUESTS', 3)
+    coordinator = ProfileCoordinator(str(tmp_path), poll_interval=0.01)
+
+    async def run():
+        coordinator.start()
+        for i in range(10):
+            (tmp_path / f"{i}.request").write_text(json.dumps({'seconds': 1, 'expires': 0}))
+            await asyncio.sleep(0.03)
+            (tmp_path / f"{i}.request").unlink()
+        await coordinator.stop()
+
+    asyncio.run(run())
+
+    assert list(coordinator._handled) == ['7', '8', '9']
+
+def test_admin_profile_requires_a_token(monkeypatch):
+    from fastapi.testclient import TestClient
+    import frontend.app as api
+
+    client = TestClient(api.app)
+    monkeypatch.setattr(api, 'settings', dataclasses.replace(api.settings, profiling_enabled=True, admin_token=''))
+    assert client.post('/admin/profile?seconds=1').status_code == 403
+
+    monkeypatch.setattr(api, 'settings', dataclasses.replace(api.settings, admin_token='secret'))
+    assert client.post('/admin/profile?seconds=1', headers={'X-Admin-Token': 'guess'}).status_code == 403
+    response = client.post('/admin/profile?seconds=1000', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 400
@@ -0,0 +1,49 @@
+import re
+from collections import Counter
+from pathlib import Path
+import pytest
+from bs4 import BeautifulSoup
+from backend.content_extractor import ContentExtractor
+from backend.readability import ContentScorer
+
+# Saved pages paired with hand-picked main content
+TEST_DATA = Path(__file__).parent / "test_data" / "readability"
+PAGES = sorted(path.stem for path in TEST_DATA.glob("*.html"))
+
+def _tokens(text):
+    return Counter(re.findall(r"\w+", text.lower()))
+
+def _precision_recall(extracted, gold):
+    extracted, gold = _tokens(extracted), _tokens(gold)
+    overlap = sum((extracted & gold).values())
+    return overlap / max(sum(extracted.values()), 1), overlap / max(sum(gold.values()), 1)
+
+@pytest.fixture
+def extractor():
+    return ContentExtractor()
+
+@pytest.mark.parametrize("page", PAGES)
+def test_main_content_precision_recall(extractor, page):
+    html = (TEST_DATA / f"{page}.html").read_text()
+    gold = (TEST_DATA / f"{page}.txt").read_text()
+
+    main_content = extractor._extract_main_content(BeautifulSoup(html, 'html.parser'))
+    precision, recall = _precision_recall(main_content, gold)
+
+    assert precision >= 0.9, f"{page}: boilerplate leaked into main content"
+    assert recall >= 0.9, f"{page}: main content is missing text"
+
+def test_hidden_and_link_heavy_blocks_lose():
+    soup = BeautifulSoup(
+        "<body><div style='display: none'>" + "<p>Hidden text, long enough to count as a paragraph.</p>" * 5 +
+        "</div><div>" + "<a href='/x'>A link with quite a lot of anchor text in it, really</a> " * 10 +
+        "</div><div><p>The real article text, with commas, clauses, and enough length to score.</p></div></body>",
+        'html.parser'
+    )
+
+    assert ContentScorer().extract_text(soup.body).strip().startswith("The real article text")
+
+def test_no_paragraphs_returns_none():
+    soup = BeautifulSoup("<body><div>Short</div></body>", 'html.parser')
+
+    assert ContentScorer().extract_text(soup.body) is None
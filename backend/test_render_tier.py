@@ -0,0 +1,67 @@
+import pytest
+from bs4 import BeautifulSoup
+from backend.render_tier import RenderDetector
+from backend.scraping_service import ScrapingService
+
+SPA_SHELL = """<html><head><title>App</title><script src="/static/js/main.4f2a.js"></script></head>
+<body><div id="root"></div></body></html>"""
+NOSCRIPT_SHELL = """<html><body><noscript>You need to enable JavaScript to run this app.</noscript>
+<div class="mount"></div><script src="/app.js"></script></body></html>"""
+BUNDLE_HEAVY = "<html><body><div class='x'></div>" + "<script src='/chunk.js'></script>" * 4 + "</body></html>"
+ARTICLE = "<html><body><div id='root'><article><p>" + "Server-rendered text. " * 20 + "</p></article></div></body></html>"
+SHORT_STATIC = "<html><body><p>Coming soon.</p></body></html>"
+
+@pytest.fixture
+def detector():
+    return RenderDetector()
+
+@pytest.mark.parametrize("html,render,reason", [
+    (SPA_SHELL, True, 'framework_marker'),
+    (NOSCRIPT_SHELL, True, 'noscript_hint'),
+    (BUNDLE_HEAVY, True, 'script_heavy'),
+    (ARTICLE, False, 'has_text'),
+    (SHORT_STATIC, False, 'static'),
+])
+def test_detector_routes_only_client_side_shells(detector, html, render, reason):
+    decision = detector.check(html, BeautifulSoup(html, 'html.parser'))
+
+    assert (decision.render, decision.reason) == (render, reason)
+
+class _FakePool:
+    timeout = 15.0
+
+    def __init__(self, html=None):
+        self.html = html
+        self.calls = []
+
+    def render(self, url, timeout=None):
+        self.calls.append(url)
+        if self.html is None:
+            raise TimeoutError("navigation timed out")
+        return self.html
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr('backend.scraping_service.check_url_security', lambda url: True)
+    service = ScrapingService()
+    monkeypatch.setattr(service.scraper, 'fetch_page', lambda url, include_headers=True, deadline=None: {
+        'status': 'success', 'url': url, 'content': SPA_SHELL, 'status_code': 200, 'headers': {}
+    })
+    return service
+
+def test_shells_are_rendered_and_reparsed(service):
+    service.render_pool = _FakePool(ARTICLE)
+
+    result = service.analyze_url('https://example.com/app')
+
+    assert service.render_pool.calls == ['https://example.com/app']
+    assert result['metadata']['rendered'] is True
+    assert 'Server-rendered text.' in result['content']['main_content']
+
+def test_failed_render_keeps_static_result(service):
+    service.render_pool = _FakePool()
+
+    result = service.analyze_url('https://example.com/app')
+
+    assert result['status'] == 'success'
+    assert 'rendered' not in result['metadata']
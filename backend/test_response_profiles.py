@@ -0,0 +1,47 @@
+import pytest
+from backend.response_profiles import ResponseProfile
+
+@pytest.fixture
+def sample_result():
+    return {
+        'status': 'success',
+        'url': 'https://example.com',
+        'content': {
+            'title': 'Test Page',
+            'main_content': 'Test content',
+            'meta_description': 'Test description',
+            'links': [{'text': 'Home', 'href': '/'}]
+        },
+        'analysis': {'summary': 'Test summary', 'sentiment': 'neutral'},
+        'metadata': {'status_code': 200, 'headers': {'Server': 'test'}}
+    }
+
+def test_full_profile_returns_result_unchanged(sample_result):
+    assert ResponseProfile.parse().apply(sample_result) is sample_result
+
+def test_summary_profile_drops_heavy_fields(sample_result):
+    profile = ResponseProfile.parse('summary')
+    result = profile.apply(sample_result)
+
+    assert not profile.includes('content.links')
+    assert not profile.includes('metadata.headers')
+    assert result['content'] == {'title': 'Test Page', 'meta_description': 'Test description'}
+    assert result['metadata'] == {'status_code': 200}
+    assert result['analysis'] == sample_result['analysis']
+
+def test_fields_projection(sample_result):
+    profile = ResponseProfile.parse(fields='content.title,analysis.summary')
+    result = profile.apply(sample_result)
+
+    assert profile.includes('content')
+    assert not profile.includes('content.main_content')
+    assert result == {
+        'status': 'success',
+        'url': 'https://example.com',
+        'content': {'title': 'Test Page'},
+        'analysis': {'summary': 'Test summary'}
+    }
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        ResponseProfile.parse('tiny')
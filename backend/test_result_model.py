@@ -0,0 +1,83 @@
+import json
+from bs4 import BeautifulSoup
+from backend.content_extractor import ContentExtractor
+from backend.response_profiles import ResponseProfile
+from backend.result_model import Analysis, AnalysisResult, Headers, PageContent, as_dict
+
+PAGE = """<html><head><title>Post</title><meta name="description" content="About the post"></head>
+<body><nav><a href="/">Home</a></nav><article><p>Some text for the post body.</p>
+<a href="https://other.example.org/x">Elsewhere</a><a href="/about">About us</a></article></body></html>"""
+
+RESULT = {
+    'status': 'success',
+    'url': 'https://example.com/post',
+    'content': {'title': 'Post', 'main_content': 'Body', 'meta_description': '',
+                'links': [{'href': 'https://example.com/', 'text': 'Home', 'type': 'nav'}]},
+    'analysis': {'title': 'Post', 'summary': 'Short', 'sentiment': 'neutral',
+                 'key_points': ['One', 'Two'], 'suggestions': [], 'confidence_score': 0.8},
+    'metadata': {'status_code': 200, 'content_kind': 'html', 'encoding': 'utf-8',
+                 'headers': {'Content-Type': 'text/html', 'X-Custom': 'yes'}, 'timings': {'total': 1.5}},
+    'result_note': 'kept as an extra field',
+}
+
+def test_round_trip_keeps_the_json_shape():
+    result = AnalysisResult.from_dict(RESULT)
+
+    assert isinstance(result.analysis, Analysis)
+    assert result.analysis.key_points == ('One', 'Two')
+    assert json.dumps(result.to_dict()) == json.dumps(RESULT)
+    assert as_dict(RESULT) is RESULT
+
+def test_records_read_like_dicts():
+    result = AnalysisResult.from_dict(RESULT)
+
+    assert result['content']['title'] == 'Post'
+    assert result['analysis']['key_points'] == ['One', 'Two']
+    assert result['metadata']['headers']['content-type'] == 'text/html'
+    assert result.get('error') is None and 'error' not in result
+    assert result == RESULT
+
+    failure = AnalysisResult.failure('https://example.com/', 'Timed out', 'fetch')
+    assert failure.to_dict() == {'status': 'error', 'error': 'Timed out', 'url': 'https://example.com/',
+                                 'deadline_exceeded': 'fetch'}
+
+def test_repeated_strings_are_interned():
+    first = Headers.from_items([(''.join(['Con', 'tent-Type']), ''.join(['text/', 'html']))])
+    second = Headers.from_items([(''.join(['Conte', 'nt-Type']), ''.join(['tex', 't/html']))])
+    analyses = [Analysis(sentiment=''.join(['neu', part])) for part in ('tral', 'tral')]
+
+    assert first.pairs[0][0] is second.pairs[0][0]
+    assert first.pairs[0][1] is second.pairs[0][1]
+    assert analyses[0].sentiment is analyses[1].sentiment
+
+def test_links_stay_columnar_until_serialized():
+    content = ContentExtractor().extract_page(BeautifulSoup(PAGE, 'html.parser'), base_url='https://example.com/post')
+
+    assert not isinstance(content.links, list)
+    assert [link['type'] for link in content['links']] == ['nav', 'external', 'internal']
+    assert content.to_dict() == ContentExtractor().extract_content(
+        BeautifulSoup(PAGE, 'html.parser'), base_url='https://example.com/post'
+    )
+
+    compact = PageContent(links=content.links, compact_links=True)
+    assert compact.to_dict()['links']['path'] == ['/', '/x', '/about']
+
+def test_profile_is_applied_at_serialization():
+    result = AnalysisResult.from_dict(RESULT)
+    result.profile = ResponseProfile.parse('summary')
+
+    data = result.to_dict()
+
+    assert 'main_content' not in data['content'] and 'headers' not in data['metadata']
+    assert result['content']['main_content'] == 'Body'
+
+def test_records_hold_less_memory_than_dicts():
+    from benchmarks.corpus import link_heavy_page
+    from benchmarks.result_memory import measure_retained
+
+    html = link_heavy_page(100)
+    as_dicts = measure_retained(html, 5, records=False)
+    as_records = measure_retained(html, 5, records=True)
+
+    assert as_records['bytes_per_result'] < as_dicts['bytes_per_result'] * 0.7
+    assert as_records['blocks_per_result'] < as_dicts['blocks_per_result'] * 0.7
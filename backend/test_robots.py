@@ -0,0 +1,109 @@
+import threading
+import time
+import pytest
+from backend.robots import RobotsCache, RobotsRules, parse_sitemap
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /private/
+Allow: /private/open
+Disallow: /*.json$
+Sitemap: https://example.com/sitemap.xml
+
+# Our own group wins over the wildcard one
+User-agent: OtherBot
+User-agent: WebContentAnalyzer
+Disallow: /admin
+Crawl-delay: 2
+"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml</loc></sitemap>
+</sitemapindex>"""
+
+def _urlset(count):
+    entries = ''.join(f"<url><loc>https://example.com/p/{i}</loc><lastmod>2025-01-01</lastmod></url>" for i in range(count))
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'.encode()
+
+@pytest.fixture
+def counting_cache(monkeypatch):
+    cache = RobotsCache(ttl=60, stale_ttl=60)
+    calls = []
+
+    def fake_fetch(origin):
+        calls.append(origin)
+        time.sleep(0.05)
+        return RobotsRules.parse(f"User-agent: *\nDisallow: /v{len(calls)}/"), cache.ttl
+
+    monkeypatch.setattr(cache, '_fetch', fake_fetch)
+    return cache, calls
+
+def test_group_selection_and_matching():
+    rules = RobotsRules.parse(ROBOTS_TXT)
+
+    assert not rules.allowed('https://example.com/admin/users')
+    # The wildcard group does not apply once a specific group matches
+    assert rules.allowed('https://example.com/private/x')
+    assert rules.crawl_delay == 2
+    assert rules.sitemaps == ['https://example.com/sitemap.xml']
+
+def test_groups_match_the_whole_product_token():
+    robots_txt = 'User-agent: a\nDisallow: /\n\nUser-agent: *\nAllow: /'
+
+    assert RobotsRules.parse(robots_txt).allowed('https://example.com/page')
+    assert not RobotsRules.parse(ROBOTS_TXT, user_agent='webcontentanalyzer/2.1 (+https://example.com)').allowed(
+        'https://example.com/admin'
+    )
+
+def test_wildcards_anchors_and_longest_match():
+    rules = RobotsRules.parse(ROBOTS_TXT, user_agent='SomeoneElse')
+
+    assert not rules.allowed('https://example.com/private/x')
+    assert rules.allowed('https://example.com/private/open/page')
+    assert not rules.allowed('https://example.com/data/feed.json')
+    assert rules.allowed('https://example.com/data/feed.json?page=2')
+    assert rules.allowed('https://example.com/')
+
+def test_concurrent_first_lookups_share_one_fetch(counting_cache):
+    cache, calls = counting_cache
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.allowed('https://example.com/v1/page')))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['https://example.com']
+    assert results == [False] * 8
+
+def test_stale_entries_are_served_while_refreshing(counting_cache):
+    cache, calls = counting_cache
+    assert not cache.allowed('https://example.com/v1/page')
+    cache._entries['https://example.com'].expires = 0
+
+    # The stale rules answer immediately and one refresh runs in the background
+    assert not cache.allowed('https://example.com/v1/page')
+    cache._inflight['https://example.com'].result()
+
+    assert len(calls) == 2
+    assert cache.allowed('https://example.com/v1/page')
+    assert not cache.allowed('https://example.com/v2/page')
+
+def test_parse_sitemap_streams_entries():
+    assert list(parse_sitemap([SITEMAP_INDEX])) == [('sitemap', 'https://example.com/sitemap-1.xml')]
+
+    body = _urlset(50000)
+    entries = parse_sitemap(body[i:i + 4096] for i in range(0, len(body), 4096))
+    assert next(entries) == ('url', 'https://example.com/p/0')
+    assert sum(1 for _ in entries) == 49999
+
+def test_parse_sitemap_tolerates_truncated_xml():
+    truncated = _urlset(3)[:-40]
+
+    assert [location for _, location in parse_sitemap([truncated])] == [
+        'https://example.com/p/0', 'https://example.com/p/1'
+    ]
@@ -0,0 +1,102 @@
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from backend import similarity
+from backend.app import WebContentAnalyzer
+from backend.result_model import AnalysisResult, PageContent
+from backend.similarity import SimilarityIndex
+
+pytest.importorskip('numpy')
+
+WORDS = [f"word{i}" for i in range(3000)]
+
+def _pages(count, seed=3):
+    rng = random.Random(seed)
+    return [(f"https://example.com/{i}", ' '.join(rng.choices(WORDS, k=200))) for i in range(count)]
+
+def test_near_copies_are_reported_as_duplicates(tmp_path):
+    index = SimilarityIndex(str(tmp_path))
+    pages = _pages(50)
+    assert index.add_batch(pages) == [None] * 50
+
+    copy = index.add('https://mirror.example.org/7', pages[7][1] + ' reposted by a mirror')
+    assert copy.url == 'https://example.com/7' and copy.score > 0.95
+    # Re-analyzing a page replaces it instead of matching its own earlier copy
+    assert index.add('https://example.com/3', pages[3][1]) is None
+    assert len(index) == 51
+
+def test_queries_by_url_and_text(tmp_path):
+    index = SimilarityIndex(str(tmp_path))
+    pages = _pages(30)
+    index.add_batch(pages, find_duplicates=False)
+    index.add('https://example.com/related', ' '.join(pages[4][1].split()[:120]))
+
+    neighbors = index.similar(url='https://example.com/4', limit=3)
+    assert neighbors[0].url == 'https://example.com/related'
+    assert [n.score for n in neighbors] == sorted((n.score for n in neighbors), reverse=True)
+    assert 'https://example.com/4' not in [n.url for n in neighbors]
+
+    assert index.similar(text=pages[9][1], limit=1)[0].url == 'https://example.com/9'
+    assert index.similar(text='', limit=5) == []
+    with pytest.raises(KeyError):
+        index.similar(url='https://example.com/missing')
+
+def test_index_survives_reopening_and_growth(tmp_path):
+    index = SimilarityIndex(str(tmp_path))
+    pages = _pages(1500)
+    index.add_batch(pages, find_duplicates=False)
+    index.add('https://example.com/0', pages[1][1])
+    index.close()
+    # A row whose URL line was cut short never became part of the index
+    with open(tmp_path / 'urls.txt', 'a') as f:
+        f.write('https://example.com/half-writ')
+
+    reopened = SimilarityIndex(str(tmp_path), dim=64)
+    assert reopened.dim == 256 and len(reopened) == 1500
+    assert reopened.similar(url='https://example.com/1', limit=1)[0].url == 'https://example.com/0'
+
+def test_lsh_finds_neighbors_in_a_large_index(tmp_path, monkeypatch):
+    import numpy as np
+    monkeypatch.setattr(similarity, 'BRUTE_FORCE_ROWS', 100)
+    monkeypatch.setattr(similarity, 'MIN_UNSORTED_ROWS', 100)
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((3000, 256)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = SimilarityIndex(str(tmp_path))
+    index.add_vectors([f"https://example.com/{i}" for i in range(3000)], vectors)
+    index.similar(url='https://example.com/0')
+
+    copies = vectors[:20] + 0.01 * rng.standard_normal((20, 256)).astype(np.float32)
+    copies /= np.linalg.norm(copies, axis=1, keepdims=True)
+    # Added after the tables were sorted, so found by the linear scan of new rows
+    duplicates = index.add_vectors([f"https://copy.example/{i}" for i in range(20)], copies, find_duplicates=True)
+
+    assert [d.url for d in duplicates] == [f"https://example.com/{i}" for i in range(20)]
+    assert index.similar(url='https://example.com/5', limit=1)[0].url == 'https://copy.example/5'
+
+def test_analyzer_indexes_pages_and_flags_duplicates(tmp_path, monkeypatch):
+    analyzer = WebContentAnalyzer(similarity=SimilarityIndex(str(tmp_path)))
+    body = _pages(1)[0][1]
+    monkeypatch.setattr(analyzer.scraping_service, 'analyze_url', lambda url, *args, **kwargs: AnalysisResult(
+        url=url, content=PageContent(title='Story', main_content=body)
+    ))
+
+    first = analyzer.analyze_url_sync('https://example.com/story')
+    copy = analyzer.analyze_url_sync('https://syndicated.example.net/story')
+
+    assert 'duplicate_of' not in first['metadata']
+    assert copy['metadata']['duplicate_of']['url'] == 'https://example.com/story'
+    assert 'index' in copy['metadata']['timings']
+
+def test_importing_the_api_opens_no_index(tmp_path):
+    index_dir = tmp_path / 'index'
+    subprocess.run(
+        [sys.executable, '-c', 'import frontend.app, backend.backfill; backend.backfill._Worker(".", None, None)'],
+        cwd=Path(__file__).resolve().parent.parent, env={**os.environ, 'SIMILARITY_DIR': str(index_dir)},
+        check=True, capture_output=True
+    )
+
+    assert not index_dir.exists()
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# The API's own import cost, beyond FastAPI's, as a multiple of FastAPI's; about twice the current ratio.
+# Both are timed in the same interpreter, so a slow machine slows both alike.
+IMPORT_BUDGET_RATIO = 1.5
+# Heavy packages that must only be imported when a request needs them
+DEFERRED = ('reportlab', 'pyarrow', 'pypdf', 'openai', 'httpx', 'playwright', 'numpy')
+
+def _import_times(module):
+    """Cumulative `-X importtime` microseconds per module imported by a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def _imported_modules(module):
+    """Names in sys.modules after a fresh interpreter imports `module`"""
+    completed = subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print("\\n".join(sys.modules))'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return set(completed.stdout.split())
+
+def test_api_import_stays_within_budget():
+    times = _import_times('frontend.app')
+    framework = times['fastapi']
+
+    assert times['frontend.app'] - framework < IMPORT_BUDGET_RATIO * framework
+
+def test_api_import_defers_heavy_packages():
+    modules = _imported_modules('frontend.app')
+
+    assert 'frontend.app' in modules
+    assert not [name for name in modules if name.split('.')[0] in DEFERRED]
+
+def test_package_exports_are_lazy():
+    modules = _imported_modules('backend.validators')
+
+    assert 'backend.app' not in modules
+    assert 'bs4' not in modules
@@ -0,0 +1,111 @@
+import gzip
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+import pytest
+from backend.metrics import RETRIES
+from backend.robots import ROBOTS_USER_AGENT
+from backend.transport import HttpTransport, TransportError, create_transport
+from backend.web_scraper import WebScraper
+
+PAGE = b'<html><head><title>Pooled</title></head><body>' + b'<p>keep-alive</p>' * 200 + b'</body></html>'
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/slow':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', '100')
+            self.end_headers()
+            for _ in range(10):
+                self.wfile.write(b'x' * 10)
+                self.wfile.flush()
+                time.sleep(0.1)
+            return
+        body = self.headers.get('User-Agent', '').encode() if self.path == '/agent' else PAGE
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        accepted = self.headers.get('Accept-Encoding', '')
+        if self.path == '/brotli' and 'br' in accepted:
+            import brotli
+            body = brotli.compress(body)
+            self.send_header('Content-Encoding', 'br')
+        elif 'gzip' in accepted:
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def origin(serve):
+    return serve(_Handler)
+
+def _host(origin):
+    return origin.split('//', 1)[1]
+
+def test_sequential_fetches_reuse_one_connection(origin):
+    transport = HttpTransport(pool_size=4)
+    scraper = WebScraper(transport=transport)
+
+    for i in range(10):
+        result = scraper.fetch_page(f"{origin}/page/{i}")
+        assert result["status"] == "success"
+        assert result["content"] == PAGE.decode()
+
+    assert transport.pool_stats()[_host(origin)] == {'connections': 1, 'requests': 10}
+
+def test_concurrent_fetches_stay_within_the_pool(origin):
+    transport = HttpTransport(pool_size=4)
+    scraper = WebScraper(transport=transport)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda i: scraper.fetch_page(f"{origin}/page/{i}"), range(40)))
+
+    assert all(result["status"] == "success" for result in results)
+    assert transport.pool_stats()[_host(origin)]['connections'] <= 4
+
+def test_brotli_transfer_is_negotiated(origin):
+    pytest.importorskip('brotli')
+
+    result = WebScraper(transport=HttpTransport()).fetch_page(f"{origin}/brotli")
+
+    assert result["content"] == PAGE.decode()
+
+def test_page_fetches_send_the_robots_product_token(origin):
+    result = WebScraper(transport=HttpTransport()).fetch_page(f"{origin}/agent")
+
+    assert result["content"] == f"Mozilla/5.0 (compatible; {ROBOTS_USER_AGENT})"
+
+def test_total_timeout_covers_the_body(origin):
+    scraper = WebScraper(timeout=0.3, transport=HttpTransport(read_timeout=5))
+
+    assert scraper.fetch_page(f"{origin}/slow") == {"status": "error", "error": "Request timed out"}
+
+def test_connect_failures_are_retried():
+    transport = HttpTransport(connect_timeout=0.5, retries=2)
+    before = RETRIES.value(operation='fetch')
+
+    # Nothing listens on port 9 (discard) here
+    with pytest.raises(TransportError):
+        with transport.stream('http://127.0.0.1:9/'):
+            pass
+
+    assert RETRIES.value(operation='fetch') - before == 2
+    assert transport.pool_stats()['127.0.0.1:9']['requests'] == 1
+
+def test_http2_transport_falls_back_to_http1(origin):
+    pytest.importorskip('h2')
+    transport = create_transport(http2=True, pool_size=4)
+    scraper = WebScraper(transport=transport)
+
+    results = [scraper.fetch_page(f"{origin}/page/{i}") for i in range(5)]
+
+    assert transport.protocol == 'HTTP/2'
+    assert [result["content"] for result in results] == [PAGE.decode()] * 5
+    assert transport.pool_stats()[_host(origin)] == {'connections': 1, 'requests': 5}
@@ -0,0 +1,277 @@
+"""
+Pooled HTTP transport shared by every page fetch.
+
+Connections are kept alive in per-host pools so repeated fetches from one
+origin reuse a connection instead of paying for a new TCP and TLS handshake.
+Timeouts are split into connect and read budgets, and the caller enforces a
+total deadline while the body streams. Compressed transfer is negotiated
+with every codec installed (gzip and deflate always; brotli and zstd when
+their packages are present). With HTTP2_ENABLED and httpx[http2] installed,
+origins that offer HTTP/2 through ALPN multiplex requests over a single
+connection; everything else stays on HTTP/1.1.
+"""
+from typing import Dict, Iterator, Optional, Tuple
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from backend.metrics import RETRIES, registry
+from backend.config import get_settings
+from backend.lazy import optional_module
+
+# HTTP/2 is optional (httpx needs h2 for it); HTTP/1.1 keep-alive works without it
+httpx = optional_module('httpx', 'h2')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Hosts whose pool statistics are kept; the least recently used are dropped first
+MAX_STATS_HOSTS = 1024
+# Product token identifying every fetch, and the robots.txt group that applies to them
+PRODUCT_TOKEN = 'WebContentAnalyzer'
+USER_AGENT = f'Mozilla/5.0 (compatible; {PRODUCT_TOKEN})'
+CHUNK_SIZE = 64 * 1024
+# Shortest socket timeout used when a request is nearly out of budget
+MIN_TIMEOUT = 0.01
+
+HTTP_CONNECTIONS = registry.counter(
+    'wca_http_connections_opened_total', 'Upstream connections opened by the fetch transport', ('scheme',)
+)
+HTTP_REQUESTS = registry.counter(
+    'wca_http_upstream_requests_total', 'Requests sent by the fetch transport', ('scheme',)
+)
+
+class TransportTimeout(Exception):
+    """Connecting to or reading from the origin took longer than allowed"""
+
+class TransportError(Exception):
+    """The request failed before a complete response was received"""
+
+class HTTPStatusError(TransportError):
+    """The origin answered with a 4xx or 5xx status"""
+
+@dataclass
+class TransportResponse:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    chunks: Iterator[bytes]
+
+def _host_key(scheme: str, host: str, port: Optional[int]) -> str:
+    return f"{host}:{port or DEFAULT_PORTS.get(scheme, 80)}"
+
+class PoolStats:
+    """Connections opened and requests sent per host, to show how well keep-alive is working"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: 'OrderedDict[str, Dict[str, int]]' = OrderedDict()
+
+    def connection(self, scheme: str, host: str):
+        HTTP_CONNECTIONS.inc(scheme=scheme)
+        self._bump(host, 'connections')
+
+    def request(self, scheme: str, host: str):
+        HTTP_REQUESTS.inc(scheme=scheme)
+        self._bump(host, 'requests')
+
+    def _bump(self, host: str, field: str):
+        with self._lock:
+            counts = self._hosts.get(host)
+            if counts is None:
+                counts = self._hosts[host] = {'connections': 0, 'requests': 0}
+                if len(self._hosts) > MAX_STATS_HOSTS:
+                    self._hosts.popitem(last=False)
+            else:
+                self._hosts.move_to_end(host)
+            counts[field] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {host: dict(counts) for host, counts in self._hosts.items()}
+
+class _CountedRetry(Retry):
+    def increment(self, *args, **kwargs):
+        # Raises once retries are exhausted, so only real retries are counted
+        retry = super().increment(*args, **kwargs)
+        RETRIES.inc(operation='fetch')
+        return retry
+
+def _counted_pool(base, stats: PoolStats):
+    class CountedPool(base):
+        def _new_conn(self):
+            stats.connection(self.scheme, _host_key(self.scheme, self.host, self.port))
+            return super()._new_conn()
+    return CountedPool
+
+class _PooledAdapter(HTTPAdapter):
+    def __init__(self, stats: PoolStats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counted_pool(HTTPConnectionPool, self._stats),
+            'https': _counted_pool(HTTPSConnectionPool, self._stats),
+        }
+
+class HttpTransport:
+    protocol = 'HTTP/1.1'
+
+    def __init__(self, pool_hosts: int = 32, pool_size: int = 16, connect_timeout: float = 5.0,
+                 read_timeout: float = 15.0, retries: int = 2):
+        """
+        Args:
+            pool_hosts (int): Hosts whose connection pools are kept open at once
+            pool_size (int): Idle connections kept per host
+            connect_timeout (float): Seconds allowed to open a connection
+            read_timeout (float): Seconds allowed between bytes from the origin
+            retries (int): Times a failed connection attempt is retried
+        """
+        self.pool_hosts = pool_hosts
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.stats = PoolStats()
+        self._client = self._build_client()
+
+    def _build_client(self):
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING})
+        # Only connection failures are retried: nothing has reached the origin yet
+        retry = _CountedRetry(total=self.retries, connect=self.retries, read=0, status=0, other=0,
+                              backoff_factor=0.1, raise_on_status=False)
+        adapter = _PooledAdapter(self.stats, pool_connections=self.pool_hosts, pool_maxsize=self.pool_size,
+                                 max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @contextmanager
+    def stream(self, url: str, budget: Optional[float] = None) -> Iterator[TransportResponse]:
+        """
+        Send a GET and yield the response before its body is read.
+
+        Args:
+            url (str): URL to fetch
+            budget (Optional[float]): Seconds left for the whole request; caps both timeouts
+
+        Raises:
+            TransportTimeout: If connecting or reading times out
+            HTTPStatusError: If the origin answers with an error status
+            TransportError: For any other request failure
+        """
+        parts = urlsplit(url)
+        host = _host_key(parts.scheme, parts.hostname, parts.port)
+        self.stats.request(parts.scheme, host)
+        try:
+            with self._client.get(url, timeout=self._timeouts(budget), stream=True) as response:
+                response.raise_for_status()
+                yield TransportResponse(response.url, response.status_code, response.headers,
+                                        response.iter_content(CHUNK_SIZE))
+        except requests.HTTPError as e:
+            raise HTTPStatusError(str(e)) from e
+        except requests.Timeout as e:
+            raise TransportTimeout(str(e)) from e
+        except requests.ConnectionError as e:
+            # Read timeouts while the body streams surface as connection errors
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise TransportTimeout(str(e)) from e
+            raise TransportError(str(e)) from e
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+
+    def _timeouts(self, budget: Optional[float]) -> Tuple[float, float]:
+        """Connect and read timeouts, shortened to the request's remaining budget"""
+        if budget is None:
+            return self.connect_timeout, self.read_timeout
+        budget = max(budget, MIN_TIMEOUT)
+        return min(self.connect_timeout, budget), min(self.read_timeout, budget)
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Connections opened and requests sent per host since startup.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Counts keyed by host:port
+        """
+        return self.stats.snapshot()
+
+    def close(self):
+        self._client.close()
+
+class Http2Transport(HttpTransport):
+    protocol = 'HTTP/2'
+
+    def _build_client(self):
+        return httpx.Client(
+            http2=True,
+            headers={'User-Agent': USER_AGENT},
+            timeout=httpx.Timeout(connect=self.connect_timeout, read=self.read_timeout,
+                                  write=self.read_timeout, pool=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_hosts * self.pool_size,
+                                max_keepalive_connections=self.pool_hosts * self.pool_size),
+            follow_redirects=True,
+        )
+
+    @contextmanager
+    def stream(self, url: str, budget: Optional[float] = None) -> Iterator[TransportResponse]:
+        parts = urlsplit(url)
+        host = _host_key(parts.scheme, parts.hostname, parts.port)
+        self.stats.request(parts.scheme, host)
+        # httpcore reports each new connection through the trace extension
+        def trace(event: str, info: Dict):
+            if event == 'connection.connect_tcp.complete':
+                self.stats.connection(parts.scheme, host)
+
+        connect, read = self._timeouts(budget)
+        timeout = httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+        request = self._client.build_request('GET', url, timeout=timeout, extensions={'trace': trace})
+        response = self._send(request)
+        try:
+            response.raise_for_status()
+            yield TransportResponse(str(response.url), response.status_code, response.headers,
+                                    response.iter_bytes(CHUNK_SIZE))
+        except httpx.HTTPStatusError as e:
+            raise HTTPStatusError(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise TransportTimeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+        finally:
+            response.close()
+
+    def _send(self, request):
+        for attempt in range(self.retries + 1):
+            try:
+                return self._client.send(request, stream=True)
+            except httpx.ConnectError as e:
+                if attempt == self.retries:
+                    raise TransportError(str(e)) from e
+                RETRIES.inc(operation='fetch')
+            except httpx.TimeoutException as e:
+                raise TransportTimeout(str(e)) from e
+            except httpx.HTTPError as e:
+                raise TransportError(str(e)) from e
+
+def create_transport(http2: bool = False, **kwargs) -> HttpTransport:
+    """Build the HTTP/2 transport when asked for and installed, otherwise the HTTP/1.1 one"""
+    if http2 and httpx is not None:
+        return Http2Transport(**kwargs)
+    return HttpTransport(**kwargs)
+
+http_transport = create_transport(
+    http2=get_settings().http2_enabled,
+    pool_hosts=get_settings().http_pool_hosts,
+    pool_size=get_settings().http_pool_size,
+    connect_timeout=get_settings().http_connect_timeout,
+    read_timeout=get_settings().http_read_timeout,
+    retries=get_settings().http_retries
+)
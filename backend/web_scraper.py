@@ -1,30 +1,63 @@
 """
 Web scraper module for fetching web content.
-Uses requests for HTTP requests and BeautifulSoup for HTML parsing.
+Uses the pooled HTTP transport for requests and BeautifulSoup for HTML parsing.
 """
-import requests
+import time
 from bs4 import BeautifulSoup
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 from backend.validators import validate_url
 from backend.security import check_url_security
+from backend.content_types import classify, media_type, read_feed
+from backend.charset import decode
+from backend.transport import HttpTransport, TransportError, TransportTimeout, http_transport
+from backend.deadline import Deadline
+from backend.result_model import Headers
+from backend.archive import ArchiveReader, WarcWriter, fetch_archive
+from backend.config import get_settings
+
+class BodyTooLarge(TransportError):
+    """The response body is larger than the scraper reads"""
+
+def _collect(chunks: Iterable[bytes], parts: List[bytes]) -> Iterator[bytes]:
+    """Pass chunks through, keeping a copy of each"""
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
 
 class WebScraper:
-    def __init__(self, timeout: int = 30):
-        self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    # Whether pages come from somewhere other than the network, e.g. an archive
+    offline = False
+
+    def __init__(self, timeout: Optional[float] = None, transport: Optional[HttpTransport] = None,
+                 archive: Optional[WarcWriter] = None, max_body_bytes: Optional[int] = None):
+        """
+        Args:
+            timeout (Optional[float]): Seconds a whole fetch may take, body included
+            transport (Optional[HttpTransport]): Connection pools to fetch through; shared by default
+            archive (Optional[WarcWriter]): Where fetched responses are archived; the configured
+                ARCHIVE_DIR archive by default, if any
+            max_body_bytes (Optional[int]): Largest body read, after decompression; MAX_BODY_BYTES
+                if None, no limit if 0
+        """
+        self.timeout = timeout if timeout is not None else get_settings().http_total_timeout
+        self.transport = transport or http_transport
+        self.archive = archive or fetch_archive
+        self.max_body_bytes = max_body_bytes if max_body_bytes is not None else get_settings().max_body_bytes
 
-    def fetch_page(self, url: str) -> Optional[Dict]:
+    def fetch_page(self, url: str, include_headers: bool = True,
+                   deadline: Optional[Deadline] = None) -> Optional[Dict]:
         """
         Fetches a webpage and returns its content.
         
         Args:
             url (str): The URL to fetch
+            include_headers (bool): Whether to copy the response headers into the result
+            deadline (Optional[Deadline]): Request deadline; the fetch stops when it passes
             
         Returns:
-            Dict containing status, content, and error message if any
+            Dict containing status, content kind and body, and error message if any.
+            HTML and text pages carry decoded `content`, PDFs raw `body` bytes and feeds
+            their parsed `records`. Bodies over max_body_bytes are an error.
         """
         try:
             # Validate URL format and security
@@ -34,21 +67,90 @@ class WebScraper:
             if not check_url_security(url):
                 return {"status": "error", "error": "URL failed security check"}
 
-            # Fetch the page
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            # Fetch the headers first; the body is only downloaded for supported types
+            deadline = deadline or Deadline.unbounded()
+            budget = deadline.clip(self.timeout)
+            stop_at = time.monotonic() + budget
+            with self.transport.stream(url, budget) as response:
+                content_type = response.headers.get('Content-Type', '')
+                if classify(content_type) is None:
+                    return {"status": "error", "error": f"Unsupported content type: {media_type(content_type)}"}
+                length = response.headers.get('Content-Length', '')
+                if self.max_body_bytes and length.isdigit() and int(length) > self.max_body_bytes:
+                    raise BodyTooLarge(f"Response body is larger than {self.max_body_bytes} bytes")
+                headers = Headers.from_items(response.headers.items())
+                chunks = self._iter_body(response.chunks, stop_at, deadline)
+                parts = None
+                if self.archive is not None:
+                    parts = []
+                    chunks = _collect(chunks, parts)
+                result = self._page_result(response.url, response.status_code, headers, chunks, include_headers)
+                if parts is not None and result["status"] == "success":
+                    # The archive keeps the whole response, also past the feed items that were parsed
+                    for _ in chunks:
+                        pass
+                    self.archive.write(response.url, response.status_code, headers, b''.join(parts),
+                                       requested_url=url)
+            return result
 
-            return {
-                "status": "success",
-                "content": response.text,
-                "status_code": response.status_code,
-                "headers": dict(response.headers)
-            }
-
-        except requests.Timeout:
+        except TransportTimeout:
             return {"status": "error", "error": "Request timed out"}
-        except requests.RequestException as e:
+        except TransportError as e:
             return {"status": "error", "error": str(e)}
+
+    def _page_result(self, url: str, status_code: int, headers: Headers,
+                     body: Union[bytes, Iterable[bytes]], include_headers: bool) -> Dict:
+        """
+        Classify and decode a response body into the fetch_page result.
+
+        The body may be the chunks of a download in progress: feeds are parsed
+        from them as they arrive, other types are read whole first.
+        """
+        content_type = headers.get('Content-Type', '')
+        kind = classify(content_type)
+        if kind is None:
+            return {"status": "error", "error": f"Unsupported content type: {media_type(content_type)}"}
+        result = {
+            "status": "success",
+            "url": url,
+            "kind": kind,
+            "status_code": status_code,
+            "headers": headers if include_headers else Headers()
+        }
+        if kind in ('feed', 'xml'):
+            records = read_feed((body,) if isinstance(body, bytes) else body, sniff=kind == 'xml')
+            if records is None:
+                return {"status": "error", "error": f"Unsupported content type: {media_type(content_type)}"}
+            result["kind"] = 'feed'
+            result["records"] = records
+            return result
+        if not isinstance(body, bytes):
+            body = b''.join(body)
+        if kind in ('html', 'text'):
+            # html.parser works on str, so decode once with the resolved charset
+            result["content"], result["encoding"] = decode(body, content_type)
+            return result
+        result["body"] = body
+        return result
+
+    def _iter_body(self, chunks: Iterable[bytes], stop_at: float, deadline: Deadline) -> Iterator[bytes]:
+        """
+        Pass on the (already decompressed) body chunks, giving up once the total
+        timeout has passed or the body outgrows max_body_bytes.
+
+        Raises:
+            TransportTimeout: If the body takes too long
+            BodyTooLarge: If the body is too large
+        """
+        received = 0
+        for chunk in chunks:
+            received += len(chunk)
+            if self.max_body_bytes and received > self.max_body_bytes:
+                raise BodyTooLarge(f"Response body is larger than {self.max_body_bytes} bytes")
+            yield chunk
+            # Cancelling the request deadline also stops a download in progress
+            if time.monotonic() > stop_at or deadline.cancelled:
+                raise TransportTimeout(f"Body not received within {self.timeout} seconds")
         
     def get_soup(self, html_content: str) -> BeautifulSoup:
         """
@@ -62,3 +164,29 @@ class WebScraper:
         """
         return BeautifulSoup(html_content, 'html.parser')
 
+class ReplayScraper(WebScraper):
+    """Serves pages from a WARC archive instead of the network"""
+    offline = True
+
+    def __init__(self, reader: ArchiveReader):
+        """
+        Args:
+            reader (ArchiveReader): Archive to replay
+        """
+        super().__init__()
+        self.reader = reader
+        # Replayed pages are already archived
+        self.archive = None
+
+    def fetch_page(self, url: str, include_headers: bool = True,
+                   deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """
+        Looks up the latest archived capture of a URL.
+
+        Takes the same arguments and returns the same result as WebScraper.fetch_page.
+        """
+        entry = self.reader.lookup(url)
+        if entry is None:
+            return {"status": "error", "error": f"Not in archive: {url}"}
+        response = self.reader.read(entry)
+        return self._page_result(response.url, response.status_code, response.headers, response.body, include_headers)
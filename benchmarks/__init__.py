@@ -0,0 +1,3 @@
+"""
+Offline benchmark suite with a local fixture web server.
+"""
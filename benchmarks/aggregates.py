@@ -0,0 +1,98 @@
+"""
+Benchmark for batch aggregates.
+
+Builds synthetic AnalysisResult records, as the result store keeps them,
+spread over a few hundred hosts with some failures. It then times
+ResultAggregator over all of them, split into reading the results into
+columns and computing the rollups.
+
+Usage:
+    python -m benchmarks.aggregates [--results N] [--repeat N] [--output PATH] [--max-seconds S]
+"""
+from typing import Dict, List
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = REPO_ROOT / "benchmarks" / "results" / "aggregates.json"
+
+SENTIMENTS = ("positive", "neutral", "negative")
+TOPICS = ("pricing", "security", "performance", "hiring", "release", "outage", "research", "events")
+
+def build_results(count: int, hosts: int = 500, seed: int = 11) -> List:
+    """Synthetic analysis results, about 5% of them failed fetches"""
+    from backend.result_model import Analysis, AnalysisResult, PageContent, PageMetadata
+
+    rng = random.Random(seed)
+    results = []
+    for i in range(count):
+        url = f"https://site{i % hosts}.example.com/article/{i}"
+        if rng.random() < 0.05:
+            results.append(AnalysisResult.failure(url, "Request timed out"))
+            continue
+        results.append(AnalysisResult(
+            url=url,
+            content=PageContent(title=f"Article {i}", main_content="", word_count=rng.randint(50, 4000)),
+            analysis=Analysis(sentiment=rng.choice(SENTIMENTS), topics=tuple(rng.sample(TOPICS, 2))),
+            metadata=PageMetadata(status_code=200, timings={
+                "fetch": round(rng.lognormvariate(4.5, 0.6), 3), "total": round(rng.lognormvariate(5.2, 0.5), 3)
+            }),
+        ))
+    return results
+
+def run(count: int, repeat: int) -> Dict[str, float]:
+    """
+    Time aggregation of `count` results, best of `repeat` runs.
+
+    Returns:
+        Dict[str, float]: Seconds spent building columns, computing rollups and in total
+    """
+    from backend.aggregates import ResultAggregator, ResultColumns
+
+    results = build_results(count)
+    aggregator = ResultAggregator()
+    columns_seconds = rollup_seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        columns = ResultColumns(results)
+        built = time.perf_counter()
+        aggregator.aggregate(columns)
+        done = time.perf_counter()
+        columns_seconds = min(columns_seconds, built - start)
+        rollup_seconds = min(rollup_seconds, done - built)
+    return {
+        "results": count,
+        "columns_seconds": round(columns_seconds, 4),
+        "rollup_seconds": round(rollup_seconds, 4),
+        "total_seconds": round(columns_seconds + rollup_seconds, 4),
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time batch aggregates over synthetic results")
+    parser.add_argument("--results", type=int, default=100_000, help="Results to aggregate")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs; the fastest is reported")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail when aggregation takes longer")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(REPO_ROOT))
+    report = run(args.results, args.repeat)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"{report['results']:,} results aggregated in {report['total_seconds'] * 1000:.0f} ms "
+          f"(columns {report['columns_seconds'] * 1000:.0f} ms, rollups {report['rollup_seconds'] * 1000:.0f} ms)")
+    print(f"\nResults written to {output}")
+
+    if args.max_seconds is not None and report["total_seconds"] > args.max_seconds:
+        print(f"Aggregation exceeds {args.max_seconds}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Deterministic corpus of HTML pages used by the benchmark fixture server.
+"""
+from typing import Dict
+import random
+
+WORDS = (
+    "analysis content web page search engine performance network latency article "
+    "research market product customer service design review report data python "
+    "system update release security feature guide tutorial news science"
+).split()
+
+def _sentence(rng: random.Random, length: int = 14) -> str:
+    words = [rng.choice(WORDS) for _ in range(length)]
+    return " ".join(words).capitalize() + "."
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "\n".join(
+        f"<p>{' '.join(_sentence(rng) for _ in range(4))}</p>" for _ in range(count)
+    )
+
+def _page(title: str, body: str, head: str = "") -> str:
+    return (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+        f"<title>{title}</title><meta name=\"description\" content=\"{title} benchmark page\">{head}</head>"
+        f"<body><header><nav><a href=\"/\">Home</a><a href=\"/about\">About</a></nav></header>"
+        f"{body}<footer><p>Footer text</p></footer></body></html>"
+    )
+
+def small_page() -> str:
+    rng = random.Random(1)
+    return _page("Small page", f"<article class=\"post-content\"><h1>Small</h1>{_paragraphs(rng, 3)}</article>")
+
+def huge_page() -> str:
+    rng = random.Random(2)
+    sections = "".join(
+        f"<section class=\"content\"><h2>Section {i}</h2>{_paragraphs(rng, 20)}</section>"
+        for i in range(60)
+    )
+    return _page("Huge page", f"<main class=\"main\">{sections}</main>")
+
+def nested_page(depth: int = 400) -> str:
+    rng = random.Random(3)
+    inner = _paragraphs(rng, 2)
+    body = "<div class=\"wrapper\">" * depth + inner + "</div>" * depth
+    return _page("Deeply nested page", body)
+
+def link_heavy_page(links: int = 5000) -> str:
+    rng = random.Random(4)
+    items = "".join(
+        f"<li><a href=\"/item/{i}?ref={rng.randint(0, 99)}\">{_sentence(rng, 4)}</a></li>"
+        for i in range(links)
+    )
+    return _page("Link heavy page", f"<div class=\"content\"><ul>{items}</ul>{_paragraphs(rng, 5)}</div>")
+
+def malformed_page() -> str:
+    rng = random.Random(5)
+    body = (
+        "<div class=\"content\"><p>Unclosed paragraph <b>bold <i>italic</b> text</i>"
+        "<table><tr><td>cell<td>cell</tr><p>para in table</table>"
+        f"<div><span>{_sentence(rng)}<div></span></p></p>"
+        "<a href=\"/broken>broken link</a><img src=x onerror=>"
+        f"{_paragraphs(rng, 10)}<<>><!-- unterminated comment"
+    )
+    return f"<html><head><title>Malformed page</head><body>{body}"
+
+def slow_drip_page() -> str:
+    rng = random.Random(6)
+    return _page("Slow drip page", f"<article class=\"article\">{_paragraphs(rng, 8)}</article>")
+
+def build_corpus() -> Dict[str, str]:
+    """
+    Build the benchmark corpus.
+
+    Returns:
+        Dict[str, str]: Page name to HTML document
+    """
+    return {
+        "small": small_page(),
+        "huge": huge_page(),
+        "nested": nested_page(),
+        "link_heavy": link_heavy_page(),
+        "malformed": malformed_page(),
+        "slow_drip": slow_drip_page(),
+    }
+
+# Pages the fixture server sends in small delayed chunks
+SLOW_PAGES = {"slow_drip"}
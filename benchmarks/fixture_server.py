@@ -0,0 +1,125 @@
+"""
+Local HTTP server serving the benchmark corpus and a stub LLM endpoint.
+"""
+from typing import Callable, Dict, Optional
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.corpus import SLOW_PAGES, build_corpus
+
+# Canned analysis returned by the stub chat completion endpoint
+STUB_ANALYSIS = {
+    "title": "Benchmark page",
+    "summary": "A generated page used for benchmarking.",
+    "key_points": ["Generated content", "Deterministic corpus"],
+    "sentiment": "neutral",
+    "topics": ["benchmark"],
+    "readability": "moderate",
+    "suggestions": ["None"]
+}
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+    server: "FixtureServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        name = self.path.split("?")[0].rsplit("/", 1)[-1]
+        page = self.server.pages.get(name)
+        if not self.path.startswith("/pages/") or page is None:
+            self._send(404, b"not found", "text/plain")
+            return
+        body = page.encode("utf-8")
+        if name not in SLOW_PAGES:
+            self._send(200, body, "text/html; charset=utf-8")
+            return
+
+        # Drip the body out in chunks to exercise slow origins
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        chunk_size = max(1, len(body) // self.server.drip_chunks)
+        for start in range(0, len(body), chunk_size):
+            self.wfile.write(body[start:start + chunk_size])
+            self.wfile.flush()
+            time.sleep(self.server.drip_delay)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, b"not found", "text/plain")
+            return
+        time.sleep(self.server.llm_delay)
+        completion = {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "benchmark-stub",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(STUB_ANALYSIS)}
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+        self._send(200, json.dumps(completion).encode(), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages: Optional[Dict[str, str]] = None, drip_chunks: int = 5,
+                 drip_delay: float = 0.02, llm_delay: float = 0.0,
+                 handler: Callable[..., BaseHTTPRequestHandler] = _FixtureHandler):
+        """
+        Args:
+            pages (Optional[Dict[str, str]]): Page name to HTML; the benchmark corpus if None
+            drip_chunks (int): Chunks slow pages are sent in
+            drip_delay (float): Seconds between chunks of a slow page
+            llm_delay (float): Seconds the stub completion endpoint takes
+            handler (Callable[..., BaseHTTPRequestHandler]): Request handler; tests pass their own
+                to serve other routes from the same loopback server
+        """
+        super().__init__(("127.0.0.1", 0), handler)
+        self.pages = pages if pages is not None else build_corpus()
+        self.drip_chunks = drip_chunks
+        self.drip_delay = drip_delay
+        self.llm_delay = llm_delay
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def origin(self) -> str:
+        return f"http://{self.host}"
+
+    def page_url(self, name: str) -> str:
+        return f"http://{self.host}/pages/{name}"
+
+    @property
+    def llm_base_url(self) -> str:
+        return f"http://{self.host}/v1"
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
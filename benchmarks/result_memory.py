@@ -0,0 +1,172 @@
+"""
+Memory benchmark for analysis results.
+
+Builds the same results twice from the benchmark corpus, once in the
+nested-dict shape the API returns and once as AnalysisResult records,
+keeps all of them alive and reports the memory each representation holds
+per result and the number of live heap blocks (objects) behind it.
+
+Usage:
+    python -m benchmarks.result_memory [--results N] [--output PATH] [--max-ratio FRACTION]
+"""
+from typing import Callable, Dict, List
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = REPO_ROOT / "benchmarks" / "results" / "result_memory.json"
+
+# Header block of a typical origin; only Date and ETag change between responses
+HEADER_BLOCK = (
+    "Server: nginx\r\n"
+    "Date: Mon, 06 Jan 2025 10:{minute:02d}:{second:02d} GMT\r\n"
+    "Content-Type: text/html; charset=utf-8\r\n"
+    "Content-Encoding: gzip\r\n"
+    "Connection: keep-alive\r\n"
+    "Vary: Accept-Encoding\r\n"
+    "Cache-Control: max-age=0, private, must-revalidate\r\n"
+    "ETag: W/\"{etag:08x}-benchmark\"\r\n"
+    "X-Frame-Options: SAMEORIGIN\r\n"
+    "X-Content-Type-Options: nosniff\r\n"
+    "Strict-Transport-Security: max-age=31536000; includeSubDomains\r\n"
+    "Referrer-Policy: strict-origin-when-cross-origin\r\n"
+)
+
+def _headers(i: int) -> Dict[str, str]:
+    """Headers parsed from the wire, so every response has its own strings as in a real fetch"""
+    raw = HEADER_BLOCK.format(minute=i % 60, second=i % 59, etag=i).encode("latin-1")
+    return dict(line.split(": ", 1) for line in raw.decode("latin-1").split("\r\n") if line)
+
+def _page_builders() -> Dict[str, Callable[[], str]]:
+    from benchmarks.corpus import link_heavy_page, small_page
+    return {
+        "small": small_page,
+        "links_100": lambda: link_heavy_page(100),
+        "links_1000": lambda: link_heavy_page(1000),
+    }
+
+def build_results(html: str, count: int, records: bool) -> List:
+    """
+    Run extraction and analysis for one page `count` times.
+
+    Args:
+        html (str): Page to analyze
+        count (int): Results to build
+        records (bool): Build AnalysisResult records instead of nested dicts
+
+    Returns:
+        List: The results, each built from a fresh parse so nothing is shared between them
+    """
+    from bs4 import BeautifulSoup
+    from backend.ai_analysis_service import AIAnalysisService
+    from backend.content_extractor import ContentExtractor
+    from backend.result_model import Analysis, AnalysisResult, PageMetadata
+
+    extractor = ContentExtractor(max_links=1000)
+    analyzer = AIAnalysisService()
+    results = []
+    for i in range(count):
+        soup = BeautifulSoup(html, "html.parser")
+        url = f"https://site{i % 20}.example.com/page/{i}"
+        if records:
+            content = extractor.extract_page(soup, base_url=url)
+            result = AnalysisResult(
+                status="success", url=url, content=content,
+                metadata=PageMetadata(status_code=200, content_kind="html", encoding="utf-8", headers=_headers(i))
+            )
+            result.analysis = Analysis.from_dict(analyzer.analyze_content(result))
+        else:
+            content = extractor.extract_content(soup, base_url=url)
+            result = {
+                "status": "success",
+                "url": url,
+                "content": content,
+                "metadata": {"status_code": 200, "content_kind": "html", "encoding": "utf-8",
+                             "headers": _headers(i)},
+            }
+            result["analysis"] = analyzer.analyze_content(result)
+        results.append(result)
+    return results
+
+def measure_retained(html: str, count: int, records: bool) -> Dict[str, float]:
+    """
+    Memory and heap blocks held by `count` results of one representation.
+
+    Returns:
+        Dict[str, float]: Bytes and live heap blocks per result
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        results = build_results(html, count, records)
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del results
+    stats = snapshot.statistics("filename")
+    return {
+        "bytes_per_result": round(sum(stat.size for stat in stats) / count),
+        "blocks_per_result": round(sum(stat.count for stat in stats) / count, 1),
+    }
+
+def run(count: int) -> Dict[str, Dict[str, float]]:
+    """
+    Compare both representations for every page in the benchmark.
+
+    Args:
+        count (int): Results kept alive per page and representation
+
+    Returns:
+        Dict[str, Dict[str, float]]: Page name to per-result figures and the record/dict ratio
+    """
+    report = {}
+    for name, build in _page_builders().items():
+        html = build()
+        # Warm up imports and caches so they are not charged to either side
+        build_results(html, 1, True)
+        build_results(html, 1, False)
+        as_dicts = measure_retained(html, count, records=False)
+        as_records = measure_retained(html, count, records=True)
+        report[name] = {
+            "dict_bytes_per_result": as_dicts["bytes_per_result"],
+            "record_bytes_per_result": as_records["bytes_per_result"],
+            "ratio": round(as_records["bytes_per_result"] / as_dicts["bytes_per_result"], 3),
+            "dict_blocks_per_result": as_dicts["blocks_per_result"],
+            "record_blocks_per_result": as_records["blocks_per_result"],
+        }
+    return report
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare result memory as dicts and as records")
+    parser.add_argument("--results", type=int, default=50, help="Results kept alive per page")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--max-ratio", type=float, default=None,
+                        help="Fail when records use more than this fraction of the dict memory on any page")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(REPO_ROOT))
+    report = run(args.results)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    for name, stats in report.items():
+        print(f"{name:12} dict {stats['dict_bytes_per_result']:>9,} B  record {stats['record_bytes_per_result']:>9,} B"
+              f"  ratio {stats['ratio']:.2f}  heap blocks {stats['dict_blocks_per_result']:>8} -> "
+              f"{stats['record_blocks_per_result']}")
+    print(f"\nResults written to {output}")
+
+    if args.max_ratio is not None:
+        over = [name for name, stats in report.items() if stats["ratio"] > args.max_ratio]
+        if over:
+            print(f"Records exceed {args.max_ratio:.0%} of the dict memory for: {', '.join(over)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Offline benchmark suite for the analysis pipeline.
+
+Starts a local fixture server, measures latency percentiles and throughput
+for parsing, extraction, fetching, the API endpoints, the LLM client and
+exports, writes the results as JSON and fails on regressions against a
+stored baseline.
+
+Usage:
+    python -m benchmarks.run_benchmarks [--iterations N] [--output PATH]
+        [--baseline PATH] [--tolerance FRACTION] [--min-delta-ms MS] [--update-baseline]
+"""
+from typing import Callable, Dict, List
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = REPO_ROOT / "benchmarks" / "baseline.json"
+DEFAULT_OUTPUT = REPO_ROOT / "benchmarks" / "results" / "latest.json"
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Time repeated calls to a function.
+
+    Args:
+        fn (Callable[[], object]): Operation to benchmark
+        iterations (int): Number of timed calls
+        warmup (int): Untimed calls made first
+
+    Returns:
+        Dict[str, float]: Latency percentiles in milliseconds and throughput
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "iterations": iterations,
+        "mean_ms": round(total / iterations, 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "ops_per_sec": round(iterations / (total / 1000), 2) if total else 0.0,
+    }
+
+def synthetic_results(count: int) -> List[Dict]:
+    """Analysis results shaped like /batch output, for export benchmarks"""
+    return [{
+        "status": "success",
+        "url": f"https://site{i % 50}.example.com/page/{i}",
+        "content": {
+            "title": f"Page {i}",
+            "main_content": "Benchmark content " * 200,
+            "meta_description": "Benchmark page",
+            "links": [{"text": f"Link {j}", "href": f"/page/{j}"} for j in range(20)],
+        },
+        "analysis": {
+            "title": f"Page {i}",
+            "summary": "Generated summary for benchmarking.",
+            "sentiment": ("positive", "neutral", "negative")[i % 3],
+            "key_points": ["Point one", "Point two", "Point three"],
+            "topics": ["benchmark", "export"],
+            "suggestions": ["Suggestion"],
+            "confidence_score": 0.8,
+        },
+        "metadata": {"status_code": 200},
+    } for i in range(count)]
+
+def run_suite(iterations: int) -> Dict[str, Dict[str, float]]:
+    """
+    Run every benchmark scenario against a fresh fixture server.
+
+    Args:
+        iterations (int): Timed iterations per scenario
+
+    Returns:
+        Dict[str, Dict[str, float]]: Scenario name to latency statistics
+    """
+    from benchmarks.fixture_server import FixtureServer
+
+    results = {}
+    with FixtureServer() as server:
+        os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY", "benchmark-key")
+        os.environ["OPENAI_BASE_URL"] = server.llm_base_url
+
+        from fastapi.testclient import TestClient
+        from backend.security import get_security_checker
+        from backend.web_scraper import WebScraper
+        from backend.content_extractor import ContentExtractor
+        from backend.export_service import ExportService
+        from frontend.app import app
+
+        # The fixture server lives on loopback, which the SSRF check blocks; resolve it as a
+        # documentation address instead
+        checker = get_security_checker()
+        resolve = checker.resolve
+        checker.resolve = lambda host: "203.0.113.10" if host == "127.0.0.1" else resolve(host)
+
+        scraper = WebScraper()
+        extractor = ContentExtractor()
+        for name, html in server.pages.items():
+            results[f"parse/{name}"] = measure(lambda: scraper.get_soup(html), iterations)
+            # Extraction mutates the soup, so each iteration parses a fresh copy
+            results[f"parse_extract/{name}"] = measure(
+                lambda: extractor.extract_content(scraper.get_soup(html)), iterations
+            )
+            url = server.page_url(name)
+            results[f"fetch/{name}"] = measure(lambda: scraper.fetch_page(url), iterations)
+
+        with TestClient(app) as client:
+            for name in server.pages:
+                url = server.page_url(name)
+                results[f"analyze/{name}"] = measure(
+                    lambda: client.post("/analyze", json={"url": url}).raise_for_status(), iterations
+                )
+            urls = [server.page_url(name) for name in server.pages]
+            results["batch/corpus"] = measure(
+                lambda: client.post("/batch", json={"urls": urls}).raise_for_status(), iterations
+            )
+
+        results.update(_llm_benchmarks(iterations))
+
+        export_service = ExportService()
+        table = synthetic_results(5000)
+        for fmt in ("csv", "ndjson", "json"):
+            results[f"export/{fmt}_5000"] = measure(
+                lambda: sum(len(chunk) for chunk in export_service.iter_export(table, fmt)), iterations
+            )
+        try:
+            results["export/parquet_5000"] = measure(
+                lambda: export_service.to_parquet(table, io.BytesIO()), iterations
+            )
+        except RuntimeError:
+            # pyarrow is not installed
+            pass
+        report = table[:100]
+        results["export/pdf_100"] = measure(lambda: export_service.to_pdf(report), max(1, iterations // 5))
+    return results
+
+def _llm_benchmarks(iterations: int) -> Dict[str, Dict[str, float]]:
+    """Time AIService against the stub completion endpoint, if the client is installed"""
+    try:
+        from backend.ai_service import AIService
+    except ImportError:
+        return {}
+    service = AIService()
+    loop = asyncio.new_event_loop()
+    try:
+        return {"llm/stub": measure(
+            lambda: loop.run_until_complete(service.analyze_text("Benchmark text")), iterations
+        )}
+    finally:
+        loop.close()
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float, min_delta_ms: float = 5.0) -> List[str]:
+    """
+    Find scenarios whose median latency regressed beyond the tolerance.
+
+    Args:
+        results (Dict): Current scenario statistics
+        baseline (Dict): Stored scenario statistics
+        tolerance (float): Allowed slowdown as a fraction, e.g. 0.5 for 50%
+        min_delta_ms (float): Slowdowns smaller than this are treated as timer noise
+
+    Returns:
+        List[str]: Human-readable regression descriptions
+    """
+    regressions = []
+    for name, stats in sorted(results.items()):
+        reference = baseline.get(name)
+        if not reference or not reference.get("p50_ms"):
+            continue
+        limit = max(reference["p50_ms"] * (1 + tolerance), reference["p50_ms"] + min_delta_ms)
+        if stats["p50_ms"] > limit:
+            regressions.append(
+                f"{name}: p50 {stats['p50_ms']:.2f}ms exceeds baseline "
+                f"{reference['p50_ms']:.2f}ms by more than {tolerance:.0%}"
+            )
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed p50 slowdown before a scenario counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="Ignore p50 slowdowns smaller than this many milliseconds")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the new baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    # frontend.app resolves its static and template directories from the repo root
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, str(REPO_ROOT))
+
+    results = run_suite(args.iterations)
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    for name, stats in sorted(results.items()):
+        print(f"{name:32} p50 {stats['p50_ms']:10.2f}ms  p99 {stats['p99_ms']:10.2f}ms  {stats['ops_per_sec']:10.2f} ops/s")
+    print(f"\nResults written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline updated at {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("No baseline found; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(
+        results, json.loads(baseline_path.read_text())["results"], args.tolerance, args.min_delta_ms
+    )
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
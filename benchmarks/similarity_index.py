@@ -0,0 +1,115 @@
+"""
+Query benchmark for the similarity index.
+
+Fills a scratch index with synthetic embeddings, loaded in bulk the way
+`python -m backend.similarity` loads backfill output. The embeddings are
+topic clusters with a near-duplicate planted for each query page. The
+benchmark reports query latency, how often each planted duplicate is found,
+and recall@10 against an exact scan of the whole matrix.
+
+Usage:
+    python -m benchmarks.similarity_index [--pages N] [--queries N] [--output PATH] [--max-p99-ms MS]
+"""
+from typing import Dict, List
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = REPO_ROOT / "benchmarks" / "results" / "similarity_index.json"
+CHUNK = 100_000
+
+def _unit(np, vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def run(pages: int, queries: int, dim: int = 256, topics: int = 2000, seed: int = 7) -> Dict[str, float]:
+    """
+    Build an index of `pages` synthetic pages and time `queries` lookups in it.
+
+    Returns:
+        Dict[str, float]: Build time, latency percentiles in milliseconds, duplicate hit rate and recall@10
+    """
+    import numpy as np
+    from backend.similarity import SimilarityIndex
+
+    rng = np.random.default_rng(seed)
+    centers = _unit(np, rng.standard_normal((topics, dim)).astype(np.float32))
+    directory = tempfile.mkdtemp(prefix="similarity-bench-")
+    try:
+        index = SimilarityIndex(directory, dim)
+        start = time.perf_counter()
+        for offset in range(0, pages, CHUNK):
+            count = min(CHUNK, pages - offset)
+            topic = rng.integers(0, topics, count)
+            vectors = _unit(np, centers[topic] + rng.standard_normal((count, dim)).astype(np.float32) / np.sqrt(dim))
+            index.add_vectors([f"https://site.example/{offset + i}" for i in range(count)], vectors)
+        # Each query page gets a near-duplicate, as a re-published or re-crawled copy would be
+        query_rows = rng.choice(pages, queries, replace=False)
+        originals = np.asarray(index._vectors[query_rows], dtype=np.float32)
+        copies = _unit(np, originals + 0.25 * rng.standard_normal(originals.shape).astype(np.float32) / np.sqrt(dim))
+        index.add_vectors([f"https://copy.example/{row}" for row in query_rows], copies)
+        build_seconds = time.perf_counter() - start
+        # The first query sorts the LSH tables; that is part of loading, not of answering
+        index.similar(url=f"https://site.example/{query_rows[0]}", limit=10)
+
+        latencies = []
+        found = 0
+        recall = 0.0
+        matrix = None
+        for row in query_rows:
+            url = f"https://site.example/{row}"
+            start = time.perf_counter()
+            neighbors = index.similar(url=url, limit=10)
+            latencies.append(time.perf_counter() - start)
+            urls = [neighbor.url for neighbor in neighbors]
+            found += f"https://copy.example/{row}" in urls
+            if matrix is None:
+                matrix = np.asarray(index._vectors[:index._rows], dtype=np.float32)
+            scores = matrix @ matrix[row]
+            scores[row] = -1
+            exact = {index._urls[i] for i in np.argpartition(-scores, 10)[:10]}
+            recall += len(exact.intersection(urls)) / 10
+        index.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "pages": pages + queries,
+        "build_seconds": round(build_seconds, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "duplicate_hit_rate": round(found / queries, 3),
+        "recall_at_10": round(recall / queries, 3),
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark similarity queries on a large synthetic index")
+    parser.add_argument("--pages", type=int, default=1_000_000, help="Pages in the index")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to time")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Fail when p99 query latency exceeds this")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(REPO_ROOT))
+    report = run(args.pages, args.queries)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"{report['pages']:,} pages built in {report['build_seconds']}s; query p50 {report['p50_ms']} ms, "
+          f"p99 {report['p99_ms']} ms; duplicates found {report['duplicate_hit_rate']:.0%}, "
+          f"recall@10 {report['recall_at_10']:.0%}")
+    print(f"\nResults written to {output}")
+
+    if args.max_p99_ms is not None and report["p99_ms"] > args.max_p99_ms:
+        print(f"p99 query latency exceeds {args.max_p99_ms} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,20 +2,80 @@
 FastAPI application for the Web Content Analyzer Pro API
 """
 from fastapi import FastAPI, Form, Request, Body
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, HttpUrl
-from typing import List, Optional
+from typing import List, Optional, Union
 from pathlib import Path
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import math
+import tempfile
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
 
 from backend.app import WebContentAnalyzer
+from backend.export_service import ExportService, STREAM_MEDIA_TYPES
+from backend.aggregates import ResultAggregator, batch_overview
+from backend.pdf_renderer import pdf_renderer
+from backend.config import get_settings
+from backend.export_jobs import ARTIFACT_TYPES, ArtifactStore, ExportJobManager, ResultStore
+from backend.crawler import CheckpointStore, CrawlManager, Crawler
+from backend.render_tier import browser_pool
+from backend.transport import http_transport
+from backend.archive import fetch_archive
+from backend.similarity import create_similarity_index
+from backend.admission import Overloaded, create_admission_controller
+from backend.deadline import DEADLINE_HEADER, Deadline
+from backend.response_profiles import ResponseProfile
+from backend.result_model import AnalysisResult, as_dict
+from backend.metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, registry, track_stage
+from backend.profiling import ProfileCoordinator, SamplingProfiler, current_profiler
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+class APIResponse(JSONResponse):
+    """JSON response serialized with orjson when it is installed"""
+    def render(self, content) -> bytes:
+        with track_stage("serialize"):
+            if orjson is None:
+                return super().render(content)
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+settings = get_settings()
+profile_coordinator = ProfileCoordinator(settings.profile_dir)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.profiling_enabled:
+        profile_coordinator.start()
+    # Opened here rather than at import: only the serving process writes to the index
+    analyzer.similarity = await run_in_threadpool(create_similarity_index)
+    yield
+    await crawls.shutdown()
+    analyzer.batch_executor.shutdown(wait=False, cancel_futures=True)
+    await run_in_threadpool(browser_pool.close)
+    http_transport.close()
+    if fetch_archive is not None:
+        fetch_archive.close()
+    if analyzer.similarity is not None:
+        analyzer.similarity.close()
+    await profile_coordinator.stop()
 
 app = FastAPI(
     title="Web Content Analyzer Pro API",
     description="Comprehensive website analysis with AI capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=APIResponse,
+    lifespan=lifespan
 )
 
 # Enable CORS
@@ -27,6 +87,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+started_at = time.time()
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency and in-flight count for every API request"""
+    HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Label by route template, not raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        HTTP_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """
+    Profile a single request when asked via `X-Profile: 1` or `?cpu_profile=1`.
+    
+    The response body is replaced by the collapsed stacks of the threads
+    serving the request: the event loop and the executor threads running its
+    analyses. The original status is kept in `X-Profiled-Status`.
+    """
+    requested = request.headers.get("x-profile") == "1" or request.query_params.get("cpu_profile") == "1"
+    if not requested or not settings.profiling_enabled:
+        return await call_next(request)
+
+    with SamplingProfiler(interval=0.001, thread_ids=[threading.get_ident()]) as profiler:
+        token = current_profiler.set(profiler)
+        try:
+            response = await call_next(request)
+            async for _ in response.body_iterator:
+                pass
+        finally:
+            current_profiler.reset(token)
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profiled-Status": str(response.status_code),
+            "X-Profile-Samples": str(profiler.samples),
+            "Content-Disposition": "attachment; filename=request.collapsed"
+        }
+    )
+
 # Mount static files for web interface
 static_path = Path("frontend/static")
 templates_path = Path("frontend/templates")
@@ -35,6 +148,19 @@ templates = Jinja2Templates(directory=str(templates_path))
 
 # Initialize analyzer
 analyzer = WebContentAnalyzer()
+export_service = ExportService()
+result_store = ResultStore(settings.result_store_size)
+aggregator = ResultAggregator()
+export_jobs = ExportJobManager(
+    result_store,
+    ArtifactStore(settings.artifact_dir, settings.artifact_max_bytes, settings.artifact_max_age),
+    export_service
+)
+admission = create_admission_controller()
+crawls = CrawlManager(Crawler(
+    analyzer, result_store, CheckpointStore(settings.crawl_dir), concurrency=settings.crawl_concurrency,
+    admission=admission
+))
 
 # Pydantic models for request/response validation
 class AnalyzeRequest(BaseModel):
@@ -45,6 +171,28 @@ class BatchAnalyzeRequest(BaseModel):
     urls: List[HttpUrl]
     custom_prompt: Optional[str] = None
 
+class ExportRequest(BaseModel):
+    results: List[dict]
+    columns: Optional[List[str]] = None
+
+class AggregateRequest(BaseModel):
+    results: Optional[List[dict]] = None
+    result_ids: Optional[List[str]] = None
+    top_topics: int = 10
+    max_hosts: int = 50
+
+class ExportJobRequest(BaseModel):
+    result_ids: List[str]
+    format: str = 'pdf'
+    columns: Optional[List[str]] = None
+
+class CrawlRequest(BaseModel):
+    seed: HttpUrl
+    max_depth: int = 2
+    max_pages: int = 100
+    use_sitemaps: bool = True
+    custom_prompt: Optional[str] = None
+
 # Web interface route
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -53,17 +201,39 @@ async def index(request: Request):
 
 # API endpoints
 @app.post("/analyze", summary="Comprehensive website analysis")
-async def analyze(request: AnalyzeRequest):
+async def analyze(request: AnalyzeRequest, http_request: Request, profile: Optional[str] = None,
+                  fields: Optional[str] = None, structured: bool = False, compact_links: bool = False):
     """
     Analyze a single website with AI-powered content analysis.
     
     - Extracts main content, metadata, and links
     - Performs AI analysis for insights
     - Validates URL and prevents SSRF attacks
+    - `profile=summary` drops the page body, links and headers; `fields=` projects dotted paths
+    - `structured=true` adds `content.document` (outline, blocks, page metadata) and `content.metadata`
+    - `compact_links=true` returns links column-wise with interned origins instead of one dict per link
+    - Answers 503 with `Retry-After` when saturated, and 429 when an `X-API-Key` is over its quota.
+      Requests without the header share one anonymous quota; the quota only holds tenants apart
+      behind a gateway that authenticates `X-API-Key`
+    - `X-Request-Timeout` (seconds) bounds the whole request; stages that no longer fit are skipped
+      and the result is marked `partial`, or carries `deadline_exceeded` naming the stage that ran out
     """
     try:
-        result = await analyzer.analyze_url(str(request.url), request.custom_prompt)
-        return JSONResponse(content=result)
+        response_profile = ResponseProfile.parse(profile, fields, structured, compact_links)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "error": str(e)})
+    deadline = _request_deadline(http_request)
+    try:
+        async with admission.admit("interactive", _api_key(http_request)):
+            result = await _until_disconnected(
+                http_request,
+                analyzer.analyze_url(str(request.url), request.custom_prompt, response_profile, deadline)
+            )
+        return APIResponse(content=_with_result_id(result))
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except ClientDisconnected:
+        return _disconnected_response()
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -71,69 +241,370 @@ async def analyze(request: AnalyzeRequest):
         )
 
 @app.post("/batch", summary="Batch website analysis")
-async def batch_analyze(request: BatchAnalyzeRequest):
+async def batch_analyze(request: BatchAnalyzeRequest, http_request: Request, profile: Optional[str] = None,
+                        fields: Optional[str] = None, structured: bool = False, compact_links: bool = False):
     """
     Analyze multiple websites in batch mode.
     
     - Process multiple URLs simultaneously
     - Same comprehensive analysis as single URL
     - Returns combined results
+    - Accepts the same `profile`, `fields`, `structured` and `compact_links` options as `/analyze`
+    - Runs in its own capacity pool and on its own threads, so batches cannot crowd out interactive requests
+    - Counts against the same per-`X-API-Key` quota as `/analyze`
+    - `X-Request-Timeout` bounds the whole batch, up to `BATCH_TIMEOUT_MAX`; URLs that do not fit
+      come back as deadline errors. Without it a batch runs until done, or for `BATCH_TIMEOUT` if set
     """
     try:
-        results = await analyzer.batch_analysis(
-            [str(url) for url in request.urls],
-            request.custom_prompt
-        )
-        return JSONResponse(content=results)
+        response_profile = ResponseProfile.parse(profile, fields, structured, compact_links)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "error": str(e)})
+    # Batches take far longer than an interactive request, so they have their own budget
+    deadline = _request_deadline(http_request, settings.batch_timeout or math.inf, settings.batch_timeout_max)
+    try:
+        async with admission.admit("batch", _api_key(http_request)):
+            results = await _until_disconnected(http_request, analyzer.batch_analysis(
+                [str(url) for url in request.urls],
+                request.custom_prompt,
+                response_profile,
+                concurrency=settings.batch_concurrency,
+                deadline=deadline
+            ))
+        return APIResponse(content=[_with_result_id(result) for result in results])
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except ClientDisconnected:
+        return _disconnected_response()
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"status": "error", "error": str(e)}
         )
 
-@app.post("/export-pdf")
-async def export_pdf(data: dict = Body(...)):
+def _overloaded_response(error: Overloaded) -> JSONResponse:
+    """Turn an admission rejection into a fast 503/429 the client can retry"""
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"status": "error", "error": str(error)},
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+# How often a running analysis checks whether its client is still connected
+DISCONNECT_POLL_INTERVAL = 0.1
+# Admission quota key shared by requests without an X-API-Key
+ANONYMOUS_API_KEY = "anonymous"
+
+class ClientDisconnected(Exception):
+    """The client went away before its analysis finished"""
+
+def _api_key(http_request: Request) -> str:
     """
-    Export analysis results to PDF
+    Key the per-key admission quota counts a request against.
+
+    Requests without X-API-Key share one anonymous key, so leaving the header
+    out does not skip the quota. The header itself is not checked here: only
+    a gateway that authenticates it stops a client from rotating keys.
+    """
+    return http_request.headers.get("x-api-key") or ANONYMOUS_API_KEY
+
+def _request_deadline(http_request: Request, default: Optional[float] = None,
+                      maximum: Optional[float] = None) -> Deadline:
+    """
+    The request's deadline, from X-Request-Timeout or a default.
+
+    Args:
+        http_request (Request): Incoming request
+        default (Optional[float]): Seconds allowed without the header; REQUEST_TIMEOUT if None
+        maximum (Optional[float]): Largest timeout the header may ask for; REQUEST_TIMEOUT_MAX if None
+    """
+    return Deadline.from_header(
+        http_request.headers.get(DEADLINE_HEADER),
+        settings.request_timeout if default is None else default,
+        settings.request_timeout_max if maximum is None else maximum
+    )
+
+async def _until_disconnected(http_request: Request, work):
     """
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from fastapi.responses import Response
-    import io
+    Await an analysis, cancelling it if the client disconnects first.
 
-    # Create PDF buffer
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
+    Cancelling stops this request waiting; work shared with other callers
+    keeps running until none of them is left.
+
+    Raises:
+        ClientDisconnected: If the client went away
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+def _disconnected_response() -> Response:
+    """499: nobody is left to read the result, so none is built"""
+    return Response(status_code=499)
+
+def _with_result_id(result: AnalysisResult) -> dict:
+    """Keep a result for later export jobs and return its JSON form tagged with its id"""
+    return {**as_dict(result), 'result_id': result_store.add(result)}
+
+@app.post("/export/{fmt}", summary="Streaming export of analysis results")
+async def export_results(fmt: str, request: ExportRequest):
+    """
+    Stream analysis results as CSV, NDJSON or a JSON array.
     
-    # Get data
-    analysis = data.get('analysis', {})
-    url = data.get('url', 'N/A')
+    - Rows are written as they are produced, so the first byte goes out immediately
+    - `columns` selects fields; heavy fields like `main_content` and `links` are opt-in
+    - `parquet` writes a typed columnar file; `columns` does not apply to it
+    """
+    if fmt == 'parquet':
+        return await _parquet_response(request.results)
+    try:
+        chunks = export_service.iter_export(request.results, fmt, request.columns)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "error": str(e)}
+        )
+    return StreamingResponse(
+        chunks,
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename=analysis_export.{fmt}'}
+    )
+
+async def _parquet_response(results: List[dict]) -> StreamingResponse:
+    """Render results to Parquet off the event loop and stream the file back"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        await run_in_threadpool(export_service.to_parquet, results, buffer)
+    except RuntimeError as e:
+        buffer.close()
+        return JSONResponse(
+            status_code=501,
+            content={"status": "error", "error": str(e)}
+        )
+    buffer.seek(0)
+
+    def chunks():
+        with buffer:
+            yield from iter(lambda: buffer.read(64 * 1024), b'')
+
+    return StreamingResponse(
+        chunks(),
+        media_type='application/vnd.apache.parquet',
+        headers={'Content-Disposition': 'attachment; filename=analysis_export.parquet'}
+    )
+
+@app.post("/export-pdf")
+async def export_pdf(data: Union[dict, List[dict]] = Body(...)):
+    """
+    Export one analysis result, or a list of results, to a paginated PDF.
+    A list starts with a batch overview of the aggregates /aggregate returns.
+    """
+    overview = await run_in_threadpool(batch_overview, data) if isinstance(data, list) else None
+    output = await pdf_renderer.render_async(data, overview)
+
+    def chunks():
+        with output:
+            yield from iter(lambda: output.read(64 * 1024), b'')
+
+    return StreamingResponse(
+        chunks(),
+        media_type='application/pdf',
+        headers={'Content-Disposition': 'attachment; filename=analysis_report.pdf'}
+    )
+
+@app.post("/aggregate", summary="Rollups over a batch of results")
+async def aggregate_results(request: AggregateRequest):
+    """
+    Summarize a batch of results by sentiment, topic and host.
     
-    # Draw content
-    p.drawString(50, 750, "Web Content Analysis Report")
-    p.drawString(50, 720, f"URL: {url}")
+    - Pass `result_ids` from a `/batch` or crawl run, or the `results` themselves
+    - Returns totals and error rate, the sentiment distribution, word-count and
+      fetch latency percentiles, the `top_topics` most frequent topics, and per
+      host (up to `max_hosts`) error rates and fetch/total latency percentiles
+    """
+    if (request.results is None) == (request.result_ids is None):
+        return JSONResponse(status_code=400, content={"status": "error", "error": "Pass either results or result_ids"})
+    if request.top_topics < 0 or request.max_hosts < 0:
+        return JSONResponse(status_code=400, content={"status": "error", "error": "top_topics and max_hosts must not be negative"})
+    try:
+        results = request.results if request.results is not None else result_store.get_many(request.result_ids)
+    except KeyError as e:
+        return JSONResponse(status_code=404, content={"status": "error", "error": e.args[0]})
+    try:
+        aggregates = await run_in_threadpool(aggregator.aggregate, results, request.top_topics, request.max_hosts)
+    except RuntimeError as e:
+        return JSONResponse(status_code=501, content={"status": "error", "error": str(e)})
+    return {"status": "success", "aggregates": aggregates}
+
+@app.post("/exports", summary="Start a background export job")
+async def create_export_job(request: ExportJobRequest):
+    """
+    Export stored results by id, without re-uploading them.
     
-    # Add analysis details
-    y_position = 700
-    for key, value in analysis.items():
-        if isinstance(value, (str, int, float)):
-            p.drawString(50, y_position, f"{key.title()}: {value}")
-            y_position -= 20
-        elif isinstance(value, list) and key in ['key_points', 'suggestions']:
-            p.drawString(50, y_position, f"{key.title()}:")
-            y_position -= 20
-            for item in value:
-                p.drawString(70, y_position, f"• {item}")
-                y_position -= 20
+    - `result_ids` come from the `result_id` field of `/analyze` and `/batch` responses
+    - Rendering happens in the background; poll the job and fetch `download_url`
+    - Identical exports are served from the artifact store without re-rendering
+    """
+    try:
+        job = await export_jobs.submit(request.result_ids, request.format, request.columns)
+    except KeyError as e:
+        return JSONResponse(status_code=404, content={"status": "error", "error": e.args[0]})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "error": str(e)})
+    return JSONResponse(status_code=202, content=_job_response(job))
+
+@app.get("/exports/{job_id}", summary="Export job status")
+async def get_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Unknown export job"})
+    return _job_response(job)
+
+@app.get("/exports/{job_id}/download", summary="Download an export artifact")
+async def download_export(job_id: str, request: Request):
+    """
+    Download a completed export.
     
-    p.save()
-    buffer.seek(0)
+    Supports conditional requests via `ETag`/`If-None-Match` and partial
+    downloads via a single `Range: bytes=start-end` header.
+    """
+    job = export_jobs.get(job_id)
+    path = export_jobs.artifact_path(job) if job else None
+    if path is None or not path.exists():
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Export not available"})
+
+    media_type, extension = ARTIFACT_TYPES[job.format]
+    etag = f'"{job.key}"'
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=31536000, immutable',
+        'Content-Disposition': f'attachment; filename=analysis_export.{extension}',
+    }
+    if etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+
+    size = path.stat().st_size
+    start, end = 0, size - 1
+    status_code = 200
+    range_header = request.headers.get('range')
+    # Multi-range requests are answered with the full body
+    if range_header and ',' not in range_header and request.headers.get('if-range', etag) == etag:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+        start, end = byte_range
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    headers['Content-Length'] = str(end - start + 1)
+
+    def chunks():
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(64 * 1024, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(chunks(), status_code=status_code, media_type=media_type, headers=headers)
+
+def _job_response(job) -> dict:
+    response = job.to_dict()
+    if job.status == 'completed':
+        response['download_url'] = f"/exports/{job.job_id}/download"
+    return response
+
+def _parse_range(range_header: str, size: int) -> Optional[tuple]:
+    """Parse a single `bytes=` range into inclusive offsets, or None if unsatisfiable"""
+    unit, _, spec = range_header.partition('=')
+    if unit.strip() != 'bytes':
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+@app.post("/crawl", summary="Crawl and analyze a site")
+async def start_crawl(request: CrawlRequest):
+    """
+    Start a same-site crawl from a seed URL.
     
-    return Response(
-        content=buffer.getvalue(),
-        media_type='application/pdf',
-        headers={'Content-Disposition': 'attachment; filename=analysis_report.pdf'}
+    - Follows internal links up to `max_depth` hops and `max_pages` pages
+    - Respects robots.txt and seeds the frontier from sitemaps when `use_sitemaps` is set
+    - Every page goes through the analysis pipeline; its `result_ids` work with `/exports`
+    """
+    if not 0 < request.max_pages <= settings.crawl_max_pages or request.max_depth < 0:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "error": f"max_pages must be between 1 and {settings.crawl_max_pages}"
+                     " and max_depth must not be negative"}
+        )
+    job = crawls.submit(
+        str(request.seed), request.max_depth, request.max_pages, request.use_sitemaps, request.custom_prompt
     )
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+@app.get("/crawl/{crawl_id}", summary="Crawl status")
+async def get_crawl(crawl_id: str):
+    job = crawls.get(crawl_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Unknown crawl"})
+    return job.to_dict()
+
+@app.post("/crawl/{crawl_id}/resume", summary="Resume a crawl from its checkpoint")
+async def resume_crawl(crawl_id: str):
+    job = crawls.resume(crawl_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "No checkpoint for this crawl"})
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+@app.delete("/crawl/{crawl_id}", summary="Stop a crawl")
+async def cancel_crawl(crawl_id: str):
+    job = crawls.cancel(crawl_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Unknown crawl"})
+    return job.to_dict()
+
+@app.get("/similar", summary="Find similar or duplicate pages")
+async def similar_pages(url: Optional[str] = None, text: Optional[str] = None, limit: int = 10):
+    """
+    Find analyzed pages similar to an indexed URL or to a piece of text.
+    
+    - Pages are indexed as they are analyzed when `SIMILARITY_DIR` is set
+    - `url` must be a page that was analyzed; it is left out of its own results
+    - Each result has a cosine `score` between 0 and 1; near-copies score above 0.9
+    """
+    if analyzer.similarity is None:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Similarity index is disabled"})
+    if url is None and not text:
+        return JSONResponse(status_code=400, content={"status": "error", "error": "Pass a url or text to match"})
+    if not 1 <= limit <= 100:
+        return JSONResponse(status_code=400, content={"status": "error", "error": "limit must be between 1 and 100"})
+    try:
+        neighbors = await run_in_threadpool(analyzer.similarity.similar, url, text, limit)
+    except KeyError:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "URL is not indexed"})
+    return {"status": "success", "results": [neighbor._asdict() for neighbor in neighbors]}
 
 @app.get("/health", summary="Health check")
 async def health_check():
@@ -146,13 +617,57 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "1.0.0",
+        "uptime_seconds": round(time.time() - started_at, 1),
+        "requests_in_flight": HTTP_IN_FLIGHT.value(),
+        "transport": _transport_summary(),
+        "admission": admission.stats(),
+        "similarity_index": len(analyzer.similarity) if analyzer.similarity is not None else None,
+        # Fetch health is in the wca_stage_* metrics; failed fetches come back as results, not errors
         "services": {
-            "web_scraper": "operational",
-            "ai_service": "operational",
+            "ai_service": "operational" if analyzer.ai_service.api_key else "not_configured",
             "database": "not_configured"
         }
     }
 
+def _transport_summary() -> dict:
+    hosts = http_transport.pool_stats()
+    return {
+        "protocol": http_transport.protocol,
+        "hosts": len(hosts),
+        "connections_opened": sum(counts["connections"] for counts in hosts.values()),
+        "requests": sum(counts["requests"] for counts in hosts.values()),
+    }
+
+@app.post("/admin/profile", summary="Sample all workers for N seconds", response_class=PlainTextResponse)
+async def admin_profile(request: Request, seconds: float = 10.0):
+    """
+    Run the sampling profiler across every worker and return merged collapsed stacks.
+    
+    Requires `PROFILING_ENABLED` and `ADMIN_TOKEN`, which must be sent as `X-Admin-Token`.
+    """
+    if not settings.profiling_enabled:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Profiling is disabled"})
+    if not settings.admin_token:
+        return JSONResponse(status_code=403, content={"status": "error", "error": "ADMIN_TOKEN is not set"})
+    token = request.headers.get("x-admin-token", "").encode()
+    if not hmac.compare_digest(token, settings.admin_token.encode()):
+        return JSONResponse(status_code=403, content={"status": "error", "error": "Invalid admin token"})
+    if not 0 < seconds <= settings.profile_max_seconds:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "error": f"seconds must be between 0 and {settings.profile_max_seconds}"}
+        )
+    collapsed = await profile_coordinator.profile_cluster(seconds)
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": "attachment; filename=cluster.collapsed"}
+    )
+
+@app.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage latency histograms, error and cache counters, and in-flight gauges"""
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("frontend.app:app", host="127.0.0.1", port=8000, reload=True)
@@ -78,11 +78,13 @@ document.addEventListener('DOMContentLoaded', function() {
         
         exportBtn.onclick = async function() {
             try {
-                const response = await fetch('http://127.0.0.1:8001/export-pdf', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify(resultData)
-                });
+                const response = resultData.result_id
+                    ? await exportStoredResult(resultData.result_id)
+                    : await fetch('http://127.0.0.1:8001/export-pdf', {
+                        method: 'POST',
+                        headers: {'Content-Type': 'application/json'},
+                        body: JSON.stringify(resultData)
+                    });
                 
                 if (response.ok) {
                     const blob = await response.blob();
@@ -103,3 +105,20 @@ document.addEventListener('DOMContentLoaded', function() {
         container.appendChild(exportBtn);
     }
 
+    // Export a stored result through a background job instead of re-uploading it
+    async function exportStoredResult(resultId) {
+        const jobResponse = await fetch('http://127.0.0.1:8001/exports', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ result_ids: [resultId], format: 'pdf' })
+        });
+        let job = await jobResponse.json();
+        while (job.status === 'pending' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, 250));
+            job = await (await fetch('http://127.0.0.1:8001/exports/' + job.job_id)).json();
+        }
+        if (job.status !== 'completed') {
+            return new Response(null, { status: 500 });
+        }
+        return fetch('http://127.0.0.1:8001' + job.download_url);
+    }
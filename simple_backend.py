@@ -1,9 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-import io
+from backend.pdf_renderer import pdf_renderer
 
 app = FastAPI()
 
@@ -20,29 +18,9 @@ def root():
 
 @app.post("/export-pdf")  
 def export_pdf(data: dict):
-    # Create proper PDF
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    
-    # Get data
-    analysis = data.get('analysis', {})
-    url = data.get('url', 'N/A')
-    title = analysis.get('title', 'No Title')
-    summary = analysis.get('summary', 'No Summary')
-    
-    # Draw content
-    p.drawString(50, 750, "Web Content Analysis Report")
-    p.drawString(50, 720, f"URL: {url}")
-    p.drawString(50, 700, f"Title: {title}")
-    p.drawString(50, 680, f"Summary: {summary}")
-    p.drawString(50, 660, f"Sentiment: {analysis.get('sentiment', 'N/A')}")
-    p.drawString(50, 640, f"Confidence: {analysis.get('confidence_score', 'N/A')}")
-    
-    p.save()
-    buffer.seek(0)
-    
+    # Rendered by the shared engine; sync endpoints already run in a threadpool
     return Response(
-        content=buffer.getvalue(),
+        content=pdf_renderer.render_bytes(data),
         media_type='application/pdf',
         headers={'Content-Disposition': 'attachment; filename=analysis_report.pdf'}
     )